@@ -0,0 +1,337 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+from crewai import LLM
+from config.settings import APP_CONFIG, MODEL_ROUTING_CONFIG
+from utils.metrics import METRICS, estimate_cost
+from utils.resilience import (
+    DeadlineExceeded, call_with_timeout, check_deadline, deadline_reached,
+    get_circuit_breaker, get_concurrency_limiter, get_latency_tracker, get_rate_budget, is_rate_limit_error
+)
+from utils.scheduler import current_priority
+from utils.token_budget import count_tokens
+
+
+def _message_text(messages) -> str:
+    """Flatten a prompt (string or chat message list) into plain text"""
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else message
+        if isinstance(content, list):
+            content = " ".join(str(c.get("text", "")) if isinstance(c, dict) else str(c) for c in content)
+        parts.append(str(content or ""))
+    return "\n".join(parts)
+
+
+# Provider-reported usage (and time to first token) of the request running in the current context
+_usage: ContextVar[Optional[dict]] = ContextVar("llm_usage", default=None)
+
+
+def _install_usage_capture():
+    """
+    Wrap litellm.completion once so each response's `usage` reaches the request that sent it
+
+    LLM.call returns only the text. With APP_CONFIG.LLM_STREAM_TTFT the
+    wrapper streams non-streaming calls, times the first chunk as `ttft_s`
+    and rebuilds the full response, so callers see no difference. Where the
+    provider reports no usage, the calling code falls back to tiktoken
+    estimates.
+    """
+    import litellm
+    
+    completion = litellm.completion
+    if getattr(completion, "_captures_usage", False):
+        return
+    
+    def streamed_completion(sink: dict, args, kwargs):
+        start = time.perf_counter()
+        chunks = []
+        stream = completion(*args, **{**kwargs, "stream": True, "stream_options": {"include_usage": True}})
+        for chunk in stream:
+            if "ttft_s" not in sink and chunk.choices and (
+                    getattr(chunk.choices[0].delta, "content", None)
+                    or getattr(chunk.choices[0].delta, "tool_calls", None)):
+                sink["ttft_s"] = time.perf_counter() - start
+            chunks.append(chunk)
+        return litellm.stream_chunk_builder(chunks, messages=kwargs.get("messages"))
+    
+    @wraps(completion)
+    def capturing_completion(*args, **kwargs):
+        sink = _usage.get()
+        if sink is not None and APP_CONFIG.LLM_STREAM_TTFT and not kwargs.get("stream"):
+            response = streamed_completion(sink, args, kwargs)
+        else:
+            response = completion(*args, **kwargs)
+        usage = getattr(response, "usage", None)
+        if sink is not None and usage is not None:
+            for key in ("prompt_tokens", "completion_tokens"):
+                value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+                if value is not None:
+                    sink[key] = value
+        return response
+    
+    capturing_completion._captures_usage = True
+    litellm.completion = capturing_completion
+
+
+def _provider(model: str) -> str:
+    """Provider prefix of a model name (e.g. "sambanova")"""
+    return model.split("/", 1)[0] if "/" in model else model
+
+
+class InstrumentedLLM(LLM):
+    """
+    LLM that enforces per-call deadlines, optionally hedges slow calls, falls
+    back to another model when throttled, fails fast while the provider's
+    circuit breaker is open, and records latency, token usage, cost and
+    routing of every call
+    """
+
+    def __init__(self, *args, agent_name: str = "agent", task_name: str = None,
+                 route_reason: str = "default", fallback_model: str = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.agent_name = agent_name
+        self.task_name = task_name
+        self.route_reason = route_reason
+        self.fallback_model = fallback_model
+        self._llm_kwargs = {k: v for k, v in kwargs.items() if k != "model"}
+        self._fallback_llm = None
+        _install_usage_capture()
+
+    def call(self, messages, *args, **kwargs):
+        # Stop here if the surrounding task was cancelled or ran out of time
+        check_deadline()
+        
+        parent_call = super().call
+        try:
+            return self._instrumented_call(
+                lambda: parent_call(messages, *args, **kwargs), self.model, "primary", messages
+            )
+        except Exception as e:
+            if not (self.fallback_model and is_rate_limit_error(e)):
+                raise
+        
+        # Primary model is throttled: retry once on the fallback model
+        fallback = self._get_fallback_llm()
+        return self._instrumented_call(
+            lambda: fallback.call(messages, *args, **kwargs), fallback.model, "fallback", messages
+        )
+
+    def _get_fallback_llm(self) -> LLM:
+        if self._fallback_llm is None:
+            self._fallback_llm = LLM(model=self.fallback_model, **self._llm_kwargs)
+        return self._fallback_llm
+
+    def _instrumented_call(self, func, model: str, route: str, messages):
+        """Run one LLM call with deadline/hedging, recording every request it sends"""
+        
+        priority = current_priority()
+        provider = _provider(model)
+        prompt_tokens = count_tokens(_message_text(messages))
+        
+        # Fail fast while the provider is down, before queueing for capacity or spending budget
+        breaker = get_circuit_breaker(provider)
+        breaker.check()
+        try:
+            first = _admit(provider, prompt_tokens, priority)
+        except BaseException:
+            # Gave up waiting (deadline or cancellation): free a half-open probe slot
+            breaker.record_abandoned()
+            raise
+        
+        tracker = get_latency_tracker(model)
+        hedge_after = tracker.percentile(APP_CONFIG.HEDGE_PERCENTILE) if APP_CONFIG.HEDGE_REQUESTS else None
+        requests = {False: first}
+        call = {"hedged": False, "settled": False}
+        lock = threading.Lock()
+        labels = {"task": self.task_name} if self.task_name else {}
+        
+        def attempt(is_hedge: bool):
+            """One request; holds its slot and budget until the provider answers, even if abandoned"""
+            request = requests[is_hedge]
+            
+            def run():
+                start = time.perf_counter()
+                response = None
+                status = "success"
+                usage = {}
+                _usage.set(usage)
+                try:
+                    response = func()
+                    return response
+                except Exception as e:
+                    if is_rate_limit_error(e):
+                        status = "throttled"
+                    elif isinstance(e, TimeoutError) or "timeout" in type(e).__name__.lower():
+                        status = "timeout"
+                    else:
+                        status = "error"
+                    raise
+                finally:
+                    latency = time.perf_counter() - start
+                    # Provider-reported usage, else estimates (the budget already holds the estimate)
+                    sent_tokens = usage.get("prompt_tokens", prompt_tokens)
+                    completion_tokens = usage.get("completion_tokens")
+                    if completion_tokens is None:
+                        completion_tokens = count_tokens(str(response)) if response is not None else 0
+                    _release(request, latency, status,
+                             completion_tokens + max(0, sent_tokens - prompt_tokens))
+                    if status == "success":
+                        with lock:
+                            # Only the first answer reaches the caller; later ones are paid for but unused
+                            if call["settled"]:
+                                status = "discarded"
+                            call["settled"] = True
+                    METRICS.record(
+                        "llm_call",
+                        agent=self.agent_name,
+                        model=model,
+                        route=route,
+                        route_reason=self.route_reason,
+                        priority=priority,
+                        status=status,
+                        hedged=call["hedged"],
+                        hedge=is_hedge,
+                        queue_s=request["queue_s"],
+                        budget_wait_s=request["budget_wait_s"],
+                        concurrency_limit=int(request["limiter"].limit) if request["limiter"] else None,
+                        ttft_s=usage.get("ttft_s"),
+                        latency_s=latency,
+                        prompt_tokens=sent_tokens,
+                        completion_tokens=completion_tokens,
+                        usage_source="provider" if "completion_tokens" in usage else "estimate",
+                        cost_usd=estimate_cost(model, sent_tokens, completion_tokens),
+                        **labels
+                    )
+            return run
+        
+        def hedge():
+            # A hedge only goes out if the provider has a free slot and budget for it right now
+            second = _admit(provider, prompt_tokens, priority, wait=False)
+            if second is None:
+                return None
+            requests[True] = second
+            call["hedged"] = True
+            return attempt(True)
+        
+        def unstarted(is_hedge: bool):
+            _release(requests[is_hedge], 0.0, "rejected")
+        
+        start = time.perf_counter()
+        try:
+            response, _ = call_with_timeout(
+                attempt(False), APP_CONFIG.LLM_CALL_TIMEOUT, hedge_after, hedge, unstarted
+            )
+            tracker.record(time.perf_counter() - start)
+            breaker.record_success()
+            return response
+        except TimeoutError as e:
+            if isinstance(e, DeadlineExceeded) or deadline_reached():
+                # The task ran out of time or was cancelled: says nothing about the provider
+                breaker.record_abandoned()
+            else:
+                breaker.record_failure(e)
+            raise
+        except Exception as e:
+            if is_rate_limit_error(e):
+                # Throttled, not down: the provider is answering
+                breaker.record_success()
+            else:
+                breaker.record_failure(e)
+            raise
+        finally:
+            with lock:
+                call["settled"] = True
+
+
+def _admit(provider: str, prompt_tokens: int, priority: str, wait: bool = True) -> Optional[dict]:
+    """
+    Take the shared rate budget and an in-flight slot for one request
+
+    Args:
+        wait: With False, take them only if both are available right now
+
+    Returns:
+        dict: What the request holds and how long it waited, or None if
+            wait is False and the provider has no spare capacity
+    """
+    budget = get_rate_budget()
+    limiter = get_concurrency_limiter(provider) if APP_CONFIG.ADAPTIVE_CONCURRENCY else None
+    request = {"provider": provider, "priority": priority, "budget": budget, "limiter": limiter,
+               "budget_wait_s": 0.0, "queue_s": 0.0}
+    if wait:
+        # Wait for the rate budget shared with other worker processes, then for a slot
+        if budget:
+            request["budget_wait_s"] = budget.acquire(provider, prompt_tokens, priority)
+        if limiter:
+            request["queue_s"] = limiter.acquire(priority)
+        return request
+    
+    if limiter and not limiter.try_acquire(priority):
+        return None
+    if budget and budget.acquire(provider, prompt_tokens, priority, wait=False) is None:
+        if limiter:
+            limiter.release(0.0, "rejected", priority)
+        return None
+    return request
+
+
+def _release(request: dict, latency: float, status: str, completion_tokens: int = 0):
+    """Free a request's slot, adapting the limit, and charge its completion tokens"""
+    if request["limiter"]:
+        request["limiter"].release(latency, status, request["priority"])
+    if request["budget"]:
+        request["budget"].spend(request["provider"], completion_tokens)
+
+
+def route_model(agent_name: str, task_name: str = None) -> tuple:
+    """
+    Pick the model for an agent/task from the routing configuration
+    
+    An explicit LLM_MODEL or LLM_BASE_URL override (e.g. the mock server)
+    disables routing so every agent uses that endpoint.
+    
+    Returns:
+        tuple: (model, reason)
+    """
+    
+    overridden = APP_CONFIG.LLM_BASE_URL or APP_CONFIG.LLM_MODEL != APP_CONFIG.SAMBANOVA_MODEL
+    if not MODEL_ROUTING_CONFIG.ENABLED or overridden:
+        return APP_CONFIG.LLM_MODEL, "default"
+    
+    if task_name in MODEL_ROUTING_CONFIG.TASK_MODELS:
+        return MODEL_ROUTING_CONFIG.TASK_MODELS[task_name], f"task:{task_name}"
+    if agent_name in MODEL_ROUTING_CONFIG.AGENT_MODELS:
+        return MODEL_ROUTING_CONFIG.AGENT_MODELS[agent_name], f"agent:{agent_name}"
+    
+    return APP_CONFIG.LLM_MODEL, "default"
+
+
+def create_llm(agent_name: str, task_name: str = None, **kwargs) -> InstrumentedLLM:
+    """
+    Create an agent's LLM from the routing and endpoint configuration
+    
+    Extra keyword arguments (e.g. max_tokens) are passed to the LLM and its fallback.
+    """
+    
+    model, reason = route_model(agent_name, task_name)
+    fallback_model = MODEL_ROUTING_CONFIG.FALLBACK_MODELS.get(model) if reason != "default" else None
+    
+    if APP_CONFIG.LLM_BASE_URL:
+        kwargs["base_url"] = APP_CONFIG.LLM_BASE_URL
+    
+    return InstrumentedLLM(
+        model=model,
+        api_key=APP_CONFIG.LLM_API_KEY or os.getenv("SAMBANOVA_API_KEY"),
+        timeout=APP_CONFIG.LLM_CALL_TIMEOUT,
+        agent_name=agent_name,
+        task_name=task_name,
+        route_reason=reason,
+        fallback_model=fallback_model,
+        **kwargs
+    )
@@ -1,13 +1,15 @@
 from crewai import Task
 from datetime import datetime
-from config.settings import TASK_CONFIG
+from config.settings import TASK_CONFIG, COMPACT_TASK_CONFIG, HYBRID_REPORT_CONFIG
+from tasks.analysis_task import with_target
 
 
 class ReportTaskManager:
     """Manages report generation tasks for financial analysis"""
     
     @staticmethod
-    def create_investment_report_task(agent, symbol: str, analysis_context: str = None) -> Task:
+    def create_investment_report_task(agent, symbol: str, analysis_context: str = None,
+                                      variant: str = "full") -> Task:
         """
         Create a comprehensive investment report generation task
         
@@ -15,17 +17,21 @@ class ReportTaskManager:
             agent: The report writer agent
             symbol: Stock ticker symbol
             analysis_context: Context from previous analysis (optional)
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured report generation task
         """
         
-        description = f"""
-        Transform the stock analysis into a comprehensive, professional investment report for {symbol}.
+        if variant == "compact":
+            return _create_compact_report_task("investment_report", agent, symbol, analysis_context)
+        
+        description = """
+        Transform the stock analysis into a comprehensive, professional investment report for the target stock.
         
         **Report Structure & Requirements:**
         
-        # 📊 {symbol} Investment Analysis Report
+        # 📊 <SYMBOL> Investment Analysis Report
         
         ## 🎯 Executive Summary
         **Requirements:**
@@ -155,8 +161,8 @@ class ReportTaskManager:
         - Professional institutional format
         """
         
-        expected_output = f"""
-        Professional investment report for {symbol} containing:
+        expected_output = """
+        Professional investment report for the target stock containing:
         
         ✅ **Executive Summary** with clear recommendation
         ✅ **Metrics Dashboard** with formatted table
@@ -173,26 +179,32 @@ class ReportTaskManager:
         """
         
         return Task(
-            description=description,
+            description=_with_analysis_context(description, symbol, analysis_context),
             expected_output=expected_output,
             agent=agent
         )
     
     @staticmethod
-    def create_executive_summary_task(agent, symbol: str) -> Task:
+    def create_executive_summary_task(agent, symbol: str, analysis_context: str = None,
+                                      variant: str = "full") -> Task:
         """
         Create a concise executive summary task
         
         Args:
             agent: The report writer agent
             symbol: Stock ticker symbol
+            analysis_context: Output of a previous analysis stage (optional)
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured executive summary task
         """
         
-        description = f"""
-        Create a concise, high-impact executive summary for {symbol} analysis.
+        if variant == "compact":
+            return _create_compact_report_task("executive_summary", agent, symbol, analysis_context)
+        
+        description = """
+        Create a concise, high-impact executive summary of the target stock analysis.
         
         **Executive Summary Requirements:**
         
@@ -236,8 +248,8 @@ class ReportTaskManager:
         - Actionable insights only
         """
         
-        expected_output = f"""
-        Executive summary for {symbol} including:
+        expected_output = """
+        Executive summary for the target stock including:
         1. Investment thesis (50-75 words)
         2. Clear recommendation with rating
         3. Key metrics snapshot
@@ -249,30 +261,36 @@ class ReportTaskManager:
         """
         
         return Task(
-            description=description,
+            description=_with_analysis_context(description, symbol, analysis_context),
             expected_output=expected_output,
             agent=agent
         )
     
     @staticmethod
-    def create_technical_report_task(agent, symbol: str) -> Task:
+    def create_technical_report_task(agent, symbol: str, analysis_context: str = None,
+                                     variant: str = "full") -> Task:
         """
         Create a technical analysis focused report task
         
         Args:
             agent: The report writer agent
             symbol: Stock ticker symbol
+            analysis_context: Output of a previous analysis stage (optional)
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured technical report task
         """
         
-        description = f"""
-        Create a technical analysis report for {symbol} focused on price action and trading signals.
+        if variant == "compact":
+            return _create_compact_report_task("technical_report", agent, symbol, analysis_context)
+        
+        description = """
+        Create a technical analysis report for the target stock focused on price action and trading signals.
         
         **Technical Report Structure:**
         
-        # 📈 {symbol} Technical Analysis Report
+        # 📈 <SYMBOL> Technical Analysis Report
         
         ## 🎯 Technical Summary
         - **Overall Trend**: Bullish/Bearish/Neutral with strength
@@ -337,8 +355,8 @@ class ReportTaskManager:
         - 400-600 words focused content
         """
         
-        expected_output = f"""
-        Technical analysis report for {symbol} with:
+        expected_output = """
+        Technical analysis report for the target stock with:
         1. Technical summary and trend assessment
         2. Support/resistance level identification
         3. Technical indicator analysis
@@ -350,30 +368,36 @@ class ReportTaskManager:
         """
         
         return Task(
-            description=description,
+            description=_with_analysis_context(description, symbol, analysis_context),
             expected_output=expected_output,
             agent=agent
         )
     
     @staticmethod
-    def create_risk_report_task(agent, symbol: str) -> Task:
+    def create_risk_report_task(agent, symbol: str, analysis_context: str = None,
+                                variant: str = "full") -> Task:
         """
         Create a risk-focused analysis report task
         
         Args:
             agent: The report writer agent
             symbol: Stock ticker symbol
+            analysis_context: Output of a previous analysis stage (optional)
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured risk analysis report task
         """
         
-        description = f"""
-        Create a comprehensive risk analysis report for {symbol} investment.
+        if variant == "compact":
+            return _create_compact_report_task("risk_report", agent, symbol, analysis_context)
+        
+        description = """
+        Create a comprehensive risk analysis report for an investment in the target stock.
         
         **Risk Report Framework:**
         
-        # ⚠️ {symbol} Risk Analysis Report
+        # ⚠️ <SYMBOL> Risk Analysis Report
         
         ## 🎯 Risk Profile Summary
         - **Overall Risk Level**: Low/Medium/High with justification
@@ -459,8 +483,8 @@ class ReportTaskManager:
         - 500-700 words comprehensive coverage
         """
         
-        expected_output = f"""
-        Risk analysis report for {symbol} including:
+        expected_output = """
+        Risk analysis report for the target stock including:
         1. Risk profile summary and classification
         2. Quantitative risk metrics and volatility
         3. Specific risk category analysis
@@ -472,21 +496,97 @@ class ReportTaskManager:
         """
         
         return Task(
-            description=description,
+            description=_with_analysis_context(description, symbol, analysis_context),
+            expected_output=expected_output,
+            agent=agent
+        )
+    
+    @staticmethod
+    def create_narrative_report_task(agent, symbol: str, report_type: str,
+                                     analysis_context: str = None, sections: list = None) -> Task:
+        """
+        Create a narrative-only report task for hybrid report assembly
+        
+        Tables and header blocks are rendered locally (utils.report_assembler),
+        so the LLM writes only the narrative sections.
+        
+        Args:
+            agent: The report writer agent
+            symbol: Stock ticker symbol
+            report_type: Report type whose narrative sections to write
+            analysis_context: Output of a previous analysis stage (optional)
+            sections: Subset of the narrative sections to write (default: all)
+            
+        Returns:
+            Task: Configured narrative report task
+        """
+        
+        title = HYBRID_REPORT_CONFIG.REPORT_TITLES[report_type]
+        all_sections = HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS[report_type]
+        sections = [s for s in all_sections if s in sections] if sections else all_sections
+        headings = "\n".join(f"        ## {section}" for section in sections)
+        length = HYBRID_REPORT_CONFIG.NARRATIVE_LENGTH[report_type]
+        if len(sections) < len(all_sections):
+            # Remaining sections are reused from cache: keep each at its usual share
+            length = f"about {len(sections)}/{len(all_sections)} of a {length} report"
+        
+        description = f"""
+        Write the narrative sections of the {title} for the target stock.
+        
+        Use markdown and exactly these headings, in this order:
+        
+{headings}
+        
+        **Rules:**
+        - Do NOT write a title, header block, or any table of metrics. Price, market cap,
+          P/E, 52-week range, volume and rating tables are rendered separately from live data.
+        - Cite figures in prose only where they support an argument.
+        - Bold key findings and the final rating.
+        - Professional tone, {length} in total.
+        """
+        
+        expected_output = f"""
+        Narrative sections for the {title}, one "## " heading each:
+        {", ".join(sections)}. No title and no metrics tables.
+        """
+        
+        return Task(
+            description=_with_analysis_context(description, symbol, analysis_context),
             expected_output=expected_output,
             agent=agent
         )
 
 
+def _with_analysis_context(description: str, symbol: str, analysis_context: str = None) -> str:
+    """
+    Append the per-symbol target block and the output of a previous analysis
+    stage to a static task description (static instructions stay a shared prefix)
+    """
+    
+    description = with_target(description, symbol)
+    if not analysis_context:
+        return description
+    
+    return f"{description}\n**Analysis Context:**\n{analysis_context}\n"
+
+
+def _create_compact_report_task(report_type: str, agent, symbol: str,
+                                analysis_context: str = None) -> Task:
+    """Build a report task from the compact template for the given report type"""
+    
+    template = COMPACT_TASK_CONFIG.REPORT_TASKS[report_type]
+    
+    return Task(
+        description=_with_analysis_context(template["description"], symbol, analysis_context),
+        expected_output=template["expected_output"],
+        agent=agent
+    )
+
+
 # Report utility functions
 def get_available_report_types() -> list:
     """Return list of available report types"""
-    return [
-        "investment_report",
-        "executive_summary",
-        "technical_report", 
-        "risk_report"
-    ]
+    return list(TASK_CONFIG.REPORT_TYPES)
 
 
 def create_report_task_by_type(report_type: str, agent, symbol: str, **kwargs) -> Task:
@@ -498,23 +598,29 @@ def create_report_task_by_type(report_type: str, agent, symbol: str, **kwargs) -
         agent: Report writer agent
         symbol: Stock symbol to analyze
         **kwargs: Additional parameters for specific report types
+                  (analysis_context, variant, hybrid, sections)
         
     Returns:
         Task: Configured report task instance
     """
     
     task_manager = ReportTaskManager()
+    analysis_context = kwargs.get('analysis_context')
+    variant = kwargs.get('variant', 'full')
     
-    if report_type == "investment_report":
-        return task_manager.create_investment_report_task(
-            agent, symbol, kwargs.get('analysis_context')
+    if kwargs.get('hybrid') and report_type in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS:
+        return task_manager.create_narrative_report_task(
+            agent, symbol, report_type, analysis_context, kwargs.get('sections')
         )
+    
+    if report_type == "investment_report":
+        return task_manager.create_investment_report_task(agent, symbol, analysis_context, variant)
     elif report_type == "executive_summary":
-        return task_manager.create_executive_summary_task(agent, symbol)
+        return task_manager.create_executive_summary_task(agent, symbol, analysis_context, variant)
     elif report_type == "technical_report":
-        return task_manager.create_technical_report_task(agent, symbol)
+        return task_manager.create_technical_report_task(agent, symbol, analysis_context, variant)
     elif report_type == "risk_report":
-        return task_manager.create_risk_report_task(agent, symbol)
+        return task_manager.create_risk_report_task(agent, symbol, analysis_context, variant)
     else:
         raise ValueError(f"Unknown report type: {report_type}")
 
@@ -1,17 +1,15 @@
-from crewai import Agent, LLM
+from crewai import Agent
+from agents.llm import create_llm
+from config.settings import AGENT_CONFIG
 from tools.financial_tools import YFinanceStockTool
-import os
 
 
-def create_stock_analyst_agent():
-    """Creates and returns the Stock Analyst Agent"""
+def create_stock_analyst_agent(task_name: str = None):
+    """Creates and returns the Stock Analyst Agent (model routed per task if given)"""
     
     # Initialize tool & LLM
     stock_tool = YFinanceStockTool()
-    llm = LLM(
-        model="sambanova/Llama-4-Maverick-17B-128E-Instruct",
-        api_key=os.getenv("SAMBANOVA_API_KEY")
-    )
+    llm = create_llm("stock_analyst", task_name)
 
     # Stock Analysis Agent
     stock_analysis_agent = Agent(
@@ -20,19 +18,17 @@ def create_stock_analyst_agent():
         backstory="Seasoned analyst focused on data-driven insights.",
         llm=llm,
         tools=[stock_tool],
-        verbose=True
+        verbose=True,
+        max_execution_time=AGENT_CONFIG.STOCK_ANALYST["max_execution_time"]
     )
     
     return stock_analysis_agent
 
 
-def create_report_writer_agent():
-    """Creates and returns the Report Writer Agent"""
+def create_report_writer_agent(task_name: str = None):
+    """Creates and returns the Report Writer Agent (model routed per task if given)"""
     
-    llm = LLM(
-        model="sambanova/Llama-4-Maverick-17B-128E-Instruct",
-        api_key=os.getenv("SAMBANOVA_API_KEY")
-    )
+    llm = create_llm("report_writer", task_name)
 
     # Report Writing Agent
     report_writer_agent = Agent(
@@ -40,7 +36,8 @@ def create_report_writer_agent():
         goal="Create a professional investment report",
         backstory="Expert writer for institutional-grade reports.",
         llm=llm,
-        verbose=True
+        verbose=True,
+        max_execution_time=AGENT_CONFIG.REPORT_WRITER["max_execution_time"]
     )
     
     return report_writer_agent
\ No newline at end of file
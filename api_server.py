@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Multi-Agent Financial Analyst - HTTP API service
+
+A dependency-free ASGI application exposing quick info, asynchronous
+analysis jobs and batch requests to internal tools, so they no longer pay
+CLI process startup on every call. One process keeps a pool of warm crews
+(shared analysis/section caches, LLM clients, concurrency and circuit state)
+for all requests.
+
+Endpoints:
+    GET  /info/{symbol}      Quick stock information (no AI analysis)
+    POST /analyze/{symbol}   Queue an analysis; returns a job id (202)
+    GET  /reports/{id}       Job status, with the report record once finished
+    POST /batch              {"symbols": [...], "summaries_only": false}; rejected
+                             symbols are listed in the response, not queued
+    GET  /health             Pool size and job counts
+
+Queued jobs are served by weighted fair queueing between priority classes:
+analyses run as "api" (or "interactive" with {"priority": "interactive"} for
+a user waiting on the result) and batch requests as "batch", so a large
+batch does not hold up single analyses.
+
+Run with any ASGI server, e.g. `uvicorn api_server:app`, or locally against
+recorded market data and the mock LLM:
+
+    python api_server.py --replay-data replay_data --mock-llm
+    curl -X POST localhost:8000/analyze/AAPL
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+from crew.batch_summaries import run_batch_summaries
+from crew.financial_crew import FinancialCrew
+from tools.stock_data import get_quick_info
+from utils.helpers import SYMBOL_PATTERN, validate_stock_symbol
+from utils.metrics import METRICS
+from utils.scheduler import WeightedFairQueue, priority_class
+from utils.symbols import normalize_symbol, prevalidate_symbols
+from utils.sinks import build_record
+from config.settings import API_CONFIG, APP_CONFIG
+
+
+class AnalysisService:
+    """Crew pool and job table shared by every request"""
+
+    def __init__(self, prompt_variant: str = None, hybrid: bool = False, pool_size: int = None):
+        self.prompt_variant = prompt_variant
+        self.hybrid = hybrid
+        self.pool_size = pool_size or API_CONFIG.CREW_POOL_SIZE
+        self._crews = queue.Queue()
+        # Structured analyses shared by every crew in the pool
+        self._analyses = {}
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        # Queued (job, context) pairs, served by priority class
+        self._queue = WeightedFairQueue()
+        self._queue_ready = threading.Condition(self._lock)
+        self._stopping = False
+
+    def start(self):
+        """Create the crew pool and job workers"""
+        for _ in range(self.pool_size):
+            crew = FinancialCrew(prompt_variant=self.prompt_variant, hybrid=self.hybrid)
+            crew.analyses = self._analyses
+            self._crews.put(crew)
+        for i in range(self.pool_size):
+            threading.Thread(target=self._work, name=f"api-job-{i}", daemon=True).start()
+
+    def shutdown(self):
+        """Stop accepting work and drop queued jobs"""
+        with self._lock:
+            self._stopping = True
+            self._queue = WeightedFairQueue()
+            self._queue_ready.notify_all()
+
+    def counts(self) -> dict:
+        """Number of jobs per status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+    def submit(self, job_type: str, symbols: List[str], priority: str = "api",
+               validated: bool = False) -> dict:
+        """
+        Queue a job ("analysis" of one symbol or "summaries" of several)
+
+        Args:
+            job_type: "analysis" or "summaries"
+            symbols: Symbols of the job
+            priority: Priority class the job is queued and run under
+            validated: The symbols already passed bulk pre-validation
+
+        Raises:
+            OverflowError: MAX_PENDING_JOBS jobs are already queued or running
+        """
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+            if pending >= API_CONFIG.MAX_PENDING_JOBS:
+                raise OverflowError(f"{pending} jobs pending, try again later")
+            job = {
+                "id": uuid.uuid4().hex,
+                "type": job_type,
+                "symbols": symbols,
+                "priority": priority,
+                "validated": validated,
+                "status": "queued",
+                "created": datetime.now().isoformat()
+            }
+            self._jobs[job["id"]] = job
+            self._evict()
+            self._queue.push((job, contextvars.copy_context(), time.monotonic()), priority)
+            self._queue_ready.notify()
+
+        return self.get_job(job["id"])
+
+    def get_job(self, job_id: str) -> Optional[dict]:
+        """Snapshot of a job, or None if unknown (or evicted)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond JOB_HISTORY (lock held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+        for job_id in finished[:max(0, len(self._jobs) - API_CONFIG.JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def _update(self, job: dict, **fields):
+        with self._lock:
+            job.update(fields)
+
+    def _work(self):
+        """Job worker thread: run queued jobs, highest-priority class first"""
+        while True:
+            with self._lock:
+                while not self._queue and not self._stopping:
+                    self._queue_ready.wait()
+                if self._stopping:
+                    return
+                priority, (job, context, queued) = self._queue.pop()
+            context.run(self._run_queued, job, priority, time.monotonic() - queued)
+
+    def _run_queued(self, job: dict, priority: str, queue_wait: float):
+        METRICS.record("api_job", type=job["type"], priority=priority, queue_s=queue_wait)
+        with priority_class(priority):
+            self._run(job)
+
+    def _run(self, job: dict):
+        """Execute a job on a worker thread"""
+        start = time.time()
+        self._update(job, status="running", started=datetime.now().isoformat())
+        try:
+            if job["type"] == "summaries":
+                result = run_batch_summaries(job["symbols"])
+                failed = all(r["status"] != "success" for r in result.values())
+            else:
+                result = self._analyze(job["symbols"][0], job["validated"])
+                failed = result["status"] != "success"
+            self._update(job, status="failed" if failed else "done", result=result)
+        except Exception as e:
+            self._update(job, status="failed", error=str(e))
+        finally:
+            self._update(job, finished=datetime.now().isoformat(), duration_s=round(time.time() - start, 3))
+
+    def _analyze(self, symbol: str, validated: bool = False) -> dict:
+        """Analyze one symbol on a pooled crew and return its result record"""
+        with METRICS.run_context(symbol=symbol):
+            if not validated and not validate_stock_symbol(symbol):
+                return build_record(symbol, f"Error: Invalid stock symbol '{symbol}'")
+
+            crew = self._crews.get()
+            try:
+                text = crew.analyze_stock(symbol)
+                return build_record(symbol, text, crew.analyses.get(symbol))
+            finally:
+                self._crews.put(crew)
+
+
+def _job_view(job: dict) -> dict:
+    return {**job, "report_url": f"/reports/{job['id']}"}
+
+
+class ApiApp:
+    """ASGI application routing requests to an AnalysisService"""
+
+    ROUTES = [
+        ("GET", re.compile(r"^/info/(?P<symbol>[^/]+)$"), "info"),
+        ("POST", re.compile(r"^/analyze/(?P<symbol>[^/]+)$"), "analyze"),
+        ("GET", re.compile(r"^/reports/(?P<job_id>[0-9a-f]+)$"), "report"),
+        ("POST", re.compile(r"^/batch$"), "batch"),
+        ("GET", re.compile(r"^/health$"), "health")
+    ]
+
+    def __init__(self, service: AnalysisService = None):
+        self.service = service or AnalysisService()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._info_in_flight = 0
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if not self._started:
+                self.service.start()
+                self._started = True
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            start = time.perf_counter()
+            status, body = await self._dispatch(scope, receive)
+            await self._send_json(send, status, body)
+            METRICS.record("api_request", method=scope["method"], path=scope["path"],
+                           status_code=status, duration_s=time.perf_counter() - start)
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await loop.run_in_executor(None, self._ensure_started)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.service.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _dispatch(self, scope, receive) -> Tuple[int, dict]:
+        path_matched = False
+        for method, pattern, name in self.ROUTES:
+            match = pattern.match(scope["path"])
+            if not match:
+                continue
+            path_matched = True
+            if scope["method"] != method:
+                continue
+
+            if not self._started:
+                await asyncio.get_running_loop().run_in_executor(None, self._ensure_started)
+            try:
+                body = await self._read_json(receive) if method == "POST" else {}
+            except ValueError:
+                return 400, {"error": "Request body must be JSON"}
+            try:
+                return await getattr(self, f"_handle_{name}")(body=body, **match.groupdict())
+            except Exception as e:
+                return 500, {"error": str(e)}
+
+        if path_matched:
+            return 405, {"error": "Method not allowed"}
+        return 404, {"error": "Not found"}
+
+    async def _handle_info(self, symbol: str, body: dict) -> Tuple[int, dict]:
+        symbol = normalize_symbol(symbol)
+        if not SYMBOL_PATTERN.match(symbol):
+            return 400, {"error": f"Invalid stock symbol: {symbol}"}
+        if self._info_in_flight >= API_CONFIG.MAX_CONCURRENT_INFO:
+            return 429, {"error": "Too many concurrent info requests"}
+
+        self._info_in_flight += 1
+        try:
+            with METRICS.run_context(symbol=symbol):
+                with METRICS.timed("data_fetch", stage="quick_info"):
+                    info = await asyncio.get_running_loop().run_in_executor(
+                        None, contextvars.copy_context().run, get_quick_info, symbol
+                    )
+        finally:
+            self._info_in_flight -= 1
+        if "error" in info:
+            return (404 if info["error"].startswith("Invalid") else 502), info
+        return 200, info
+
+    async def _handle_analyze(self, symbol: str, body: dict) -> Tuple[int, dict]:
+        symbol = normalize_symbol(symbol)
+        if not SYMBOL_PATTERN.match(symbol):
+            return 400, {"error": f"Invalid stock symbol: {symbol}"}
+        priority = body.get("priority", "api") if isinstance(body, dict) else "api"
+        if priority not in ("interactive", "api"):
+            return 400, {"error": 'priority must be "interactive" or "api"'}
+        try:
+            job = self.service.submit("analysis", [symbol], priority)
+        except OverflowError as e:
+            return 429, {"error": str(e)}
+        return 202, _job_view(job)
+
+    async def _handle_report(self, job_id: str, body: dict) -> Tuple[int, dict]:
+        job = self.service.get_job(job_id)
+        if job is None:
+            return 404, {"error": f"Unknown job: {job_id}"}
+        return 200, _job_view(job)
+
+    async def _handle_batch(self, body: dict) -> Tuple[int, dict]:
+        symbols = body.get("symbols") if isinstance(body, dict) else None
+        if not isinstance(symbols, list) or not symbols:
+            return 400, {"error": 'Body must be {"symbols": [...]}'}
+        if len({normalize_symbol(s) for s in symbols}) > API_CONFIG.MAX_BATCH_SYMBOLS:
+            return 400, {"error": f"At most {API_CONFIG.MAX_BATCH_SYMBOLS} symbols per batch"}
+
+        # Bulk-validate up front; only symbols that can produce a report are queued
+        checked = await asyncio.get_running_loop().run_in_executor(None, prevalidate_symbols, symbols)
+        symbols, rejected = checked["valid"], checked["rejected"]
+        if not symbols:
+            return 400, {"error": "No valid stock symbols", "rejected": rejected}
+
+        try:
+            if body.get("summaries_only"):
+                # One job: several symbols per LLM request
+                job = self.service.submit("summaries", symbols, "batch", validated=checked["verified"])
+                return 202, {**_job_view(job), "rejected": rejected}
+            jobs = [
+                _job_view(self.service.submit("analysis", [symbol], "batch", validated=checked["verified"]))
+                for symbol in symbols
+            ]
+        except OverflowError as e:
+            return 429, {"error": str(e)}
+        return 202, {"jobs": jobs, "rejected": rejected}
+
+    async def _handle_health(self, body: dict) -> Tuple[int, dict]:
+        return 200, {
+            "status": "ok",
+            "version": APP_CONFIG.APP_VERSION,
+            "crew_pool_size": self.service.pool_size,
+            "jobs": self.service.counts()
+        }
+
+    @staticmethod
+    async def _read_json(receive) -> dict:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        raw = b"".join(chunks)
+        return json.loads(raw) if raw.strip() else {}
+
+    @staticmethod
+    async def _send_json(send, status: int, body: dict):
+        payload = json.dumps(body, default=str).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(payload)).encode())]
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+
+# ASGI entry point (e.g. `uvicorn api_server:app`)
+app = ApiApp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-Agent Financial Analyst HTTP API")
+    parser.add_argument('--host', default=API_CONFIG.HOST)
+    parser.add_argument('--port', type=int, default=API_CONFIG.PORT)
+    parser.add_argument('--pool-size', type=int, default=API_CONFIG.CREW_POOL_SIZE,
+                        help='Warm crews shared by all requests (= concurrent analyses)')
+    parser.add_argument('--prompt-variant', choices=APP_CONFIG.PROMPT_VARIANTS,
+                        default=APP_CONFIG.DEFAULT_PROMPT_VARIANT)
+    parser.add_argument('--hybrid', action='store_true',
+                        help='Render metrics tables locally and have the LLM write narrative sections only')
+    parser.add_argument('--replay-data', metavar='DIR',
+                        help='Serve recorded market data from DIR instead of yfinance')
+    parser.add_argument('--mock-llm', action='store_true',
+                        help='Route all agents to an in-process mock LLM')
+    parser.add_argument('--mock-latency', type=float, default=APP_CONFIG.MOCK_LLM["latency_s"])
+    parser.add_argument('--mock-tps', type=float, default=APP_CONFIG.MOCK_LLM["tokens_per_second"])
+    parser.add_argument('--metrics', metavar='FILE', default=APP_CONFIG.METRICS_FILE,
+                        help='Append request/latency/token metrics to FILE as JSON lines')
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ Serving the API requires an ASGI server (pip install uvicorn)")
+        sys.exit(1)
+
+    if args.replay_data:
+        APP_CONFIG.DATA_PROVIDER = "replay"
+        APP_CONFIG.REPLAY_DATA_DIR = args.replay_data
+    if args.mock_llm:
+        from utils.mock_llm import MockLLMServer
+        mock = MockLLMServer(port=0, latency_s=args.mock_latency, tokens_per_second=args.mock_tps)
+        mock.start().route_agents()
+        print(f"🧪 Mock LLM running at {mock.base_url}")
+    if args.metrics:
+        METRICS.configure(args.metrics)
+
+    service = AnalysisService(args.prompt_variant, args.hybrid, args.pool_size)
+    uvicorn.run(ApiApp(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,14 +18,117 @@ class AppConfig:
     # API Configuration
     SAMBANOVA_MODEL = "sambanova/Llama-4-Maverick-17B-128E-Instruct"
     DEFAULT_API_BASE_URL = "https://api.sambanova.ai/v1"
-    
+
+    # Active LLM endpoint (override to point agents at another provider or the mock server)
+    LLM_MODEL = os.getenv("LLM_MODEL", SAMBANOVA_MODEL)
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL")  # None: provider default
+    LLM_API_KEY = os.getenv("LLM_API_KEY")  # None: SAMBANOVA_API_KEY
+
+    # Mock LLM server (utils/mock_llm.py) for offline benchmarking
+    MOCK_LLM_MODEL = "openai/mock-llm"
+    MOCK_LLM = {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "latency_s": 0.2,
+        "tokens_per_second": 150
+    }
+
+    # Model pricing (USD per million tokens) used for cost accounting
+    MODEL_PRICING = {
+        "sambanova/Llama-4-Maverick-17B-128E-Instruct": {
+            "input_per_million": 0.63,
+            "output_per_million": 1.80
+        },
+        "sambanova/Meta-Llama-3.3-70B-Instruct": {
+            "input_per_million": 0.60,
+            "output_per_million": 1.20
+        },
+        "sambanova/Meta-Llama-3.1-8B-Instruct": {
+            "input_per_million": 0.10,
+            "output_per_million": 0.20
+        }
+    }
+
+    # Metrics Configuration
+    METRICS_FILE = os.getenv("METRICS_FILE")  # JSON-lines output, disabled if unset
+
+    # CLI startup budget (checked by utils/startup_benchmark.py with -X importtime)
+    STARTUP_IMPORT_BUDGETS = {  # Seconds of cumulative import time per command
+        "help": 0.3,
+        "config": 0.3,
+        "info": 0.8
+    }
+    STARTUP_HEAVY_MODULES = ["crewai", "langchain", "litellm", "streamlit", "plotly"]
+
+    # Batch output
+    PARQUET_ROW_GROUP_SIZE = 100  # Records buffered per Parquet row group
+
+    # Profiling (main.py --profile)
+    PROFILE_DIR = "profiles"
+    PROFILE_SAMPLE_INTERVAL = 0.005  # Seconds between stack samples of all threads
+    PROFILE_TOP_FUNCTIONS = 30  # Functions listed in each profile summary
+
     # Agent Configuration
     AGENT_VERBOSE = True
-    AGENT_TIMEOUT = 300  # 5 minutes
+    AGENT_TIMEOUT = 300  # 5 minutes, deadline for a whole crew run
+    REPORT_FANOUT_WORKERS = 4  # Concurrent report crews per analysis
+
+    # LLM Call Deadlines & Hedging
+    LLM_CALL_TIMEOUT = 90  # Per-call deadline in seconds
+    LLM_CALL_WORKERS = 32  # Threads available for in-flight LLM calls
+    DEADLINE_POLL_INTERVAL = 0.5  # Seconds between cancellation checks while waiting on a call
+    LLM_STREAM_TTFT = os.getenv("LLM_STREAM_TTFT", "True").lower() == "true"  # Stream calls to time the first token
+    HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "False").lower() == "true"
+    HEDGE_PERCENTILE = 0.95  # Fire a second request once a call passes this latency
+    HEDGE_MIN_SAMPLES = 20  # Latency samples required before hedging starts
+    HEDGE_WINDOW = 200  # Rolling latency samples kept per model
+
+    # Adaptive (AIMD) limit on in-flight LLM requests per provider
+    ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "True").lower() == "true"
+    LLM_CONCURRENCY = {
+        "initial": 4,
+        "min": 1,
+        "max": 32,  # Never above LLM_CALL_WORKERS
+        "decrease_factor": 0.5,  # Multiplicative cut on 429s, timeouts and latency spikes
+        "latency_spike_factor": 2.0,  # Spike: latency above this multiple of the baseline
+        "baseline_alpha": 0.1  # EWMA weight of healthy latencies in the baseline
+    }
+
+    # Distributed workers (main.py --enqueue / --worker)
+    QUEUE_URL = os.getenv("QUEUE_URL", "sqlite:///.cache/queue.db")
+    QUEUE_LEASE_SECONDS = 600  # Claimed job lease, renewed while the job runs
+    QUEUE_POLL_INTERVAL = 2  # Seconds an idle worker waits before polling again
+    QUEUE_MAX_ATTEMPTS = 3  # Claims per job before it is marked failed
+    # Workers share DataConfig.API_RATE_LIMITS through the queue backend
+    SHARED_RATE_BUDGET = os.getenv("SHARED_RATE_BUDGET", "True").lower() == "true"
+
+    # Priority scheduling: weighted fair queueing between classes of work
+    PRIORITY_WEIGHTS = {"interactive": 16, "api": 4, "batch": 1}
+    DEFAULT_PRIORITY = "batch"  # Work that was not labelled with a class
+    PRIORITY_BORROW_SLOTS = 2  # In-flight slots interactive calls may take above the limit from batch
+    BATCH_RATE_RESERVE = 0.2  # Share of each shared rate bucket batch work leaves to other classes
+
+    # Circuit breakers (per provider): fail fast after consecutive errors
+    CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures that open a breaker
+    CIRCUIT_RESET_TIMEOUT = 30  # Seconds open before a single probe call is let through
+    SNAPSHOT_STALE_TTL = 86400  # Last good market data served (marked stale) for up to a day
+
+    # Prompt Configuration
+    PROMPT_VARIANTS = ["full", "compact"]
+    DEFAULT_PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "full")
+    TOKENIZER_ENCODING = "cl100k_base"  # Approximation for Llama-family tokenizers
     
     # Data Sources
     DEFAULT_STOCK_PERIOD = "6mo"
     CACHE_TTL = 300  # 5 minutes for data caching
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+    DATA_PROVIDER = os.getenv("DATA_PROVIDER", "yfinance")  # "replay" serves recorded data offline
+    REPLAY_DATA_DIR = os.getenv("REPLAY_DATA_DIR", "replay_data")
+    DATA_RECORD_DIR = os.getenv("DATA_RECORD_DIR")  # Record live market data for replay, if set
+    TICKER_INDEX_FILE = os.getenv("TICKER_INDEX_FILE")  # Local list of known symbols for batch checks
+    PREVALIDATE_CHUNK_SIZE = 200  # Symbols per bulk quote request when pre-validating a batch
+    SYMBOL_VALIDITY_TTL = 86400  # Symbols confirmed by a quote are not re-checked for a day
+    ANALYSIS_CACHE_TTL = 3600  # Structured analyses reused for 1 hour
     
     # UI Configuration
     SIDEBAR_STATE = "expanded"
@@ -55,11 +158,45 @@ class AgentConfig:
     }
 
 
+class ModelRoutingConfig:
+    """Per-agent and per-task model routing"""
+    
+    ENABLED = os.getenv("MODEL_ROUTING", "True").lower() == "true"
+    
+    # Cheap, fast model for tool orchestration and extraction; large model for writing
+    SMALL_MODEL = os.getenv("SMALL_MODEL", "sambanova/Meta-Llama-3.1-8B-Instruct")
+    LARGE_MODEL = os.getenv("LARGE_MODEL", "sambanova/Llama-4-Maverick-17B-128E-Instruct")
+    
+    AGENT_MODELS = {
+        "stock_analyst": SMALL_MODEL,
+        "report_writer": LARGE_MODEL
+    }
+    
+    # Task/report type overrides (take precedence over the agent route)
+    TASK_MODELS = {
+        "executive_summary": SMALL_MODEL
+    }
+    
+    # Used when the primary model is throttled (HTTP 429)
+    FALLBACK_MODELS = {
+        SMALL_MODEL: LARGE_MODEL,
+        LARGE_MODEL: "sambanova/Meta-Llama-3.3-70B-Instruct"
+    }
+
+
 class TaskConfig:
     """Task configuration templates"""
     
+    # Task descriptions are static instructions followed by this per-symbol block,
+    # so every symbol shares an identical prompt prefix (provider prefix caching)
+    TARGET_HEADER = "**Target:**"
+    
+    # Types built by create_task_by_type / create_report_task_by_type
+    ANALYSIS_TYPES = ["stock_analysis", "sector_comparison", "technical_analysis", "risk_assessment"]
+    REPORT_TYPES = ["investment_report", "executive_summary", "technical_report", "risk_report"]
+    
     ANALYSIS_TASK_DESCRIPTION = """
-    Analyze {symbol} using the stock_data_tool. Your analysis must cover:
+    Analyze the target stock using the stock_data_tool. Your analysis must cover:
     
     1. **Current Price Analysis**
        - Latest price and trading date
@@ -90,12 +227,22 @@ class TaskConfig:
     Do not rely on training data or assumptions.
     """
     
+    STRUCTURED_ANALYSIS_OUTPUT = """
+    A single JSON object (no prose, no code fences) with keys:
+    symbol, company,
+    metrics {price, latest_date, market_cap, pe_ratio, week52_high, week52_low, rating},
+    signals [{name, direction: "bullish"|"bearish"|"neutral", rationale}],
+    risks [{category, level: "low"|"medium"|"high", description}],
+    risk_level ("low"|"medium"|"high"), summary (2-3 sentences), takeaways [3-5 strings].
+    All figures from stock_data_tool.
+    """
+    
     REPORT_TASK_DESCRIPTION = """
     Transform the stock analysis into a comprehensive, professional investment report.
     
     **Report Structure:**
     
-    # {symbol} Investment Analysis Report
+    # <SYMBOL> Investment Analysis Report
     
     ## 🎯 Executive Summary
     - Key investment thesis (2-3 sentences)
@@ -140,6 +287,319 @@ class TaskConfig:
     """
 
 
+class CompactTaskConfig:
+    """Compact task templates: same section structure, minimal instruction tokens"""
+
+    # Crew pipeline (FinancialCrew)
+    CREW_ANALYSIS_DESCRIPTION = (
+        "Analyze the target stock with stock_data_tool (live data only). "
+        "Cover: price & date, 52-week high/low, market cap, P/E, analyst rating."
+    )
+    CREW_REPORT_DESCRIPTION = (
+        "Write a markdown report: Executive Summary, Key Metrics Table, "
+        "52-Week Range Analysis, Risk Assessment, Future Outlook."
+    )
+
+    ANALYSIS_TASK_DESCRIPTION = """
+    Analyze the target stock with stock_data_tool (live data only). Sections:
+    1. Current Price Analysis: price, date, move, volume
+    2. 52-Week Performance: high, low, position in range
+    3. Financial Metrics: market cap, P/E, valuation
+    4. Analyst Sentiment: rating, targets
+    5. Risk Assessment: volatility, sector, market
+    """
+
+    REPORT_TASK_DESCRIPTION = """
+    Write a markdown investment report, 500-1500 words:
+    # <SYMBOL> Investment Analysis Report
+    ## Executive Summary
+    ## Key Metrics Dashboard (table: Metric | Value | Analysis; price, market cap, P/E, 52-week range)
+    ## Performance Analysis
+    ## Risk Assessment
+    ## Investment Outlook
+    ## Investment Recommendation (rating, target range, horizon, allocation)
+    """
+
+    # Analysis task types (tasks/analysis_task.py)
+    ANALYSIS_TASKS = {
+        "stock_analysis": {
+            "description": """
+    Analyze the target stock. Use stock_data_tool for all figures; no assumptions.
+    Sections: Current Market Position; 52-Week Performance; Valuation Metrics;
+    Technical Indicators; Analyst Sentiment; Risk Assessment; Market Context.
+    Bullets, specific numbers, key findings in bold, end with 3-5 takeaways.
+    """,
+            "expected_output": "Structured analysis with the sections above, 300-500 words."
+        },
+        "sector_comparison": {
+            "description": """
+    Compare the target stock with sector peers using stock_data_tool.
+    Cover: sector/industry, valuation multiples, market cap position,
+    relative performance, beta and volatility vs peers.
+    """,
+            "expected_output": "Sector comparison with a sector-relative recommendation."
+        },
+        "technical_analysis": {
+            "description": """
+    Technical analysis of the target stock over the target period using stock_data_tool.
+    Cover: trend, support/resistance, volume, moving averages/RSI/MACD,
+    entry/exit signals, stop-loss and targets.
+    """,
+            "expected_output": "Technical assessment: trend, levels, signals, targets."
+        },
+        "risk_assessment": {
+            "description": """
+    Risk assessment of the target stock using stock_data_tool.
+    Cover: volatility, beta, drawdown; company, sector, financial and event risks.
+    """,
+            "expected_output": "Risk level (Low/Medium/High) with key risks and mitigation."
+        }
+    }
+
+    # Report types (agents/report_writer.py)
+    REPORT_TASKS = {
+        "investment_report": {
+            "description": """
+    Write a markdown investment report for the target stock, 800-1500 words, specific numbers.
+    # <SYMBOL> Investment Analysis Report
+    ## Executive Summary (thesis, rating, confidence)
+    ## Key Metrics Dashboard (table: Metric | Value | Analysis | Benchmark;
+       price, market cap, P/E, 52-week range, volume, analyst rating)
+    ## Financial Performance Analysis (market position, history, valuation)
+    ## Comprehensive Risk Assessment (prioritized risks, metrics, mitigation)
+    ## Investment Outlook & Scenarios (1-3m, 3-12m, 1-3y; bull/base/bear)
+    ## Investment Recommendation (rating, target, allocation, monitoring)
+    ## Appendix: Data Sources & Methodology
+    """,
+            "expected_output": "Markdown investment report with all sections above."
+        },
+        "executive_summary": {
+            "description": """
+    Executive summary for the target stock, max 300 words, bullets:
+    Investment Thesis; Recommendation & Rating; Key Metrics Snapshot;
+    Primary Risks; Time-Sensitive Factors; Portfolio Fit.
+    """,
+            "expected_output": "Executive summary, max 300 words."
+        },
+        "technical_report": {
+            "description": """
+    Technical report for the target stock, 400-600 words, specific levels:
+    # <SYMBOL> Technical Analysis Report
+    ## Technical Summary
+    ## Price Action Analysis (trend, support & resistance)
+    ## Technical Indicators (moving averages, momentum)
+    ## Trading Signals & Recommendations (1-4 weeks, 1-6 months)
+    ## Risk Considerations
+    """,
+            "expected_output": "Technical report, 400-600 words."
+        },
+        "risk_report": {
+            "description": """
+    Risk report for the target stock, 500-700 words, quantitative where possible:
+    # <SYMBOL> Risk Analysis Report
+    ## Risk Profile Summary
+    ## Quantitative Risk Metrics (volatility, market risk factors)
+    ## Specific Risk Categories (company-specific, external)
+    ## Risk Mitigation Strategies
+    ## Scenario Analysis (downside, tail risk)
+    ## Risk-Adjusted Recommendations
+    """,
+            "expected_output": "Risk report, 500-700 words."
+        }
+    }
+
+
+class HybridReportConfig:
+    """Hybrid reports: numeric tables rendered locally, narrative written by the LLM"""
+    
+    REPORT_TITLES = {
+        "investment_report": "Investment Analysis Report",
+        "executive_summary": "Executive Summary",
+        "technical_report": "Technical Analysis Report",
+        "risk_report": "Risk Analysis Report"
+    }
+    
+    # Narrative sections the LLM writes, in output order
+    NARRATIVE_SECTIONS = {
+        "investment_report": [
+            "Executive Summary", "Performance Analysis", "Risk Assessment",
+            "Investment Outlook", "Investment Recommendation"
+        ],
+        "executive_summary": [
+            "Investment Thesis", "Recommendation & Rating", "Primary Risks", "Portfolio Fit"
+        ],
+        "technical_report": [
+            "Technical Summary", "Price Action Analysis", "Trading Signals", "Risk Considerations"
+        ],
+        "risk_report": [
+            "Risk Profile Summary", "Specific Risk Categories",
+            "Risk Mitigation Strategies", "Scenario Analysis"
+        ]
+    }
+    
+    NARRATIVE_LENGTH = {
+        "investment_report": "400-900 words",
+        "executive_summary": "maximum 250 words",
+        "technical_report": "300-500 words",
+        "risk_report": "350-600 words"
+    }
+    
+    # The rendered metrics table is inserted after this many narrative sections
+    TABLE_AFTER_SECTIONS = 1
+    
+    # Section-level cache: snapshot fields each narrative section depends on.
+    # A cached section is reused while none of its inputs moved past its threshold.
+    SECTION_DEPENDENCIES = {
+        "investment_report": {
+            "Executive Summary": ["current_price", "rating"],
+            "Performance Analysis": ["current_price", "52_week_high", "52_week_low"],
+            "Risk Assessment": ["beta", "pe_ratio"],
+            "Investment Outlook": ["pe_ratio", "eps", "rating", "market_cap"],
+            "Investment Recommendation": ["current_price", "rating", "pe_ratio"]
+        },
+        "executive_summary": {
+            "Investment Thesis": ["rating", "pe_ratio", "market_cap"],
+            "Recommendation & Rating": ["current_price", "rating"],
+            "Primary Risks": ["beta", "pe_ratio"],
+            "Portfolio Fit": ["beta", "dividend_yield", "market_cap"]
+        },
+        "technical_report": {
+            "Technical Summary": ["current_price", "52_week_high", "52_week_low"],
+            "Price Action Analysis": ["current_price", "volume"],
+            "Trading Signals": ["current_price", "52_week_high", "52_week_low", "volume"],
+            "Risk Considerations": ["beta"]
+        },
+        "risk_report": {
+            "Risk Profile Summary": ["beta", "pe_ratio", "rating"],
+            "Specific Risk Categories": ["beta", "pe_ratio", "price_to_book", "dividend_yield"],
+            "Risk Mitigation Strategies": ["beta"],
+            "Scenario Analysis": ["current_price", "52_week_high", "52_week_low", "beta"]
+        }
+    }
+    
+    # Relative change tolerated before a dependent section is regenerated
+    # (fields not listed must match exactly)
+    SECTION_CHANGE_THRESHOLDS = {
+        "current_price": 0.02,
+        "market_cap": 0.05,
+        "pe_ratio": 0.05,
+        "eps": 0.02,
+        "beta": 0.05,
+        "dividend_yield": 0.05,
+        "price_to_book": 0.05,
+        "volume": 0.5
+    }
+    
+    SECTION_CACHE_TTL = 86400  # Sections are rewritten at least daily
+
+
+class BatchSummaryConfig:
+    """Batched executive summaries: several symbols per LLM request"""
+    
+    MAX_SYMBOLS_PER_BATCH = 20
+    FETCH_WORKERS = 8  # Concurrent snapshot fetches before batching
+    
+    # Context window (tokens) per model, used to size batches
+    CONTEXT_WINDOWS = {
+        "sambanova/Llama-4-Maverick-17B-128E-Instruct": 131072,
+        "sambanova/Meta-Llama-3.3-70B-Instruct": 131072,
+        "sambanova/Meta-Llama-3.1-8B-Instruct": 16384
+    }
+    DEFAULT_CONTEXT_WINDOW = 8192
+    CONTEXT_HEADROOM = 0.1  # Fraction of the window left unused (tokenizer drift)
+    
+    # Provider token-per-minute limit shared by all batch requests
+    TOKENS_PER_MINUTE = int(os.getenv("BATCH_TOKENS_PER_MINUTE", "100000"))
+    
+    # Completion budget per symbol (300 words is roughly 400 tokens)
+    OUTPUT_TOKENS_PER_SYMBOL = 450
+    
+    # Maximum completion tokens per request, per model; caps the symbols per batch
+    MAX_OUTPUT_TOKENS = {
+        "sambanova/Llama-4-Maverick-17B-128E-Instruct": 8192,
+        "sambanova/Meta-Llama-3.3-70B-Instruct": 4096,
+        "sambanova/Meta-Llama-3.1-8B-Instruct": 4096
+    }
+    DEFAULT_MAX_OUTPUT_TOKENS = 4096
+    
+    # Snapshot fields sent to the model for each symbol
+    SNAPSHOT_FIELDS = [
+        "company_name", "sector", "current_price", "change_percent", "market_cap",
+        "pe_ratio", "52_week_high", "52_week_low", "beta", "dividend_yield", "rating",
+        "latest_date"
+    ]
+    
+    INSTRUCTIONS = """
+    You write executive summaries for several stocks at once.
+    For EACH symbol in the data below write a markdown executive summary of at most
+    300 words covering: Investment Thesis, Recommendation & Rating (Strong Buy/Buy/
+    Hold/Sell/Strong Sell with confidence), Key Metrics Snapshot, Primary Risks
+    (3-4 bullets) and Portfolio Fit. Use only the figures provided.
+    
+    Respond with a single JSON object and nothing else:
+    {"summaries": [{"symbol": "<SYMBOL>", "summary": "<markdown>"}, ...]}
+    with exactly one entry per symbol, in the order given.
+    """
+
+
+class BudgetConfig:
+    """Token/cost budget for batch runs (main.py --max-tokens / --max-cost)"""
+    
+    # Job plans from most to least expensive; remaining jobs move down the
+    # ladder as the budget runs low (prompt_variant None: the requested one)
+    DOWNGRADE_LADDER = [
+        {"name": "full", "prompt_variant": None, "report_type": "investment_report"},
+        {"name": "compact", "prompt_variant": "compact", "report_type": "investment_report"},
+        {"name": "summary", "prompt_variant": "compact", "report_type": "executive_summary"}
+    ]
+    
+    # Usage not visible in the templates, for estimates before any job has run
+    TOOL_DATA_TOKENS = 800  # Stock data returned by the tool into the analyst's context
+    ANALYST_CALLS = 2  # Tool call plus final answer, each resending the prompt
+    COMPLETION_TOKENS = {
+        "analysis": 500,
+        "investment_report": 1500,
+        "executive_summary": 450,
+        "technical_report": 1200,
+        "risk_report": 1200
+    }
+    
+    # A plan is used only if its estimate times this margin fits the
+    # per-job share of what is left, so the last jobs are not cut short
+    SAFETY_MARGIN = 1.2
+
+
+class WatchlistConfig:
+    """Watchlist daemon (main.py --daemon): warm, incremental refreshes"""
+    
+    REFRESH_INTERVAL = int(os.getenv("WATCHLIST_INTERVAL", "300"))  # Seconds between snapshot refreshes
+    FETCH_WORKERS = 8  # Concurrent snapshot fetches per refresh
+    MAX_REPORT_AGE = 86400  # Re-analyze at least daily even if nothing moved
+    
+    # Relative moves since the last report's snapshot that trigger a full analysis
+    CHANGE_THRESHOLDS = {
+        "current_price": 0.03,
+        "market_cap": 0.05,
+        "pe_ratio": 0.05,
+        "eps": 0.02,
+        "beta": 0.1
+    }
+    # Fields where any change triggers a full analysis
+    CHANGE_FIELDS = ["rating"]
+
+
+class ApiConfig:
+    """HTTP API service (api_server.py)"""
+    
+    HOST = os.getenv("API_HOST", "127.0.0.1")
+    PORT = int(os.getenv("API_PORT", "8000"))
+    CREW_POOL_SIZE = int(os.getenv("API_CREW_POOL_SIZE", "4"))  # Crews shared by all requests = concurrent analyses
+    MAX_CONCURRENT_INFO = 16  # In-flight /info requests before 429
+    MAX_PENDING_JOBS = 100  # Queued + running jobs before 429
+    MAX_BATCH_SYMBOLS = 50
+    JOB_HISTORY = 1000  # Finished jobs kept for /reports/{id}
+
+
 class DataConfig:
     """Data and API configuration"""
     
@@ -154,6 +614,12 @@ class DataConfig:
         "volume", "averageVolume", "recommendationKey"
     ]
     
+    # stock_data_tool field groups and defaults
+    TOOL_FIELD_GROUPS = ["price", "fundamentals", "ranges", "indicators", "risk"]
+    TOOL_DEFAULT_FIELDS = ["price", "fundamentals", "ranges"]
+    TOOL_MAX_HISTORY_DAYS = 365
+    TOOL_OUTPUT_FORMATS = ["json", "kv"]  # Minified JSON or key:value lines
+    
     # API rate limits
     API_RATE_LIMITS = {
         "sambanova": {
@@ -267,7 +733,14 @@ class SuccessMessages:
 # Global configuration instance
 APP_CONFIG = AppConfig()
 AGENT_CONFIG = AgentConfig()
+MODEL_ROUTING_CONFIG = ModelRoutingConfig()
 TASK_CONFIG = TaskConfig()
+COMPACT_TASK_CONFIG = CompactTaskConfig()
+HYBRID_REPORT_CONFIG = HybridReportConfig()
+BATCH_SUMMARY_CONFIG = BatchSummaryConfig()
+BUDGET_CONFIG = BudgetConfig()
+WATCHLIST_CONFIG = WatchlistConfig()
+API_CONFIG = ApiConfig()
 DATA_CONFIG = DataConfig()
 UI_CONFIG = UIConfig()
 ERROR_MESSAGES = ErrorMessages()
@@ -279,7 +752,7 @@ def get_environment_config() -> Dict:
     return {
         "environment": os.getenv("ENVIRONMENT", "development"),
         "debug": os.getenv("DEBUG", "False").lower() == "true",
-        "api_key": os.getenv("SAMBANOVA_API_KEY"),
+        "api_key": APP_CONFIG.LLM_API_KEY or os.getenv("SAMBANOVA_API_KEY"),
         "log_level": os.getenv("LOG_LEVEL", "INFO"),
         "cache_enabled": os.getenv("CACHE_ENABLED", "True").lower() == "true"
     }
@@ -0,0 +1,82 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable
+
+
+class DAGNodeError(Exception):
+    """Raised for a node that failed or whose dependency failed"""
+
+
+class DAGExecutor:
+    """
+    Runs a small dependency graph of callables on a thread pool
+
+    Each node starts as soon as all of its dependencies have finished, so
+    independent nodes never wait on each other. A node's callable receives a
+    dict of its dependencies' results. A failed dependency fails the node,
+    except for partial (aggregating) nodes, which run as long as one
+    dependency succeeded and receive the failures as DAGNodeError values.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+        self._nodes: Dict[str, tuple] = {}
+
+    def add_node(self, name: str, func: Callable[[dict], object], depends_on: Iterable[str] = (),
+                 partial: bool = False):
+        """
+        Register a node; dependencies must already be registered
+
+        Args:
+            partial: Run on the dependencies that succeeded instead of failing
+                with the first one that did not
+        """
+        if name in self._nodes:
+            raise ValueError(f"Duplicate DAG node: {name}")
+        depends_on = tuple(depends_on)
+        missing = [d for d in depends_on if d not in self._nodes]
+        if missing:
+            raise ValueError(f"Unknown dependencies for {name}: {', '.join(missing)}")
+        self._nodes[name] = (func, depends_on, partial)
+
+    def run(self) -> Dict[str, object]:
+        """
+        Execute all nodes
+
+        Returns:
+            dict: Node name -> result, or a DAGNodeError for failed nodes
+        """
+        results: Dict[str, object] = {}
+        pending = dict(self._nodes)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self._nodes))) as executor:
+            while pending or running:
+                # Launch every node whose dependencies have all finished
+                for name, (func, depends_on, partial) in list(pending.items()):
+                    if not all(d in results for d in depends_on):
+                        continue
+                    del pending[name]
+
+                    failed = [d for d in depends_on if isinstance(results[d], DAGNodeError)]
+                    if failed and (not partial or len(failed) == len(depends_on)):
+                        results[name] = DAGNodeError(f"Upstream failure: {', '.join(failed)}")
+                        continue
+
+                    inputs = {d: results[d] for d in depends_on}
+                    # Copy the caller's context so metrics labels follow the node
+                    future = executor.submit(contextvars.copy_context().run, func, inputs)
+                    running[future] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = DAGNodeError(f"{name} failed: {str(e)}")
+
+        return results
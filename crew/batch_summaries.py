@@ -0,0 +1,184 @@
+"""
+Batched executive summaries for large watchlists.
+
+Snapshots for many symbols are fetched up front and packed into as few LLM
+requests as the model's context window and token-per-minute limit allow. Each
+request asks for a JSON object with one summary per symbol, so the shared
+instructions and per-request overhead are paid once per batch.
+"""
+
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from agents.llm import create_llm, route_model
+from config.settings import BATCH_SUMMARY_CONFIG
+from tasks.schemas import BatchSummaryResponse
+from utils.helpers import get_stock_metrics
+from utils.metrics import METRICS
+from utils.resilience import TokenRateLimiter
+from utils.token_budget import count_tokens
+
+
+def _round(value):
+    if isinstance(value, float):
+        return round(value, 4) if abs(value) < 1 else round(value, 2)
+    return value
+
+
+def snapshot_payload(metrics: dict) -> str:
+    """Compact JSON line of the snapshot fields used for a summary"""
+    data = {"symbol": metrics["symbol"]}
+    for field in BATCH_SUMMARY_CONFIG.SNAPSHOT_FIELDS:
+        if metrics.get(field) is not None:
+            data[field] = _round(metrics[field])
+    return json.dumps(data, separators=(",", ":"))
+
+
+def max_output_tokens(model: str) -> int:
+    """Largest completion a single request to the model may produce"""
+    return BATCH_SUMMARY_CONFIG.MAX_OUTPUT_TOKENS.get(model, BATCH_SUMMARY_CONFIG.DEFAULT_MAX_OUTPUT_TOKENS)
+
+
+def plan_batches(payloads: Dict[str, str], model: str) -> List[List[str]]:
+    """
+    Greedily pack symbols into batches that fit the model's limits
+
+    Each symbol costs its payload tokens plus its completion budget; a batch
+    must fit the context window (minus headroom and the shared instructions)
+    and a single minute of the token-per-minute limit, and the completion
+    budgets of its symbols must fit the model's output limit.
+
+    Args:
+        payloads: Symbol -> snapshot payload
+        model: Model the batches will be sent to
+
+    Returns:
+        list: Batches of symbols, in input order
+    """
+    config = BATCH_SUMMARY_CONFIG
+    window = config.CONTEXT_WINDOWS.get(model, config.DEFAULT_CONTEXT_WINDOW)
+    overhead = count_tokens(config.INSTRUCTIONS)
+    budget = min(int(window * (1 - config.CONTEXT_HEADROOM)), config.TOKENS_PER_MINUTE) - overhead
+    max_symbols = min(config.MAX_SYMBOLS_PER_BATCH,
+                      max(1, max_output_tokens(model) // config.OUTPUT_TOKENS_PER_SYMBOL))
+
+    batches, current, used = [], [], 0
+    for symbol, payload in payloads.items():
+        cost = count_tokens(payload) + config.OUTPUT_TOKENS_PER_SYMBOL
+        if current and (used + cost > budget or len(current) >= max_symbols):
+            batches.append(current)
+            current, used = [], 0
+        current.append(symbol)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class BatchSummarizer:
+    """Generate executive summaries for many symbols with batched LLM requests"""
+
+    def __init__(self):
+        model, _ = route_model("report_writer", "executive_summary")
+        self.llm = create_llm("report_writer", task_name="executive_summary",
+                              max_tokens=max_output_tokens(model))
+        self.rate_limiter = TokenRateLimiter(BATCH_SUMMARY_CONFIG.TOKENS_PER_MINUTE)
+
+    def fetch_snapshots(self, symbols: List[str]) -> Dict[str, dict]:
+        """Fetch metrics snapshots for all symbols concurrently"""
+
+        def fetch(symbol):
+            with METRICS.run_context(symbol=symbol):
+                with METRICS.timed("data_fetch", stage="snapshot"):
+                    return get_stock_metrics(symbol)
+
+        with ThreadPoolExecutor(max_workers=BATCH_SUMMARY_CONFIG.FETCH_WORKERS) as executor:
+            futures = {
+                symbol: executor.submit(contextvars.copy_context().run, fetch, symbol)
+                for symbol in symbols
+            }
+            return {symbol: future.result() for symbol, future in futures.items()}
+
+    def summarize_batch(self, payloads: Dict[str, str]) -> Dict[str, str]:
+        """
+        Send one batched request and split the response per symbol
+
+        Returns:
+            dict: Symbol -> summary, for the symbols the model answered
+
+        Raises:
+            ValueError: If the response is not valid batch JSON (e.g. truncated at max_tokens)
+        """
+        messages = [
+            {"role": "system", "content": BATCH_SUMMARY_CONFIG.INSTRUCTIONS},
+            {"role": "user", "content": "Data (one JSON object per line):\n" + "\n".join(payloads.values())}
+        ]
+        expected_tokens = (
+            count_tokens(messages[0]["content"]) + count_tokens(messages[1]["content"])
+            + len(payloads) * BATCH_SUMMARY_CONFIG.OUTPUT_TOKENS_PER_SYMBOL
+        )
+        self.rate_limiter.acquire(expected_tokens)
+
+        with METRICS.run_context(batch_size=len(payloads)):
+            response = self.llm.call(messages)
+
+        parsed = BatchSummaryResponse.from_text(str(response))
+        if parsed is None:
+            raise ValueError("Batch response is not valid summaries JSON")
+        answered = parsed.by_symbol()
+        return {symbol: answered[symbol] for symbol in payloads if symbol in answered}
+
+    def summarize(self, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Summarize every symbol, batching as many per request as the limits allow
+
+        Symbols the model leaves out of a batch response are retried once in a
+        follow-up batch; a batch whose request fails is retried once as two
+        halves, so an oversized or truncated batch does not fail the same way.
+
+        Returns:
+            dict: Symbol -> {"status", "summary" or "error"}
+        """
+        symbols = [s.upper() for s in symbols]
+        snapshots = self.fetch_snapshots(symbols)
+
+        results = {}
+        payloads = {}
+        for symbol, metrics in snapshots.items():
+            if 'error' in metrics:
+                results[symbol] = {"status": "error", "error": metrics['error']}
+            else:
+                payloads[symbol] = snapshot_payload(metrics)
+
+        batches = plan_batches(payloads, self.llm.model)
+        for attempt in range(2):
+            retries, missing = [], {}
+            for batch in batches:
+                batch_payloads = {symbol: payloads[symbol] for symbol in batch}
+                try:
+                    summaries = self.summarize_batch(batch_payloads)
+                except Exception as e:
+                    for symbol in batch:
+                        results[symbol] = {"status": "error", "error": str(e)}
+                    half = (len(batch) + 1) // 2
+                    retries.extend(part for part in (batch[:half], batch[half:]) if part)
+                    continue
+                for symbol in batch:
+                    if symbol in summaries:
+                        results[symbol] = {"status": "success", "summary": summaries[symbol]}
+                    else:
+                        missing[symbol] = payloads[symbol]
+                        results[symbol] = {"status": "error", "error": "Missing from batch response"}
+            batches = retries + plan_batches(missing, self.llm.model)
+            if not batches:
+                break
+
+        return {symbol: results[symbol] for symbol in symbols}
+
+
+# Convenience function for external use
+def run_batch_summaries(symbols: List[str]) -> Dict[str, dict]:
+    """Generate executive summaries for a list of symbols in batched requests"""
+    return BatchSummarizer().summarize(symbols)
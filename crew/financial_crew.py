@@ -1,9 +1,69 @@
+import contextvars
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 from crewai import Crew, Task, Process
 from agents.stock_analyst import create_stock_analyst_agent, create_report_writer_agent
+from agents.llm import route_model
+from agents.report_writer import create_report_task_by_type, get_available_report_types
+from crew.analysis_dag import DAGExecutor, DAGNodeError
+from tasks.analysis_task import create_task_by_type, with_target
+from tasks.schemas import AnalysisResult
+from config.settings import APP_CONFIG, AGENT_CONFIG, TASK_CONFIG, COMPACT_TASK_CONFIG, HYBRID_REPORT_CONFIG
+from utils.cache import JsonFileCache
+from utils.metrics import METRICS
+from utils.profiler import profile_stage, profiled
+from utils.resilience import run_with_deadline
+from utils.helpers import get_stock_metrics
+from utils.report_assembler import assemble_report, split_sections
+from utils.section_cache import SectionCache
+
+
+def _output_text(result) -> str:
+    """Extract text content from a CrewOutput or TaskOutput"""
+    return str(getattr(result, 'raw', result))
+
+
+def _analysis_output(result, symbol: str):
+    """
+    Extract the structured analysis from a CrewOutput or TaskOutput
+
+    Returns:
+        AnalysisResult, or the raw text if the model's output failed validation
+    """
+    structured = getattr(result, 'pydantic', None)
+    if isinstance(structured, AnalysisResult):
+        return structured
+    text = _output_text(result)
+    return AnalysisResult.from_text(text, symbol) or text
+
+
+def _join_sections(sections: dict) -> str:
+    """Render {heading: body} narrative sections back into markdown"""
+    return "\n\n".join(f"## {name}\n\n{body}" for name, body in sections.items())
+
+
+def _analysis_context(analysis) -> str:
+    """Render an analysis (structured or raw text) as report task context"""
+    if isinstance(analysis, AnalysisResult):
+        return analysis.to_compact_json()
+    return str(analysis)
 
 
 class FinancialCrew:
-    def __init__(self):
+    def __init__(self, prompt_variant: str = None, hybrid: bool = False):
+        # Prompt template variant ("full" or "compact")
+        self.prompt_variant = prompt_variant or APP_CONFIG.DEFAULT_PROMPT_VARIANT
+        
+        # Hybrid reports: tables rendered locally, LLM writes narrative only
+        self.hybrid = hybrid
+        self._snapshots = {}
+        self.section_cache = SectionCache()
+        
+        # Structured analyses by symbol, cached on disk so reports can reuse them
+        self.analyses = {}
+        self._analysis_cache = JsonFileCache("analysis", ttl=APP_CONFIG.ANALYSIS_CACHE_TTL)
+        
         # Initialize agents
         self.stock_analysis_agent = create_stock_analyst_agent()
         self.report_writer_agent = create_report_writer_agent()
@@ -13,31 +73,132 @@ class FinancialCrew:
         self.report_task = None
         self.crew = None
 
+    @staticmethod
+    def get_task_prompts(symbol: str, prompt_variant: str = "full") -> dict:
+        """Return (description, expected_output) pairs for the crew's tasks"""
+        
+        if prompt_variant == "compact":
+            return {
+                "analysis": (
+                    with_target(COMPACT_TASK_CONFIG.CREW_ANALYSIS_DESCRIPTION, symbol),
+                    TASK_CONFIG.STRUCTURED_ANALYSIS_OUTPUT
+                ),
+                "report": (
+                    COMPACT_TASK_CONFIG.CREW_REPORT_DESCRIPTION,
+                    "Markdown report."
+                )
+            }
+        
+        return {
+            "analysis": (
+                with_target(
+                    "Analyze the target stock using stock_data_tool. Cover: "
+                    "1. Latest Price & Date "
+                    "2. 52-Week High/Low & Dates "
+                    "3. Financials (Market Cap, P/E) "
+                    "4. Analyst Rating. "
+                    "MUST use the tool for live data.",
+                    symbol
+                ),
+                TASK_CONFIG.STRUCTURED_ANALYSIS_OUTPUT
+            ),
+            # Report Task (Simplified Description)
+            "report": (
+                "Transform analysis into a professional report. "
+                "Include: Executive Summary, Key Metrics Table, "
+                "52-Week Range Analysis, Risk Assessment, "
+                "Future Outlook. Use Markdown, tables, emojis.",
+                "Polished report in markdown format."
+            )
+        }
+
     def create_tasks(self, symbol: str):
         """Create tasks for the given stock symbol"""
         
+        prompts = self.get_task_prompts(symbol, self.prompt_variant)
+        
         # Analysis Task
+        description, expected_output = prompts["analysis"]
         self.analysis_task = Task(
-            description=f"Analyze {symbol} using stock_data_tool. Cover: "
-                       "1. Latest Price & Date "
-                       "2. 52-Week High/Low & Dates "
-                       "3. Financials (Market Cap, P/E) "
-                       "4. Analyst Rating. "
-                       "MUST use the tool for live data.",
-            expected_output="Comprehensive analysis with real-time data.",
-            agent=self.stock_analysis_agent
+            description=description,
+            expected_output=expected_output,
+            agent=self.stock_analysis_agent,
+            output_pydantic=AnalysisResult
         )
 
-        # Report Task (Simplified Description)
+        # Report Task
+        if self.hybrid:
+            self.report_task = create_report_task_by_type(
+                "investment_report", self.report_writer_agent, symbol, hybrid=True
+            )
+            return
+        
+        description, expected_output = prompts["report"]
         self.report_task = Task(
-            description="Transform analysis into a professional report. "
-                       "Include: Executive Summary, Key Metrics Table, "
-                       "52-Week Range Analysis, Risk Assessment, "
-                       "Future Outlook. Use Markdown, tables, emojis.",
-            expected_output="Polished report in markdown format.",
+            description=description,
+            expected_output=expected_output,
             agent=self.report_writer_agent
         )
 
+    def get_snapshot(self, symbol: str) -> dict:
+        """Fetch the metrics snapshot used for hybrid rendering (memoized for CACHE_TTL)"""
+        
+        fetched, snapshot = self._snapshots.get(symbol, (0, None))
+        if snapshot is None or time.time() - fetched > APP_CONFIG.CACHE_TTL:
+            with METRICS.timed("data_fetch", stage="snapshot"):
+                snapshot = get_stock_metrics(symbol)
+            self._snapshots[symbol] = (time.time(), snapshot)
+        return snapshot
+
+    def update_snapshot(self, symbol: str, snapshot: dict):
+        """Replace the memoized snapshot (long-running callers refresh it on a schedule)"""
+        self._snapshots[symbol] = (time.time(), snapshot)
+
+    def invalidate(self, symbol: str, sections: bool = True):
+        """
+        Forget the cached analysis of a symbol, and its report sections unless sections is False
+        
+        Keeping the sections lets the section cache decide which ones the
+        new snapshot made stale, so only those are rewritten.
+        """
+        self.analyses.pop(symbol, None)
+        self._analysis_cache.delete(self._analysis_cache_key(symbol))
+        if not sections:
+            return
+        self.section_cache.invalidate(symbol, {
+            report_type: self._section_scope(report_type) for report_type in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS
+        })
+
+    def _section_scope(self, report_type: str) -> str:
+        """Prompt variant and writer model of a report type, part of its section cache keys"""
+        model, _ = route_model("report_writer", report_type)
+        return f"{self.prompt_variant}:{model}"
+
+    def _analysis_cache_key(self, symbol: str) -> str:
+        return f"{symbol}:{date.today().isoformat()}:{self.prompt_variant}"
+
+    def get_cached_analysis(self, symbol: str):
+        """Return a structured analysis of the symbol from memory or disk, or None"""
+        
+        if symbol in self.analyses:
+            return self.analyses[symbol]
+        cached = self._analysis_cache.get(self._analysis_cache_key(symbol))
+        if cached is None:
+            return None
+        try:
+            analysis = AnalysisResult.from_json(cached)
+        except ValueError:
+            return None
+        self.analyses[symbol] = analysis
+        return analysis
+
+    def store_analysis(self, symbol: str, analysis):
+        """Keep a structured analysis for reuse (raw text results are not cached)"""
+        
+        if isinstance(analysis, AnalysisResult):
+            self.analyses[symbol] = analysis
+            self._analysis_cache.set(self._analysis_cache_key(symbol), analysis.to_compact_json())
+
     def create_crew(self):
         """Create and configure the crew"""
         self.crew = Crew(
@@ -50,38 +211,267 @@ class FinancialCrew:
     def analyze_stock(self, symbol: str):
         """Main method to analyze a stock"""
         try:
-            # Create tasks for the specific symbol
-            self.create_tasks(symbol)
+            # Hybrid report whose sections are all still valid: no LLM calls at all
+            report = self.cached_report(symbol, "investment_report")
+            if report is not None:
+                return report
             
-            # Create and run the crew
-            self.create_crew()
+            # A cached structured analysis only needs the report stage, and hybrid
+            # reports only the sections that went stale: analysis, then those sections
+            cached = self.get_cached_analysis(symbol)
+            if cached is not None or self.hybrid:
+                return self.generate_report(symbol, "investment_report", cached or self.run_analysis(symbol))
             
-            # Execute the analysis
-            result = self.crew.kickoff()
+            with profile_stage("crew_build"):
+                # Create tasks for the specific symbol
+                self.create_tasks(symbol)
+                
+                # Create and run the crew
+                self.create_crew()
             
-            # Extract text content from CrewOutput object
-            if hasattr(result, 'raw'):
-                return str(result.raw)
-            elif hasattr(result, 'output'):
-                return str(result.output)
-            elif hasattr(result, 'result'):
-                return str(result.result)
-            else:
-                # Fallback: convert to string
-                return str(result)
+            # Execute the analysis (cancelled if it outlives AGENT_TIMEOUT)
+            result = run_with_deadline(profiled("kickoff")(self.crew.kickoff), APP_CONFIG.AGENT_TIMEOUT)
+            
+            if self.analysis_task.output is not None:
+                self.store_analysis(symbol, _analysis_output(self.analysis_task.output, symbol))
+            
+            return _output_text(result)
             
         except Exception as e:
             return f"Error during analysis: {str(e)}"
 
+    def run_analysis(self, symbol: str):
+        """
+        Run only the analysis task, reusing a cached structured result if present
+        
+        Returns:
+            AnalysisResult, or the raw text if the output failed validation
+        """
+        cached = self.get_cached_analysis(symbol)
+        if cached is not None:
+            return cached
+        
+        with profile_stage("crew_build"):
+            self.create_tasks(symbol)
+            crew = Crew(
+                agents=[self.stock_analysis_agent],
+                tasks=[self.analysis_task],
+                process=Process.sequential,
+                verbose=True
+            )
+        
+        with METRICS.run_context(task="analysis"):
+            result = run_with_deadline(
+                profiled("kickoff")(crew.kickoff), AGENT_CONFIG.STOCK_ANALYST["max_execution_time"]
+            )
+        
+        analysis = _analysis_output(result, symbol)
+        self.store_analysis(symbol, analysis)
+        return analysis
+
+    def cached_report(self, symbol: str, report_type: str):
+        """
+        Assemble a hybrid report entirely from cached sections
+        
+        Returns:
+            str, or None if not in hybrid mode or any section is stale
+        """
+        if not self.hybrid or report_type not in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS:
+            return None
+        
+        snapshot = self.get_snapshot(symbol)
+        fresh, stale = self.section_cache.lookup(symbol, report_type, snapshot, self._section_scope(report_type))
+        if stale:
+            return None
+        
+        METRICS.record("section_cache", report_type=report_type, hits=len(fresh), misses=0)
+        return assemble_report(symbol, snapshot, _join_sections(fresh), report_type)
+
+    def generate_report(self, symbol: str, report_type: str, analysis) -> str:
+        """Generate a single report type from a finished analysis"""
+        
+        # Hybrid reports regenerate only the sections whose inputs changed
+        fresh, stale = {}, None
+        if self.hybrid and report_type in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS:
+            snapshot = self.get_snapshot(symbol)
+            fresh, stale = self.section_cache.lookup(symbol, report_type, snapshot, self._section_scope(report_type))
+            METRICS.record("section_cache", report_type=report_type, hits=len(fresh), misses=len(stale))
+            if not stale:
+                return assemble_report(symbol, snapshot, _join_sections(fresh), report_type)
+        
+        # Each report gets its own writer agent so concurrent crews share no state
+        with profile_stage("crew_build"):
+            agent = create_report_writer_agent(task_name=report_type)
+            task = create_report_task_by_type(
+                report_type, agent, symbol,
+                analysis_context=_analysis_context(analysis),
+                variant=self.prompt_variant,
+                hybrid=self.hybrid,
+                sections=stale
+            )
+            crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True)
+        
+        with METRICS.run_context(task=report_type):
+            report = _output_text(run_with_deadline(
+                profiled("kickoff")(crew.kickoff), AGENT_CONFIG.REPORT_WRITER["max_execution_time"]
+            ))
+        
+        if self.hybrid:
+            snapshot = self.get_snapshot(symbol)
+            written = split_sections(report)
+            self.section_cache.store(symbol, report_type, snapshot, written, self._section_scope(report_type))
+            if fresh and written:
+                report = _join_sections({**fresh, **written})
+            return assemble_report(symbol, snapshot, report, report_type)
+        return report
+
+    def analyze_stock_reports(self, symbol: str, report_types: list = None,
+                              max_workers: int = None) -> dict:
+        """
+        Run the analysis once, then generate every requested report type concurrently
+        
+        Args:
+            symbol: Stock ticker symbol
+            report_types: Report types to generate (default: all)
+            max_workers: Maximum concurrent report crews
+            
+        Returns:
+            dict: Report type -> report text (or error message)
+        """
+        report_types = report_types or get_available_report_types()
+        
+        # Reports fully served from the section cache need no analysis
+        reports = {}
+        for report_type in report_types:
+            cached = self.cached_report(symbol, report_type)
+            if cached is not None:
+                reports[report_type] = cached
+        pending = [report_type for report_type in report_types if report_type not in reports]
+        if not pending:
+            return reports
+        
+        try:
+            analysis = self.run_analysis(symbol)
+        except Exception as e:
+            error = f"Error during analysis: {str(e)}"
+            reports.update({report_type: error for report_type in pending})
+            return {report_type: reports[report_type] for report_type in report_types}
+        
+        workers = max_workers or min(len(pending), APP_CONFIG.REPORT_FANOUT_WORKERS)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Copy the caller's context so metrics labels follow each report
+            futures = {
+                report_type: executor.submit(
+                    contextvars.copy_context().run,
+                    self.generate_report, symbol, report_type, analysis
+                )
+                for report_type in pending
+            }
+            for report_type, future in futures.items():
+                try:
+                    reports[report_type] = future.result()
+                except Exception as e:
+                    reports[report_type] = f"Error generating {report_type}: {str(e)}"
+        
+        return {report_type: reports[report_type] for report_type in report_types}
+
+    def run_analysis_type(self, symbol: str, task_type: str, **kwargs):
+        """Run a single analysis task type with its own analyst agent"""
+        
+        if task_type == "stock_analysis":
+            return self.run_analysis(symbol)
+        
+        with profile_stage("crew_build"):
+            agent = create_stock_analyst_agent(task_name=task_type)
+            task = create_task_by_type(task_type, agent, symbol, variant=self.prompt_variant, **kwargs)
+            crew = Crew(agents=[agent], tasks=[task], process=Process.sequential, verbose=True)
+        
+        with METRICS.run_context(task=task_type):
+            return _output_text(run_with_deadline(
+                profiled("kickoff")(crew.kickoff), AGENT_CONFIG.STOCK_ANALYST["max_execution_time"]
+            ))
+
+    def analyze_stock_dag(self, symbol: str, analysis_types: list,
+                          report_types: list = None, **kwargs) -> dict:
+        """
+        Run several analysis task types concurrently and feed them into reports
+        
+        Args:
+            symbol: Stock ticker symbol
+            analysis_types: Analysis task types to run in parallel
+            report_types: Report types built from the combined analyses
+                          (default: investment_report)
+            **kwargs: Extra task parameters (sector_symbols, period)
+            
+        Returns:
+            dict: Report type -> report text (or error message)
+        """
+        report_types = report_types or ["investment_report"]
+        if self.hybrid:
+            self.get_snapshot(symbol)
+        
+        dag = DAGExecutor()
+        
+        for task_type in analysis_types:
+            dag.add_node(
+                task_type,
+                lambda _, task_type=task_type: self.run_analysis_type(symbol, task_type, **kwargs)
+            )
+        
+        def build_report(report_type: str, analyses: dict) -> str:
+            # Reports use the analyses that succeeded and say which ones are missing
+            missing = [name.replace('_', ' ') for name, output in analyses.items()
+                       if isinstance(output, DAGNodeError)]
+            combined = "\n\n".join(
+                f"### {name.replace('_', ' ').title()}\n{_analysis_context(output)}"
+                for name, output in analyses.items() if not isinstance(output, DAGNodeError)
+            )
+            if missing:
+                combined += (f"\n\n### Missing Analyses\nNot available (failed): {', '.join(missing)}. "
+                             "Do not speculate about them; state that they are missing.")
+            report = self.generate_report(symbol, report_type, combined)
+            if missing:
+                report += f"\n\n> Note: built without the {', '.join(missing)} (analysis failed)."
+            return report
+        
+        for report_type in report_types:
+            dag.add_node(
+                f"report:{report_type}",
+                lambda analyses, report_type=report_type: build_report(report_type, analyses),
+                depends_on=analysis_types,
+                partial=True
+            )
+        
+        results = dag.run()
+        
+        reports = {}
+        for report_type in report_types:
+            result = results[f"report:{report_type}"]
+            if isinstance(result, DAGNodeError):
+                reports[report_type] = f"Error during analysis: {str(result)}"
+            else:
+                reports[report_type] = result
+        return reports
+
 
 # Convenience function for external use
-def run_financial_analysis(symbol: str):
+def run_financial_analysis(symbol: str, prompt_variant: str = None, hybrid: bool = False):
     """Run financial analysis for a given stock symbol"""
-    crew = FinancialCrew()
+    crew = FinancialCrew(prompt_variant=prompt_variant, hybrid=hybrid)
     result = crew.analyze_stock(symbol)
     
     # Ensure we return a string
     if isinstance(result, str):
         return result
     else:
-        return str(result)
\ No newline at end of file
+        return str(result)
+
+
+def run_multi_report_analysis(symbol: str, report_types: list = None, prompt_variant: str = None,
+                              analysis_types: list = None, hybrid: bool = False) -> dict:
+    """Run one analysis for a symbol and fan out to several report types"""
+    crew = FinancialCrew(prompt_variant=prompt_variant, hybrid=hybrid)
+    if analysis_types:
+        return crew.analyze_stock_dag(symbol, analysis_types, report_types)
+    return crew.analyze_stock_reports(symbol, report_types)
\ No newline at end of file
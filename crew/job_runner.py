@@ -0,0 +1,193 @@
+"""
+Resumable batch job runner for large symbol universes.
+
+Per-symbol progress is checkpointed in a local SQLite database and every
+result is handed to a sink as soon as it finishes, so memory stays flat
+however large the batch is and a crashed run resumes where it stopped.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+
+
+def read_symbols_file(path: str) -> List[str]:
+    """
+    Read symbols from a file (one or more per line, comma or space separated)
+
+    Blank lines and '#' comments are ignored; duplicates keep their first position.
+    """
+    symbols = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            for symbol in re.split(r"[,\s]+", line.split("#", 1)[0]):
+                symbol = symbol.strip().upper()
+                if symbol and symbol not in seen:
+                    seen.add(symbol)
+                    symbols.append(symbol)
+    return symbols
+
+
+class JobStopped(Exception):
+    """Raised by a job's analyze function to stop the run cleanly (the symbol stays pending)"""
+
+
+class JobCheckpoint:
+    """SQLite record of per-symbol job status"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                symbol TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT
+            )
+        """)
+        self._conn.commit()
+
+    def load(self, symbols: Iterable[str], resume: bool = False, rejected: Iterable[str] = ()) -> List[str]:
+        """
+        Register symbols; without resume, previous progress for them is discarded
+
+        Args:
+            rejected: Symbols that failed pre-validation, recorded as "rejected" and never run
+
+        Returns:
+            list: Rejected symbols not already on record as rejected (their records still need writing)
+        """
+        symbols = list(symbols)
+        newly_rejected = []
+        with self._lock:
+            if not resume:
+                self._conn.execute("DELETE FROM jobs")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (symbol, position) VALUES (?, ?)",
+                [(symbol, i) for i, symbol in enumerate(symbols)]
+            )
+            for i, symbol in enumerate(rejected, len(symbols)):
+                cursor = self._conn.execute(
+                    "INSERT INTO jobs (symbol, position, status) VALUES (?, ?, 'rejected') "
+                    "ON CONFLICT(symbol) DO UPDATE SET status = 'rejected' "
+                    "WHERE status NOT IN ('done', 'rejected')",
+                    (symbol, i)
+                )
+                if cursor.rowcount:
+                    newly_rejected.append(symbol)
+            self._conn.commit()
+        return newly_rejected
+
+    def pending(self, retry_failed: bool = False) -> List[str]:
+        """
+        Symbols still to run, in file order: never started or interrupted ones,
+        plus failed ones with retry_failed
+        """
+        finished = ("done", "rejected") if retry_failed else ("done", "rejected", "failed")
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT symbol FROM jobs WHERE status NOT IN ({', '.join('?' * len(finished))}) "
+                "ORDER BY position",
+                finished
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark(self, symbol: str, status: str, error: str = None):
+        """Record a status change (committed immediately)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, "
+                "attempts = attempts + (? = 'running') WHERE symbol = ?",
+                (status, error, datetime.now().isoformat(), status, symbol)
+            )
+            self._conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        """Number of symbols per status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobRunner:
+    """Run an analysis per symbol with checkpointing and streamed results"""
+
+    def __init__(self, analyze: Callable[[str], dict], checkpoint: JobCheckpoint,
+                 on_result: Callable[[dict], None], on_progress: Callable[[str, int, int], None] = None):
+        """
+        Args:
+            analyze: Returns the result record for a symbol (see utils.sinks.build_record)
+            checkpoint: Checkpoint database
+            on_result: Receives each result record as soon as it finishes
+            on_progress: Called with (symbol, index, total) before each symbol
+        """
+        self.analyze = analyze
+        self.checkpoint = checkpoint
+        self.on_result = on_result
+        self.on_progress = on_progress
+
+    def run(self, symbols: List[str], resume: bool = False, rejects: List[dict] = None,
+            retry_failed: bool = False) -> Dict[str, int]:
+        """
+        Analyze every symbol not already completed (or until analyze raises JobStopped)
+
+        Each symbol's record reaches on_result once per job: a resumed run
+        writes no second record for rejected symbols and, unless
+        retry_failed, leaves failed symbols as they are.
+
+        Args:
+            symbols: Symbols to analyze
+            resume: Keep the checkpoint's progress instead of starting over
+            rejects: Error records of symbols that failed pre-validation
+            retry_failed: Run failed symbols again (their new record is written as well)
+
+        Returns:
+            dict: Final number of symbols per status
+        """
+        rejects = rejects or []
+        newly_rejected = set(self.checkpoint.load(symbols, resume, [r["symbol"] for r in rejects]))
+        for record in rejects:
+            if record["symbol"] in newly_rejected:
+                self.on_result(record)
+        pending = self.checkpoint.pending(retry_failed)
+
+        for i, symbol in enumerate(pending, 1):
+            if self.on_progress:
+                self.on_progress(symbol, i, len(pending))
+
+            self.checkpoint.mark(symbol, "running")
+            try:
+                record = self.analyze(symbol)
+            except JobStopped:
+                # Nothing was written for it: a resumed run picks it up again
+                self.checkpoint.mark(symbol, "pending")
+                break
+            except Exception as e:
+                record = {"symbol": symbol, "status": "error", "error": str(e),
+                          "timestamp": datetime.now().isoformat()}
+
+            # Write the result before checkpointing, so a crash between the two
+            # re-runs the symbol rather than losing its output
+            self.on_result(record)
+            if record["status"] == "success":
+                self.checkpoint.mark(symbol, "done")
+            else:
+                self.checkpoint.mark(symbol, "failed", record.get("error"))
+
+        return self.checkpoint.counts()
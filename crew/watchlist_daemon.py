@@ -0,0 +1,170 @@
+"""
+Long-running watchlist refresh loop.
+
+One process keeps the agents, LLM clients, caches and concurrency/circuit
+state warm across refreshes. Every WatchlistConfig.REFRESH_INTERVAL seconds
+the snapshots of all watchlist symbols are re-fetched (cheap data calls
+only), and a full analysis is run only for symbols that have no report yet,
+whose report is older than MAX_REPORT_AGE, or whose data moved past
+CHANGE_THRESHOLDS since their last report. Everything else is left alone.
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config.settings import WATCHLIST_CONFIG
+from crew.financial_crew import FinancialCrew
+from crew.job_runner import read_symbols_file
+from utils.helpers import get_stock_metrics
+from utils.metrics import METRICS
+from utils.report_store import ReportStore
+from utils.sinks import build_record
+
+
+def watch_inputs(metrics: dict) -> dict:
+    """Snapshot values compared between refreshes"""
+    fields = list(WATCHLIST_CONFIG.CHANGE_THRESHOLDS) + WATCHLIST_CONFIG.CHANGE_FIELDS
+    return {field: metrics.get(field) for field in fields}
+
+
+def moved_fields(baseline: dict, current: dict) -> List[str]:
+    """Fields whose value moved past its threshold (or changed, for CHANGE_FIELDS)"""
+    moved = []
+    for field, value in current.items():
+        old = baseline.get(field)
+        threshold = WATCHLIST_CONFIG.CHANGE_THRESHOLDS.get(field)
+        numeric = all(isinstance(v, (int, float)) for v in (old, value))
+        if threshold is None or not numeric or old == 0:
+            if old != value:
+                moved.append(field)
+        elif abs(value - old) / abs(old) > threshold:
+            moved.append(field)
+    return moved
+
+
+class WatchlistDaemon:
+    """Refresh a watchlist on a schedule, re-analyzing only symbols whose data moved"""
+
+    def __init__(self, watchlist: str, on_result: Callable[[dict], None] = None, interval: float = None,
+                 prompt_variant: str = None, hybrid: bool = False,
+                 store: ReportStore = None, on_event: Callable[[str], None] = None):
+        """
+        Args:
+            watchlist: Symbols file, re-read on every refresh so edits are picked up
+            on_result: Receives each new report record (e.g. an output sink's write)
+            interval: Seconds between refreshes (default: WatchlistConfig.REFRESH_INTERVAL)
+            prompt_variant: Task prompt template variant
+            hybrid: Render tables locally and have the LLM write narrative only
+            store: Report store (default: the on-disk "reports" store)
+            on_event: Receives progress messages
+        """
+        self.watchlist = watchlist
+        self.on_result = on_result
+        self.interval = interval or WATCHLIST_CONFIG.REFRESH_INTERVAL
+        self.store = store or ReportStore()
+        self.on_event = on_event or (lambda message: None)
+        self.crew = FinancialCrew(prompt_variant=prompt_variant, hybrid=hybrid)
+        self._stop = threading.Event()
+
+    def fetch_snapshots(self, symbols: List[str]) -> Dict[str, dict]:
+        """Fetch metrics snapshots for all symbols concurrently"""
+
+        def fetch(symbol):
+            with METRICS.run_context(symbol=symbol):
+                with METRICS.timed("data_fetch", stage="watchlist"):
+                    return get_stock_metrics(symbol)
+
+        with ThreadPoolExecutor(max_workers=WATCHLIST_CONFIG.FETCH_WORKERS) as executor:
+            futures = {
+                symbol: executor.submit(contextvars.copy_context().run, fetch, symbol)
+                for symbol in symbols
+            }
+            return {symbol: future.result() for symbol, future in futures.items()}
+
+    def trigger_reason(self, symbol: str, metrics: dict) -> Optional[str]:
+        """Why the symbol needs a full analysis, or None if its last report still holds"""
+        latest = self.store.get(symbol)
+        if latest is None:
+            return "new"
+        if time.time() - latest["created"] > WATCHLIST_CONFIG.MAX_REPORT_AGE:
+            return "expired"
+        moved = moved_fields(latest["inputs"], watch_inputs(metrics))
+        if moved:
+            return "moved: " + ", ".join(moved)
+        return None
+
+    def analyze(self, symbol: str, metrics: dict, reason: str) -> dict:
+        """Run a fresh full analysis and publish it to the store and on_result"""
+        # New analysis, but hybrid sections are only rewritten where their own inputs moved
+        self.crew.invalidate(symbol, sections=False)
+        start = time.time()
+        with METRICS.run_context(symbol=symbol):
+            try:
+                text = self.crew.analyze_stock(symbol)
+            except Exception as e:
+                text = f"Error: {str(e)}"
+            METRICS.record("run", duration_s=time.time() - start,
+                           status="error" if text.startswith("Error") else "success")
+
+        record = build_record(symbol, text, self.crew.analyses.get(symbol))
+        record["trigger"] = reason
+        # Failed analyses are not stored, so the next refresh retries them
+        if record["status"] == "success":
+            self.store.put(symbol, record, watch_inputs(metrics))
+        if self.on_result:
+            self.on_result(record)
+        return record
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Run one refresh of the whole watchlist
+
+        Returns:
+            dict: Number of symbols analyzed, unchanged, failed and skipped
+                (snapshot unavailable or stale)
+        """
+        start = time.time()
+        symbols = read_symbols_file(self.watchlist)
+        counts = {"analyzed": 0, "unchanged": 0, "failed": 0, "skipped": 0}
+
+        for symbol, metrics in self.fetch_snapshots(symbols).items():
+            # A stale snapshot carries no new information about the symbol
+            if 'error' in metrics or metrics.get('stale'):
+                counts["skipped"] += 1
+                continue
+
+            self.crew.update_snapshot(symbol, metrics)
+            reason = self.trigger_reason(symbol, metrics)
+            if reason is None:
+                counts["unchanged"] += 1
+                continue
+
+            self.on_event(f"📈 {symbol}: re-analyzing ({reason})")
+            record = self.analyze(symbol, metrics, reason)
+            counts["analyzed" if record["status"] == "success" else "failed"] += 1
+
+        METRICS.record("watchlist_refresh", symbols=len(symbols), duration_s=time.time() - start, **counts)
+        return counts
+
+    def run(self, cycles: int = None):
+        """Refresh every interval until stop() is called (or `cycles` refreshes have run)"""
+        cycle = 0
+        while not self._stop.is_set():
+            started = time.time()
+            counts = self.refresh()
+            cycle += 1
+            self.on_event(
+                f"🔄 Refresh {cycle}: {counts['analyzed']} analyzed, {counts['unchanged']} unchanged, "
+                f"{counts['failed']} failed, {counts['skipped']} skipped "
+                f"in {time.time() - started:.1f}s"
+            )
+            if cycles is not None and cycle >= cycles:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.time() - started)))
+
+    def stop(self):
+        """Stop after the current refresh"""
+        self._stop.set()
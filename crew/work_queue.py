@@ -0,0 +1,418 @@
+"""
+Shared work queue for distributed analysis workers.
+
+`main.py --enqueue` writes one job per symbol to a queue backend; any number
+of `main.py --worker` processes claim jobs under a lease, run them and write
+the result records back. A worker that dies loses its lease, and the job is
+claimed again once the lease expires. The backend also holds token buckets
+for the provider limits in DataConfig.API_RATE_LIMITS, so all workers spend
+one global rate budget instead of each assuming it has the provider to itself.
+
+The default backend is SQLite in WAL mode, which coordinates processes on
+one host (or hosts sharing a local-semantics filesystem). Other stores, such
+as a Redis-like service for several hosts, plug in by implementing
+QueueBackend and calling register_backend() for their URL scheme.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config.settings import APP_CONFIG, DATA_CONFIG
+from utils.resilience import check_deadline
+from utils.scheduler import current_priority
+
+
+class QueueBackend(ABC):
+    """Interface of a job queue backend (all methods must be process-safe)"""
+
+    @abstractmethod
+    def enqueue(self, symbols: List[str], options: dict = None) -> int:
+        """Add one queued job per symbol; returns the number added"""
+
+    @abstractmethod
+    def claim(self, worker: str, lease_s: float) -> Optional[dict]:
+        """
+        Lease the oldest runnable job (queued, or leased with an expired lease)
+
+        Returns:
+            dict: {"id", "symbol", "options", "attempts"}, or None if nothing is runnable
+        """
+
+    @abstractmethod
+    def renew(self, job_id: int, worker: str, lease_s: float) -> bool:
+        """Extend a lease; False if the worker no longer holds it"""
+
+    @abstractmethod
+    def complete(self, job_id: int, worker: str, record: dict) -> bool:
+        """Store a job's result record; False if the worker no longer holds the lease"""
+
+    @abstractmethod
+    def release(self, job_id: int, worker: str, error: str) -> bool:
+        """Give a job back after an error (failed once it is out of attempts)"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+
+    @abstractmethod
+    def results(self) -> Iterator[dict]:
+        """Result records of finished jobs, in enqueue order"""
+
+    @abstractmethod
+    def take(self, bucket: str, amount: float, rate_per_minute: float, force: bool = False,
+             floor: float = 0.0) -> float:
+        """
+        Spend from a shared token bucket refilled at rate_per_minute
+
+        Args:
+            floor: Level the bucket must stay at after spending; a positive
+                floor keeps a reserve for others, a negative one borrows
+                against future refill
+
+        Returns:
+            float: 0 if the amount was spent, otherwise seconds until it would
+                fit (nothing is spent). With force the amount is always spent,
+                possibly leaving the bucket in debt (a negative amount gives
+                tokens back).
+        """
+
+    def close(self):
+        pass
+
+
+class SqliteQueueBackend(QueueBackend):
+    """Queue backend on a SQLite database in WAL mode"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        # Autocommit mode; writes use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction holding SQLite's reserved lock (one writer across processes)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, symbols: List[str], options: dict = None) -> int:
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO jobs (symbol, options, updated_at) VALUES (?, ?, ?)",
+                [(symbol, json.dumps(options or {}), now) for symbol in symbols]
+            )
+        return len(symbols)
+
+    def claim(self, worker: str, lease_s: float) -> Optional[dict]:
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT id, symbol, options, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, symbol, options, attempts = row
+
+                # An expired lease means the previous worker died mid-job
+                if attempts >= APP_CONFIG.QUEUE_MAX_ATTEMPTS:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                        (f"Lease expired after {attempts} attempts", datetime.now().isoformat(), job_id)
+                    )
+                    continue
+
+                conn.execute(
+                    "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker, now + lease_s, datetime.now().isoformat(), job_id)
+                )
+                return {"id": job_id, "symbol": symbol, "options": json.loads(options),
+                        "attempts": attempts + 1}
+
+    def renew(self, job_id: int, worker: str, lease_s: float) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_s, job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, record: dict) -> bool:
+        status = "done" if record.get("status") == "success" else "failed"
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (status, json.dumps(record, default=str), record.get("error"),
+                 datetime.now().isoformat(), job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, job_id: int, worker: str, error: str) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (APP_CONFIG.QUEUE_MAX_ATTEMPTS, error, datetime.now().isoformat(), job_id, worker)
+            )
+        return cursor.rowcount == 1
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def results(self) -> Iterator[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT symbol, status, result, error, updated_at FROM jobs "
+                "WHERE status IN ('done', 'failed') ORDER BY id"
+            ).fetchall()
+        for symbol, status, result, error, updated_at in rows:
+            # Jobs that failed without running to a record (e.g. lost leases)
+            yield json.loads(result) if result else {
+                "symbol": symbol, "status": "error", "error": error, "timestamp": updated_at
+            }
+
+    def take(self, bucket: str, amount: float, rate_per_minute: float, force: bool = False,
+             floor: float = 0.0) -> float:
+        now = time.time()
+        capacity = rate_per_minute  # Up to one minute of budget can be spent in a burst
+        with self._transaction() as conn:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE name = ?", (bucket,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate_per_minute / 60)
+
+            # A single request larger than the bucket is let through once it is full
+            needed = min(amount, capacity - max(floor, 0.0))
+            if force or tokens - needed >= floor:
+                tokens -= amount
+                wait_s = 0.0
+            else:
+                wait_s = (needed + floor - tokens) * 60 / rate_per_minute
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (bucket, tokens, now)
+            )
+        return wait_s
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_backends = {"sqlite": SqliteQueueBackend}
+
+
+def register_backend(scheme: str, factory: Callable[[str], QueueBackend]):
+    """Make a backend available as <scheme>://<location> in open_queue()"""
+    _backends[scheme] = factory
+
+
+def open_queue(url: str = None) -> QueueBackend:
+    """
+    Open a queue backend from a URL
+
+    "sqlite:///path/to/queue.db" (or a plain path) opens the SQLite backend;
+    other schemes must be registered with register_backend().
+    """
+    url = url or APP_CONFIG.QUEUE_URL
+    scheme, separator, location = url.partition("://")
+    if not separator:
+        return SqliteQueueBackend(url)
+    if scheme not in _backends:
+        raise ValueError(f"Unknown queue backend '{scheme}' (available: {', '.join(_backends)})")
+    # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy URLs
+    if scheme == "sqlite" and location.startswith("/"):
+        location = location[1:]
+    return _backends[scheme](location)
+
+
+class SharedRateBudget:
+    """
+    Provider rate limits (DataConfig.API_RATE_LIMITS) shared through a queue backend
+
+    Requests and prompt tokens are taken from the provider's buckets before
+    each call; completion tokens are charged afterwards, so an expensive
+    answer delays the next calls of every worker.
+
+    Batch calls leave BATCH_RATE_RESERVE of each bucket untouched, and
+    interactive calls may borrow the same share against future refill, so an
+    interactive user sharing the account with a batch run is not rate limited
+    behind it.
+    """
+
+    def __init__(self, backend: QueueBackend):
+        self.backend = backend
+
+    def acquire(self, provider: str, tokens: int, priority: str = None, wait: bool = True) -> Optional[float]:
+        """
+        Block until a call with `tokens` prompt tokens fits the budget
+
+        Args:
+            provider: Provider name (key of DataConfig.API_RATE_LIMITS)
+            tokens: Prompt tokens of the call
+            priority: Priority class (default: the current context's class)
+            wait: With False, take the budget only if it fits right now
+
+        Returns:
+            float: Seconds waited, or None if wait is False and the call does not fit
+        """
+        limits = DATA_CONFIG.API_RATE_LIMITS.get(provider, {})
+        # Share of each bucket to keep (batch) or borrow (interactive)
+        reserve = {"batch": 1, "interactive": -1}.get(priority or current_priority(), 0)
+        reserve *= APP_CONFIG.BATCH_RATE_RESERVE
+        start = time.monotonic()
+        taken = []
+        for bucket, amount, rate in (("requests", 1, limits.get("requests_per_minute")),
+                                     ("tokens", tokens, limits.get("tokens_per_minute"))):
+            if not rate:
+                continue
+            while True:
+                check_deadline()
+                wait_s = self.backend.take(f"{provider}:{bucket}", amount, rate, floor=reserve * rate)
+                if wait_s <= 0:
+                    taken.append((bucket, amount, rate))
+                    break
+                if not wait:
+                    # Give back what was already taken for this call
+                    for name, spent, bucket_rate in taken:
+                        self.backend.take(f"{provider}:{name}", -spent, bucket_rate, force=True)
+                    return None
+                time.sleep(min(wait_s, 1.0))
+        return time.monotonic() - start
+
+    def spend(self, provider: str, tokens: int):
+        """Charge tokens already used (completion tokens) without waiting"""
+        rate = DATA_CONFIG.API_RATE_LIMITS.get(provider, {}).get("tokens_per_minute")
+        if rate and tokens:
+            self.backend.take(f"{provider}:tokens", tokens, rate, force=True)
+
+
+class QueueWorker:
+    """Claim jobs from a queue backend, run them and write their results back"""
+
+    def __init__(self, backend: QueueBackend, analyze: Callable[[str, dict], dict],
+                 worker_id: str = None, lease_s: float = None, poll_interval: float = None,
+                 on_event: Callable[[str], None] = None):
+        """
+        Args:
+            backend: Queue backend
+            analyze: Returns the result record for (symbol, job options)
+            worker_id: Unique worker name (default: <host>:<pid>)
+            lease_s: Job lease, renewed every third of it while the job runs
+            poll_interval: Seconds to wait when the queue is empty
+            on_event: Receives progress messages
+        """
+        self.backend = backend
+        self.analyze = analyze
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_s = lease_s or APP_CONFIG.QUEUE_LEASE_SECONDS
+        self.poll_interval = poll_interval or APP_CONFIG.QUEUE_POLL_INTERVAL
+        self.on_event = on_event or (lambda message: None)
+        self._stop = threading.Event()
+
+    def _keep_lease(self, job_id: int, done: threading.Event):
+        """Renew a job's lease until it finishes (or the lease is lost)"""
+        while not done.wait(self.lease_s / 3):
+            if not self.backend.renew(job_id, self.worker_id, self.lease_s):
+                return
+
+    def run_once(self) -> bool:
+        """Claim and run one job; False if the queue had nothing runnable"""
+        job = self.backend.claim(self.worker_id, self.lease_s)
+        if job is None:
+            return False
+
+        self.on_event(f"📈 {job['symbol']} (job {job['id']}, attempt {job['attempts']})")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._keep_lease, args=(job["id"], done), daemon=True)
+        heartbeat.start()
+        try:
+            record = self.analyze(job["symbol"], job["options"])
+        except Exception as e:
+            self.backend.release(job["id"], self.worker_id, str(e))
+            self.on_event(f"❌ {job['symbol']}: {str(e)}")
+            return True
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if not self.backend.complete(job["id"], self.worker_id, record):
+            self.on_event(f"⚠️ {job['symbol']}: lease lost, result discarded")
+        elif record["status"] == "success":
+            self.on_event(f"✅ {job['symbol']} done")
+        else:
+            self.on_event(f"❌ {job['symbol']}: {record.get('error')}")
+        return True
+
+    def run(self, max_jobs: int = None, exit_when_idle: bool = False) -> int:
+        """
+        Process jobs until stop() is called
+
+        Args:
+            max_jobs: Stop after this many jobs
+            exit_when_idle: Stop once the queue has nothing runnable
+
+        Returns:
+            int: Number of jobs processed
+        """
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            if self.run_once():
+                processed += 1
+            elif exit_when_idle:
+                break
+            else:
+                self._stop.wait(self.poll_interval)
+        return processed
+
+    def stop(self):
+        """Stop after the current job"""
+        self._stop.set()
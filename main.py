@@ -21,19 +21,28 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
 load_dotenv()
 
-# Import project modules
-from crew.financial_crew import FinancialCrew, run_financial_analysis
-from tools.financial_tools import YFinanceStockTool
-from utils.helpers import validate_stock_symbol, get_stock_metrics
-from config.settings import APP_CONFIG, get_environment_config, validate_config
+# Import project modules. Only lightweight modules are imported here; the
+# agent stack (crewai/langchain), yfinance and the job runner are imported by
+# the commands that need them, so --help, --config and --info start quickly.
+from utils.token_budget import (
+    build_budget_report, format_budget_report, check_prefix_stability, format_prefix_report
+)
+from utils.metrics import METRICS
+from utils.profiler import Profiler, profile_run, profile_stage, set_profiler
+from utils.scheduler import priority_class
+from utils.sinks import SINK_TYPES, build_record, open_sink
+from config.settings import (
+    APP_CONFIG, MODEL_ROUTING_CONFIG, TASK_CONFIG, WATCHLIST_CONFIG, get_environment_config,
+    validate_config
+)
 
 
 class FinancialAnalysisCLI:
     """Command Line Interface for Financial Analysis"""
     
     def __init__(self):
-        self.tool = YFinanceStockTool()
         self.crew = None
+        self.mock_llm = None
         
     def setup_cli(self) -> argparse.ArgumentParser:
         """Setup command line argument parser"""
@@ -55,6 +64,52 @@ Examples:
     # Test system configuration
     python main.py --test
     
+    # Report input tokens for every task template
+    python main.py --token-budget
+    
+    # Analyze with compact prompt templates
+    python main.py --analyze MSFT --prompt-variant compact
+    
+    # One analysis, all report types generated concurrently
+    python main.py --analyze AAPL --reports all
+    
+    # Several analysis types in parallel, combined into one report
+    python main.py --analyze AAPL --analysis-types stock_analysis,technical_analysis,risk_assessment
+    
+    # Large universe from a file: results streamed as they finish, resumable after a crash
+    python main.py --symbols-file sp500.txt --output sp500.jsonl --format json
+    python main.py --symbols-file sp500.txt --output sp500.jsonl --format json --resume
+    
+    # Cap what a batch may spend: cheaper plans as the budget runs low, clean stop when spent
+    python main.py --symbols-file sp500.txt --output sp500.jsonl --format json --max-cost 5
+    
+    # Distributed workers: queue a universe, run workers in parallel, collect the results
+    python main.py --symbols-file sp500.txt --enqueue
+    python main.py --worker --exit-when-idle    # in as many processes as the rate budget allows
+    python main.py --collect --output sp500.jsonl
+    
+    # Long-running watchlist refresh: warm agents, re-analysis only when data moves
+    python main.py --daemon --watchlist watchlist.txt --output watchlist.jsonl --interval 300
+    
+    # Stream batch results to Parquet (structured columns) or one markdown file per symbol
+    python main.py --batch AAPL,MSFT,NVDA --output results.parquet
+    python main.py --batch AAPL,MSFT,NVDA --output reports/ --sink markdown-dir
+    
+    # Executive summaries for a watchlist, several symbols per LLM request
+    python main.py --batch AAPL,MSFT,NVDA,AMZN --summaries-only
+    
+    # Hybrid report: tables rendered locally, LLM writes the narrative only
+    python main.py --analyze AAPL --hybrid
+    
+    # Benchmark orchestration offline against the in-process mock LLM
+    python main.py --batch AAPL,MSFT --mock-llm --mock-latency 0.5 --mock-tps 100
+    
+    # Record per-stage latency and token metrics as JSON lines
+    python main.py --batch AAPL,MSFT --metrics metrics.jsonl
+    
+    # Profile each stage (pstats + flamegraph stacks), merged over the batch
+    python main.py --batch AAPL,MSFT --profile --profile-aggregate
+    
     # Analyze with custom output file
     python main.py --analyze NVDA --output nvda_analysis.md
             """
@@ -73,6 +128,112 @@ Examples:
             help='Analyze multiple stocks (comma-separated, e.g., AAPL,GOOGL,MSFT)'
         )
         
+        parser.add_argument(
+            '--symbols-file',
+            metavar='FILE',
+            help='Analyze symbols listed in FILE as a checkpointed job, streaming each result to --output'
+        )
+        
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='With --symbols-file: skip symbols already completed, failed or rejected in the checkpoint'
+        )
+        
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='With --resume: run the symbols that failed again (a new record is appended for each)'
+        )
+        
+        parser.add_argument(
+            '--checkpoint',
+            metavar='FILE',
+            help='SQLite checkpoint for --symbols-file (default: <symbols-file>.checkpoint.db)'
+        )
+        
+        parser.add_argument(
+            '--max-tokens',
+            type=int,
+            metavar='TOKENS',
+            help='Token budget for --batch/--symbols-file: downgrade remaining jobs as it runs low, stop when spent'
+        )
+        
+        parser.add_argument(
+            '--max-cost',
+            type=float,
+            metavar='USD',
+            help='Cost budget for --batch/--symbols-file (estimated from model pricing)'
+        )
+        
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help='Keep running and refresh --watchlist on a schedule, re-analyzing only symbols whose data moved'
+        )
+        
+        parser.add_argument(
+            '--watchlist',
+            metavar='FILE',
+            help='Symbols file for --daemon (re-read on every refresh)'
+        )
+        
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=WATCHLIST_CONFIG.REFRESH_INTERVAL,
+            help=f'Seconds between --daemon refreshes (default: {WATCHLIST_CONFIG.REFRESH_INTERVAL})'
+        )
+        
+        parser.add_argument(
+            '--cycles',
+            type=int,
+            help='With --daemon: exit after this many refreshes (default: run until interrupted)'
+        )
+        
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Queue the --batch/--symbols-file symbols for --worker processes instead of analyzing them'
+        )
+        
+        parser.add_argument(
+            '--worker',
+            action='store_true',
+            help='Claim queued analyses and write results back to the queue (run several in parallel)'
+        )
+        
+        parser.add_argument(
+            '--collect',
+            action='store_true',
+            help='Write the results of finished queued jobs to --output (default: stdout)'
+        )
+        
+        parser.add_argument(
+            '--queue',
+            metavar='URL',
+            default=APP_CONFIG.QUEUE_URL,
+            help=f'Queue backend for --enqueue/--worker/--collect (default: {APP_CONFIG.QUEUE_URL})'
+        )
+        
+        parser.add_argument(
+            '--priority',
+            choices=list(APP_CONFIG.PRIORITY_WEIGHTS),
+            help='Priority class for LLM capacity (default: interactive for --analyze/--info, batch otherwise)'
+        )
+        
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            help='With --worker: exit after this many jobs'
+        )
+        
+        parser.add_argument(
+            '--exit-when-idle',
+            action='store_true',
+            help='With --worker: exit once the queue has nothing left to run'
+        )
+        
         parser.add_argument(
             '--info', '-i',
             metavar='SYMBOL',
@@ -85,6 +246,20 @@ Examples:
             help='Test system configuration and API connectivity'
         )
         
+        parser.add_argument(
+            '--reports', '-r',
+            metavar='TYPES',
+            help=f"Generate report types from a single analysis (comma-separated or 'all'; "
+                 f"available: {', '.join(TASK_CONFIG.REPORT_TYPES)})"
+        )
+        
+        parser.add_argument(
+            '--analysis-types',
+            metavar='TYPES',
+            help=f"Run analysis task types concurrently and combine them into the report(s) "
+                 f"(comma-separated or 'all'; available: {', '.join(TASK_CONFIG.ANALYSIS_TYPES)})"
+        )
+        
         # Output options
         parser.add_argument(
             '--output', '-o',
@@ -99,6 +274,12 @@ Examples:
             help='Output format (default: markdown)'
         )
         
+        parser.add_argument(
+            '--sink',
+            choices=SINK_TYPES,
+            help='Streaming sink for --batch/--symbols-file results (default: inferred from --output extension)'
+        )
+        
         # Configuration options
         parser.add_argument(
             '--verbose', '-v',
@@ -118,8 +299,94 @@ Examples:
             help='Show current configuration'
         )
         
+        # Prompt options
+        parser.add_argument(
+            '--prompt-variant',
+            choices=APP_CONFIG.PROMPT_VARIANTS,
+            default=APP_CONFIG.DEFAULT_PROMPT_VARIANT,
+            help=f'Task prompt template variant (default: {APP_CONFIG.DEFAULT_PROMPT_VARIANT})'
+        )
+        
+        parser.add_argument(
+            '--hybrid',
+            action='store_true',
+            help='Render metrics tables locally and have the LLM write narrative sections only'
+        )
+        
+        parser.add_argument(
+            '--summaries-only',
+            action='store_true',
+            help='With --batch: write executive summaries only, several symbols per LLM request'
+        )
+        
+        parser.add_argument(
+            '--token-budget',
+            action='store_true',
+            help='Report input token counts for every task template and check the prompt prefix '
+                 'is symbol-independent (exits non-zero if not; runs offline)'
+        )
+        
+        # Instrumentation options
+        parser.add_argument(
+            '--profile',
+            nargs='?',
+            const=APP_CONFIG.PROFILE_DIR,
+            metavar='DIR',
+            help=f'Profile each stage (cProfile .pstats + sampled .collapsed stacks) into DIR '
+                 f'(default: {APP_CONFIG.PROFILE_DIR}); one profile per symbol in batches'
+        )
+        
+        parser.add_argument(
+            '--profile-aggregate',
+            action='store_true',
+            help='With --profile: merge the profiles of a whole batch into one'
+        )
+        
+        parser.add_argument(
+            '--metrics',
+            metavar='FILE',
+            default=APP_CONFIG.METRICS_FILE,
+            help='Append per-stage latency/token metrics to FILE as JSON lines'
+        )
+        
+        # Benchmarking options
+        parser.add_argument(
+            '--mock-llm',
+            action='store_true',
+            help='Point agents at an in-process OpenAI-compatible mock LLM (no API key needed)'
+        )
+        
+        parser.add_argument(
+            '--mock-latency',
+            type=float,
+            default=APP_CONFIG.MOCK_LLM["latency_s"],
+            metavar='SECONDS',
+            help='Mock LLM fixed latency per request'
+        )
+        
+        parser.add_argument(
+            '--mock-tps',
+            type=float,
+            default=APP_CONFIG.MOCK_LLM["tokens_per_second"],
+            metavar='TOKENS',
+            help='Mock LLM generation speed in tokens per second'
+        )
+        
         return parser
     
+    def start_mock_llm(self, latency_s: float, tokens_per_second: float, quiet: bool = False):
+        """Start the in-process mock LLM and route all agents to it"""
+        
+        from utils.mock_llm import MockLLMServer
+        
+        self.mock_llm = MockLLMServer(
+            port=0, latency_s=latency_s, tokens_per_second=tokens_per_second
+        ).start().route_agents()
+        
+        if not quiet:
+            print(f"🧪 Mock LLM running at {self.mock_llm.base_url} "
+                  f"({latency_s}s latency, {tokens_per_second:g} tok/s)")
+    
     def validate_environment(self) -> bool:
         """Validate environment and configuration"""
         
@@ -140,6 +407,9 @@ Examples:
     def test_system(self) -> bool:
         """Test system components and connectivity"""
         
+        from crew.financial_crew import FinancialCrew
+        from tools.financial_tools import YFinanceStockTool
+        
         print("🧪 Testing Multi-Agent Financial Analyst System...")
         print("-" * 50)
         
@@ -154,7 +424,7 @@ Examples:
         # Test 2: YFinance tool
         print("\n2. YFinance Data Tool:")
         try:
-            test_result = self.tool._run("AAPL")
+            test_result = YFinanceStockTool()._run("AAPL")
             data = json.loads(test_result)
             if "company" in data and data["company"]:
                 print("   ✅ YFinance tool working correctly")
@@ -184,43 +454,30 @@ Examples:
             print(f"   ❌ API connectivity failed: {str(e)}")
             return False
         
+        # Test 5: Prompt prefix stability (static instructions shared across symbols)
+        print("\n5. Prompt Prefix Stability:")
+        try:
+            unstable = [
+                f"{row['template']} ({row['variant']})"
+                for row in check_prefix_stability() if not row["stable"]
+            ]
+            if unstable:
+                print(f"   ❌ Symbol-dependent prompt prefix: {', '.join(unstable)}")
+                return False
+            print("   ✅ All task templates share a symbol-independent prefix")
+        except Exception as e:
+            print(f"   ❌ Prefix stability check failed: {str(e)}")
+            return False
+        
         print("\n🎉 All system tests passed successfully!")
         print("The Multi-Agent Financial Analyst is ready to use.")
         return True
     
     def get_quick_info(self, symbol: str) -> dict:
         """Get quick stock information without AI analysis"""
+        from tools.stock_data import get_quick_info
         
-        if not validate_stock_symbol(symbol):
-            return {"error": f"Invalid stock symbol: {symbol}"}
-        
-        try:
-            # Use the tool to get data
-            result = self.tool._run(symbol)
-            data = json.loads(result)
-            
-            # Get additional metrics
-            metrics = get_stock_metrics(symbol)
-            
-            # Combine data
-            info = {
-                "symbol": symbol.upper(),
-                "company": data.get("company", "N/A"),
-                "current_price": data.get("latest_price", "N/A"),
-                "latest_date": data.get("latest_date", "N/A"),
-                "market_cap": data.get("market_cap", "N/A"),
-                "pe_ratio": data.get("pe_ratio", "N/A"),
-                "52_week_high": data.get("52wk_high", "N/A"),
-                "52_week_low": data.get("52wk_low", "N/A"),
-                "rating": data.get("rating", "N/A"),
-                "sector": metrics.get("sector", "N/A"),
-                "industry": metrics.get("industry", "N/A")
-            }
-            
-            return info
-            
-        except Exception as e:
-            return {"error": f"Failed to fetch data for {symbol}: {str(e)}"}
+        return get_quick_info(symbol)
     
     def format_quick_info(self, info: dict, format_type: str = "text") -> str:
         """Format quick info for display"""
@@ -261,94 +518,530 @@ Industry: {info['industry']}
 Data Date: {info['latest_date']}
 """
     
-    def analyze_stock(self, symbol: str, verbose: bool = False, quiet: bool = False) -> str:
+    def analyze_stock(self, symbol: str, verbose: bool = False, quiet: bool = False,
+                      prompt_variant: str = None, hybrid: bool = False) -> str:
         """Analyze a single stock using AI agents"""
         
         if not quiet:
             print(f"🤖 Starting AI analysis for {symbol.upper()}...")
         
-        if not validate_stock_symbol(symbol):
-            return f"Error: Invalid stock symbol '{symbol}'"
+        with METRICS.run_context(symbol=symbol.upper()):
+            return self._run_analysis(symbol, quiet, prompt_variant, hybrid)[0]
+    
+    def analyze_stock_record(self, symbol: str, verbose: bool = False, quiet: bool = True,
+                             prompt_variant: str = None, hybrid: bool = False,
+                             validated: bool = False, report_type: str = "investment_report") -> dict:
+        """Analyze a single stock and return a result record for the output sinks"""
+        
+        with METRICS.run_context(symbol=symbol.upper()):
+            result, structured = self._run_analysis(
+                symbol, quiet, prompt_variant, hybrid, validated, report_type
+            )
+        with profile_stage("format"):
+            return build_record(symbol, result, structured)
+    
+    def create_budget(self, max_tokens: int = None, max_cost: float = None, prompt_variant: str = None):
+        """BudgetManager for --max-tokens/--max-cost, or None when neither is set"""
+        if max_tokens is None and max_cost is None:
+            return None
+        from utils.budget_manager import BudgetManager
+        return BudgetManager(max_tokens, max_cost, prompt_variant)
+    
+    def analyze_planned(self, symbol: str, budget, plan: dict, verbose: bool = False,
+                        hybrid: bool = False, validated: bool = False) -> dict:
+        """Analyze a stock under a budget plan, charging its usage to the budget"""
+        
+        with budget.track(plan):
+            record = self.analyze_stock_record(
+                symbol, verbose, quiet=True, prompt_variant=plan["prompt_variant"], hybrid=hybrid,
+                validated=validated, report_type=plan["report_type"]
+            )
+        record["budget_plan"] = plan["name"]
+        return record
+    
+    def prevalidate(self, symbols: List[str], quiet: bool = False) -> tuple:
+        """
+        Normalise, dedupe and bulk-validate batch symbols before any LLM work
+        
+        Returns:
+            tuple: (symbols to analyze, error records for the rejected symbols,
+                whether the symbols were verified and need no per-symbol check)
+        """
+        from utils.symbols import format_rejects, prevalidate_symbols
+        
+        with profile_run("prevalidate"), profile_stage("validate"):
+            result = prevalidate_symbols(symbols)
+        if not quiet:
+            print(format_rejects(result))
+        rejects = [
+            build_record(symbol, f"Error: Invalid stock symbol '{symbol}' ({reason})")
+            for symbol, reason in result["rejected"].items()
+        ]
+        return result["valid"], rejects, result["verified"]
+    
+    def _run_analysis(self, symbol: str, quiet: bool, prompt_variant: str, hybrid: bool = False,
+                      validated: bool = False, report_type: str = "investment_report") -> tuple:
+        """
+        Validate and analyze a symbol inside its metrics context
+        
+        Args:
+            validated: The symbol already passed batch pre-validation
+            report_type: Report written from the analysis
+        
+        Returns:
+            tuple: (result text, structured AnalysisResult or None)
+        """
+        with profile_stage("imports"):
+            from crew.financial_crew import FinancialCrew
+            from utils.helpers import validate_stock_symbol
+        
+        start_time = time.time()
+        
+        if validated:
+            is_valid = True
+        else:
+            with METRICS.timed("data_fetch", stage="validate"), profile_stage("validate"):
+                is_valid = validate_stock_symbol(symbol)
+        
+        if not is_valid:
+            METRICS.record("run", duration_s=time.time() - start_time, status="invalid_symbol")
+            return f"Error: Invalid stock symbol '{symbol}'", None
         
         try:
             # Show progress
             if not quiet:
                 print("📊 Initializing agents and fetching data...")
-                start_time = time.time()
             
             # Run the analysis
-            result = run_financial_analysis(symbol.upper())
+            with profile_stage("crew_build"):
+                crew = FinancialCrew(prompt_variant=prompt_variant, hybrid=hybrid)
+            if report_type == "investment_report":
+                result = crew.analyze_stock(symbol.upper())
+            else:
+                result = crew.analyze_stock_reports(symbol.upper(), [report_type])[report_type]
+            structured = crew.analyses.get(symbol.upper())
             
-            # Ensure result is a string
-            if not isinstance(result, str):
-                # Handle CrewOutput or other objects
-                if hasattr(result, 'raw'):
-                    result = str(result.raw)
-                elif hasattr(result, 'output'):
-                    result = str(result.output)
-                elif hasattr(result, 'result'):
-                    result = str(result.result)
-                else:
-                    result = str(result)
+            # The crew reports failures as "Error..." text rather than raising
+            duration = time.time() - start_time
+            status = "error" if result.startswith("Error") else "success"
+            METRICS.record("run", duration_s=duration, status=status)
             
             if not quiet:
-                duration = time.time() - start_time
-                print(f"✅ Analysis completed in {duration:.1f} seconds")
+                if status == "success":
+                    print(f"✅ Analysis completed in {duration:.1f} seconds")
+                else:
+                    print(f"❌ Analysis failed after {duration:.1f} seconds")
             
-            return result
+            return result, structured
             
         except Exception as e:
+            METRICS.record("run", duration_s=time.time() - start_time, status="error")
             error_msg = f"Analysis failed for {symbol}: {str(e)}"
             if not quiet:
                 print(f"❌ {error_msg}")
-            return f"Error: {error_msg}"
+            return f"Error: {error_msg}", None
+    
+    def analyze_stock_reports(self, symbol: str, report_types: List[str], quiet: bool = False,
+                              prompt_variant: str = None, analysis_types: List[str] = None,
+                              hybrid: bool = False) -> dict:
+        """Run the analysis stage once and generate several report types from it concurrently"""
+        from crew.financial_crew import run_multi_report_analysis
+        from utils.helpers import validate_stock_symbol
+        
+        symbol = symbol.upper()
+        if not quiet:
+            print(f"🤖 Starting AI analysis for {symbol} ({len(report_types)} report types)...")
+        
+        with METRICS.run_context(symbol=symbol):
+            start_time = time.time()
+            
+            with METRICS.timed("data_fetch", stage="validate"), profile_stage("validate"):
+                is_valid = validate_stock_symbol(symbol)
+            
+            if not is_valid:
+                METRICS.record("run", duration_s=time.time() - start_time, status="invalid_symbol")
+                error = f"Error: Invalid stock symbol '{symbol}'"
+                return {report_type: error for report_type in report_types}
+            
+            reports = run_multi_report_analysis(
+                symbol, report_types, prompt_variant, analysis_types, hybrid
+            )
+            
+            # Each report type succeeds or fails on its own ("Error..." text)
+            duration = time.time() - start_time
+            report_status = {
+                report_type: "error" if text.startswith("Error") else "success"
+                for report_type, text in reports.items()
+            }
+            failed = [report_type for report_type, status in report_status.items() if status == "error"]
+            status = "success" if not failed else "error" if len(failed) == len(reports) else "partial"
+            METRICS.record("run", duration_s=duration, status=status, reports=report_status)
+        
+        if not quiet:
+            print(f"✅ {len(reports) - len(failed)}/{len(reports)} reports completed in {duration:.1f} seconds")
+            if failed:
+                print(f"❌ Failed: {', '.join(failed)}")
+        
+        return reports
     
-    def batch_analyze(self, symbols: List[str], verbose: bool = False, quiet: bool = False) -> dict:
-        """Analyze multiple stocks"""
+    def parse_types(self, value: str, available: List[str]) -> List[str]:
+        """Parse a comma-separated --reports / --analysis-types option"""
+        
+        if value.strip().lower() == "all":
+            return available
+        
+        types = [t.strip() for t in value.split(',') if t.strip()]
+        unknown = [t for t in types if t not in available]
+        if unknown:
+            raise ValueError(f"Unknown type(s): {', '.join(unknown)}")
+        return types
+    
+    def format_reports(self, symbol: str, reports: dict, format_type: str = "markdown") -> str:
+        """Combine several reports for one symbol into a single output"""
+        
+        if format_type == "json":
+            return json.dumps({"symbol": symbol.upper(), "reports": reports}, indent=2)
+        
+        parts = []
+        for report_type, report in reports.items():
+            title = report_type.replace('_', ' ').title()
+            parts.append(f"# {symbol.upper()} - {title}\n\n{report}\n\n---\n")
+        return "\n".join(parts)
+    
+    def batch_analyze(self, symbols: List[str], verbose: bool = False, quiet: bool = False,
+                      prompt_variant: str = None, hybrid: bool = False, sink=None, budget=None) -> dict:
+        """
+        Analyze multiple stocks
+        
+        With a sink, each record is streamed to it as it finishes and only the
+        per-symbol status is kept in the returned dict. With a budget, jobs are
+        downgraded as it runs low and symbols left once it is spent are
+        recorded as skipped.
+        """
         
         results = {}
+        symbols, rejects, validated = self.prevalidate(symbols, quiet)
+        
+        # Rejected symbols are reported up front and never reach the agents
+        for record in rejects:
+            if sink:
+                sink.write(record)
+            results[record["symbol"]] = {"status": record["status"]} if sink else record
         
         if not quiet:
             print(f"🚀 Starting batch analysis for {len(symbols)} stocks...")
             print(f"Symbols: {', '.join(symbols)}")
             print("-" * 50)
         
+        plan = None
         for i, symbol in enumerate(symbols, 1):
+            if budget:
+                previous, plan = plan, budget.plan_next(len(symbols) - i + 1)
+                if plan is None:
+                    # Stop between jobs: every record written so far is complete
+                    skipped = symbols[i - 1:]
+                    if not quiet:
+                        print(f"\n💸 Budget exhausted: {len(skipped)} symbols not analyzed")
+                    for rest in skipped:
+                        record = {"symbol": rest, "status": "skipped", "error": "Not analyzed: budget exhausted",
+                                  "timestamp": datetime.now().isoformat()}
+                        if sink:
+                            sink.write(record)
+                        results[rest] = {"status": record["status"]} if sink else record
+                    break
+                if previous and plan["name"] != previous["name"] and not quiet:
+                    print(f"\n⬇️ Budget running low: switching to the '{plan['name']}' plan")
+            
             if not quiet:
                 print(f"\n📈 Analyzing {symbol} ({i}/{len(symbols)})...")
             
-            try:
-                result = self.analyze_stock(symbol, verbose, quiet=True)
-                results[symbol.upper()] = {
-                    "status": "success",
-                    "analysis": result,
-                    "timestamp": datetime.now().isoformat()
-                }
+            with profile_run(symbol):
+                try:
+                    if plan:
+                        record = self.analyze_planned(symbol, budget, plan, verbose, hybrid, validated)
+                    else:
+                        record = self.analyze_stock_record(
+                            symbol, verbose, quiet=True, prompt_variant=prompt_variant, hybrid=hybrid,
+                            validated=validated
+                        )
+                except Exception as e:
+                    record = {
+                        "symbol": symbol.upper(),
+                        "status": "error", 
+                        "error": str(e),
+                        "timestamp": datetime.now().isoformat()
+                    }
                 
-                if not quiet:
+                if sink:
+                    with profile_stage("save"):
+                        sink.write(record)
+                    results[symbol.upper()] = {"status": record["status"]}
+                else:
+                    results[symbol.upper()] = record
+            
+            if not quiet:
+                if record["status"] == "success":
                     print(f"✅ {symbol} analysis completed")
-                
-            except Exception as e:
-                results[symbol.upper()] = {
-                    "status": "error", 
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                if not quiet:
-                    print(f"❌ {symbol} analysis failed: {str(e)}")
+                else:
+                    print(f"❌ {symbol} analysis failed: {record['error']}")
         
         if not quiet:
             success_count = sum(1 for r in results.values() if r["status"] == "success")
-            print(f"\n🎉 Batch analysis completed: {success_count}/{len(symbols)} successful")
+            print(f"\n🎉 Batch analysis completed: {success_count}/{len(results)} successful")
+            if budget:
+                print(budget.format_status())
+            print("\n" + METRICS.format_summary())
         
         return results
     
+    def batch_summaries(self, symbols: List[str], quiet: bool = False) -> dict:
+        """Generate executive summaries for multiple stocks in batched LLM requests"""
+        from crew.batch_summaries import run_batch_summaries
+        
+        symbols, rejects, _ = self.prevalidate(symbols, quiet)
+        results = {record["symbol"]: record for record in rejects}
+        
+        if not quiet:
+            print(f"🚀 Starting batched executive summaries for {len(symbols)} stocks...")
+            print(f"Symbols: {', '.join(symbols)}")
+            print("-" * 50)
+        
+        timestamp = datetime.now().isoformat()
+        for symbol, result in (run_batch_summaries(symbols).items() if symbols else []):
+            if result["status"] == "success":
+                results[symbol] = {"symbol": symbol, "status": "success", "analysis": result["summary"],
+                                   "timestamp": timestamp}
+            else:
+                results[symbol] = {"symbol": symbol, "status": "error", "error": result["error"],
+                                   "timestamp": timestamp}
+        
+        if not quiet:
+            success_count = sum(1 for r in results.values() if r["status"] == "success")
+            print(f"\n🎉 Batched summaries completed: {success_count}/{len(symbols)} successful")
+            print("\n" + METRICS.format_summary())
+        
+        return results
+    
+    def run_job(self, symbols_file: str, output: str = None, format_type: str = "markdown",
+                resume: bool = False, checkpoint: str = None, verbose: bool = False,
+                quiet: bool = False, prompt_variant: str = None, hybrid: bool = False,
+                sink_type: str = None, budget=None, retry_failed: bool = False) -> dict:
+        """
+        Analyze a symbols file as a resumable job
+        
+        Each result is streamed to the output file (or stdout) as soon as it
+        finishes and per-symbol completion is checkpointed in SQLite, so a
+        resumed job writes one record per symbol: rejected and failed symbols
+        are not written again unless retry_failed re-runs the failed ones.
+        With a budget, jobs are downgraded as it runs low and the job stops
+        once it is spent, leaving the remaining symbols pending for --resume.
+        
+        Returns:
+            dict: Number of symbols per final status
+        """
+        from crew.job_runner import JobCheckpoint, JobRunner, JobStopped, read_symbols_file
+        
+        symbols, rejects, validated = self.prevalidate(read_symbols_file(symbols_file), quiet)
+        job = JobCheckpoint(checkpoint or f"{symbols_file}.checkpoint.db")
+        sink = open_sink(output, format_type, append=resume, sink_type=sink_type) if output else None
+        
+        def write(record: dict):
+            with profile_stage("save"):
+                if sink:
+                    sink.write(record)
+                else:
+                    print(json.dumps(record, default=str) if format_type == "json"
+                          else record.get("analysis") or record.get("error"), flush=True)
+        
+        remaining = {"jobs": len(symbols), "plan": None}
+        
+        def progress(symbol: str, index: int, total: int):
+            remaining["jobs"] = total - index + 1
+            if not quiet:
+                print(f"\n📈 Analyzing {symbol} ({index}/{total})...")
+        
+        def analyze(symbol: str) -> dict:
+            with profile_run(symbol):
+                return analyze_symbol(symbol)
+        
+        def analyze_symbol(symbol: str) -> dict:
+            if budget is None:
+                return self.analyze_stock_record(
+                    symbol, verbose, quiet=True, prompt_variant=prompt_variant, hybrid=hybrid,
+                    validated=validated
+                )
+            plan = budget.plan_next(remaining["jobs"])
+            if plan is None:
+                if not quiet:
+                    print(f"💸 Budget exhausted: stopping, {remaining['jobs']} symbols left pending")
+                raise JobStopped("budget exhausted")
+            if remaining["plan"] and plan["name"] != remaining["plan"] and not quiet:
+                print(f"⬇️ Budget running low: switching to the '{plan['name']}' plan")
+            remaining["plan"] = plan["name"]
+            return self.analyze_planned(symbol, budget, plan, verbose, hybrid, validated)
+        
+        if not quiet:
+            print(f"🚀 Starting job for {len(symbols)} symbols from {symbols_file}"
+                  f"{' (resuming)' if resume else ''}")
+            print(f"Checkpoint: {job.path}")
+        
+        runner = JobRunner(analyze, job, write, progress)
+        try:
+            counts = runner.run(symbols, resume, rejects, retry_failed)
+        finally:
+            job.close()
+            if sink:
+                sink.close()
+        
+        if not quiet:
+            print(f"\n🎉 Job finished: {counts.get('done', 0)}/{len(symbols)} completed, "
+                  f"{counts.get('failed', 0)} failed, {counts.get('rejected', 0)} rejected")
+            if counts.get("pending"):
+                print(f"⏸️ {counts['pending']} symbols pending: run again with --resume to continue")
+            if counts.get("failed") and not retry_failed:
+                print(f"↩️ Add --retry-failed to --resume to run the {counts['failed']} failed symbols again")
+            if budget:
+                print(budget.format_status())
+            if output:
+                print(f"💾 Results streamed to: {sink.path}")
+            print("\n" + METRICS.format_summary())
+        
+        return counts
+    
+    def run_daemon(self, watchlist: str, output: str = None, format_type: str = "markdown",
+                   interval: float = None, cycles: int = None, quiet: bool = False,
+                   prompt_variant: str = None, hybrid: bool = False, sink_type: str = None):
+        """
+        Refresh a watchlist on a schedule until interrupted
+        
+        New reports are kept in the report store and appended to the output
+        sink (or printed as JSON lines/text when no output is given).
+        """
+        from crew.watchlist_daemon import WatchlistDaemon
+        
+        sink = open_sink(output, format_type, append=True, sink_type=sink_type) if output else None
+        
+        def write(record: dict):
+            if sink:
+                sink.write(record)
+            else:
+                print(json.dumps(record, default=str) if format_type == "json"
+                      else record.get("analysis") or record.get("error"), flush=True)
+        
+        daemon = WatchlistDaemon(
+            watchlist, write, interval, prompt_variant, hybrid,
+            on_event=None if quiet else lambda message: print(message, flush=True)
+        )
+        
+        if not quiet:
+            print(f"👀 Watching {watchlist} every {daemon.interval:.0f}s (Ctrl+C to stop)")
+        try:
+            daemon.run(cycles)
+        except KeyboardInterrupt:
+            if not quiet:
+                print("\n🛑 Watchlist daemon stopped")
+        finally:
+            if sink:
+                sink.close()
+        
+        if not quiet:
+            print("\n" + METRICS.format_summary())
+    
+    def enqueue(self, symbols: List[str], queue_url: str = None, quiet: bool = False,
+                prompt_variant: str = None, hybrid: bool = False) -> dict:
+        """Queue one analysis job per symbol for --worker processes"""
+        from crew.work_queue import open_queue
+        
+        # Only symbols that passed pre-validation are queued; workers skip their own check
+        symbols, _, validated = self.prevalidate(symbols, quiet)
+        backend = open_queue(queue_url)
+        try:
+            added = backend.enqueue(
+                symbols, {"prompt_variant": prompt_variant, "hybrid": hybrid, "validated": validated}
+            )
+            counts = backend.counts()
+        finally:
+            backend.close()
+        
+        if not quiet:
+            print(f"📥 Queued {added} jobs ({counts.get('queued', 0)} waiting, "
+                  f"{counts.get('leased', 0)} running)")
+        return counts
+    
+    def run_worker(self, queue_url: str = None, max_jobs: int = None, exit_when_idle: bool = False,
+                   verbose: bool = False, quiet: bool = False) -> int:
+        """
+        Process queued analyses until interrupted
+        
+        Provider rate limits are shared with every other worker on the same
+        queue (AppConfig.SHARED_RATE_BUDGET).
+        """
+        from crew.work_queue import QueueWorker, SharedRateBudget, open_queue
+        from utils.resilience import set_rate_budget
+        
+        backend = open_queue(queue_url)
+        if APP_CONFIG.SHARED_RATE_BUDGET:
+            set_rate_budget(SharedRateBudget(backend))
+        
+        worker = QueueWorker(
+            backend,
+            lambda symbol, options: self.analyze_stock_record(
+                symbol, verbose, quiet=True,
+                prompt_variant=options.get("prompt_variant"), hybrid=options.get("hybrid", False),
+                validated=options.get("validated", False)
+            ),
+            on_event=None if quiet else lambda message: print(message, flush=True)
+        )
+        
+        if not quiet:
+            print(f"👷 Worker {worker.worker_id} polling {queue_url or APP_CONFIG.QUEUE_URL}")
+        processed = 0
+        try:
+            processed = worker.run(max_jobs, exit_when_idle)
+        except KeyboardInterrupt:
+            if not quiet:
+                print("\n🛑 Worker stopped")
+        finally:
+            set_rate_budget(None)
+            backend.close()
+        
+        if not quiet:
+            print(f"\n🎉 Worker processed {processed} jobs")
+            print("\n" + METRICS.format_summary())
+        return processed
+    
+    def collect(self, queue_url: str = None, output: str = None, format_type: str = "markdown",
+                quiet: bool = False, sink_type: str = None) -> dict:
+        """Write the result records of finished queued jobs to a sink or stdout"""
+        from crew.work_queue import open_queue
+        
+        backend = open_queue(queue_url)
+        sink = open_sink(output, format_type, sink_type=sink_type) if output else None
+        try:
+            for record in backend.results():
+                if sink:
+                    sink.write(record)
+                else:
+                    print(json.dumps(record, default=str) if format_type == "json"
+                          else record.get("analysis") or record.get("error"), flush=True)
+            counts = backend.counts()
+        finally:
+            backend.close()
+            if sink:
+                sink.close()
+        
+        if not quiet:
+            print(f"📦 Collected {counts.get('done', 0)} done, {counts.get('failed', 0)} failed; "
+                  f"{counts.get('queued', 0) + counts.get('leased', 0)} still pending")
+            if sink:
+                print(f"💾 Results written to: {sink.path}")
+        return counts
+    
     def save_output(self, content: str, filepath: str, format_type: str = "markdown"):
         """Save output to file"""
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
+            with profile_stage("save"), open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             print(f"💾 Output saved to: {filepath}")
         except Exception as e:
@@ -366,7 +1059,14 @@ Data Date: {info['latest_date']}
         print(f"Environment: {env_config['environment']}")
         print(f"Debug Mode: {env_config['debug']}")
         print(f"API Key: {'✅ Set' if env_config['api_key'] else '❌ Missing'}")
-        print(f"Model: {APP_CONFIG.SAMBANOVA_MODEL}")
+        print(f"Model: {APP_CONFIG.LLM_MODEL}")
+        if MODEL_ROUTING_CONFIG.ENABLED:
+            for agent, model in MODEL_ROUTING_CONFIG.AGENT_MODELS.items():
+                print(f"  Route {agent}: {model}")
+            for task, model in MODEL_ROUTING_CONFIG.TASK_MODELS.items():
+                print(f"  Route {task}: {model}")
+        print(f"API Base URL: {APP_CONFIG.LLM_BASE_URL or APP_CONFIG.DEFAULT_API_BASE_URL}")
+        print(f"Prompt Variant: {APP_CONFIG.DEFAULT_PROMPT_VARIANT}")
         print(f"Cache Enabled: {env_config['cache_enabled']}")
         print(f"Log Level: {env_config['log_level']}")
     
@@ -376,20 +1076,85 @@ Data Date: {info['latest_date']}
         parser = self.setup_cli()
         args = parser.parse_args()
         
+        # Single analyses are interactive; batches, jobs, daemons and workers yield to them
+        priority = args.priority or ("interactive" if args.analyze or args.info else "batch")
+        
+        profiler = None
+        if args.profile:
+            profiler = Profiler(args.profile, args.profile_aggregate,
+                                on_event=None if args.quiet else print)
+            set_profiler(profiler)
+        
+        # Batches and jobs profile each symbol as its own run; everything else is one run
+        per_symbol = (args.batch or args.symbols_file) and not (args.summaries_only or args.enqueue)
+        command = args.analyze or args.info or next(
+            (name for name in ("worker", "daemon", "collect", "enqueue", "batch", "test")
+             if getattr(args, name)), "cli"
+        )
+        try:
+            with priority_class(priority):
+                if per_symbol:
+                    self.dispatch(parser, args)
+                else:
+                    with profile_run(command):
+                        self.dispatch(parser, args)
+        finally:
+            if profiler:
+                profiler.close()
+                set_profiler(None)
+    
+    def dispatch(self, parser: argparse.ArgumentParser, args: argparse.Namespace):
+        """Run the command selected by the parsed arguments"""
+        
         # Handle config display
         if args.config:
             self.show_config()
             return
         
+        # Handle token budget report
+        if args.token_budget:
+            print(format_budget_report(build_budget_report()))
+            print("\n🧩 Prompt prefix (cacheable across symbols)")
+            rows = check_prefix_stability()
+            print(format_prefix_report(rows))
+            # Offline check: a symbol-dependent prefix defeats provider prompt caching
+            unstable = [f"{row['template']} ({row['variant']})" for row in rows if not row["stable"]]
+            if unstable:
+                print(f"\n❌ Symbol-dependent prompt prefix: {', '.join(unstable)}")
+                sys.exit(1)
+            return
+        
+        if args.mock_llm:
+            self.start_mock_llm(args.mock_latency, args.mock_tps, args.quiet)
+        
         # Handle system test
         if args.test:
             success = self.test_system()
             sys.exit(0 if success else 1)
         
+        # Queue producer/collector commands need no LLM access
+        if args.enqueue:
+            if args.symbols_file:
+                from crew.job_runner import read_symbols_file
+                symbols = read_symbols_file(args.symbols_file)
+            elif args.batch:
+                symbols = [s.strip().upper() for s in args.batch.split(',')]
+            else:
+                parser.error("--enqueue requires --batch or --symbols-file")
+            self.enqueue(symbols, args.queue, args.quiet, args.prompt_variant, args.hybrid)
+            return
+        
+        if args.collect:
+            self.collect(args.queue, args.output, args.format, args.quiet, args.sink)
+            return
+        
         # Validate environment for other operations
         if not self.validate_environment():
             sys.exit(1)
         
+        if args.metrics:
+            METRICS.configure(args.metrics)
+        
         output_content = ""
         
         # Handle stock info
@@ -397,29 +1162,104 @@ Data Date: {info['latest_date']}
             if not args.quiet:
                 print(f"📊 Fetching information for {args.info.upper()}...")
             
-            info = self.get_quick_info(args.info)
-            output_content = self.format_quick_info(info, args.format)
+            with METRICS.run_context(symbol=args.info.upper()):
+                with METRICS.timed("data_fetch", stage="quick_info"):
+                    info = self.get_quick_info(args.info)
+            with profile_stage("format"):
+                output_content = self.format_quick_info(info, args.format)
+        
+        # Handle single analysis with parallel analysis types and/or report fan-out
+        elif args.analyze and (args.reports or args.analysis_types):
+            report_types = (
+                self.parse_types(args.reports, TASK_CONFIG.REPORT_TYPES)
+                if args.reports else ["investment_report"]
+            )
+            analysis_types = (
+                self.parse_types(args.analysis_types, TASK_CONFIG.ANALYSIS_TYPES)
+                if args.analysis_types else None
+            )
+            reports = self.analyze_stock_reports(
+                args.analyze, report_types, args.quiet, args.prompt_variant, analysis_types, args.hybrid
+            )
+            with profile_stage("format"):
+                output_content = self.format_reports(args.analyze, reports, args.format)
+            if not args.quiet:
+                print("\n" + METRICS.format_summary())
         
         # Handle single analysis
         elif args.analyze:
-            output_content = self.analyze_stock(args.analyze, args.verbose, args.quiet)
+            output_content = self.analyze_stock(
+                args.analyze, args.verbose, args.quiet, args.prompt_variant, args.hybrid
+            )
+            if not args.quiet:
+                print("\n" + METRICS.format_summary())
+        
+        # Handle queue worker (runs until interrupted or idle)
+        elif args.worker:
+            self.run_worker(args.queue, args.max_jobs, args.exit_when_idle, args.verbose, args.quiet)
+            return
+        
+        # Handle watchlist daemon (runs until interrupted)
+        elif args.daemon:
+            if not args.watchlist:
+                parser.error("--daemon requires --watchlist FILE")
+            self.run_daemon(
+                args.watchlist, args.output, args.format, args.interval, args.cycles,
+                args.quiet, args.prompt_variant, args.hybrid, args.sink
+            )
+            return
+        
+        # Handle checkpointed job (results are streamed, nothing left to output)
+        elif args.symbols_file:
+            self.run_job(
+                args.symbols_file, args.output, args.format, args.resume, args.checkpoint,
+                args.verbose, args.quiet, args.prompt_variant, args.hybrid, args.sink,
+                budget=self.create_budget(args.max_tokens, args.max_cost, args.prompt_variant),
+                retry_failed=args.retry_failed
+            )
+            return
         
         # Handle batch analysis
         elif args.batch:
             symbols = [s.strip().upper() for s in args.batch.split(',')]
-            results = self.batch_analyze(symbols, args.verbose, args.quiet)
+            if args.output:
+                # Stream each record to the sink instead of building the whole output in memory
+                sink = open_sink(args.output, args.format, sink_type=args.sink)
+                try:
+                    if args.summaries_only:
+                        for record in self.batch_summaries(symbols, args.quiet).values():
+                            sink.write(record)
+                    else:
+                        self.batch_analyze(
+                            symbols, args.verbose, args.quiet, args.prompt_variant, args.hybrid, sink=sink,
+                            budget=self.create_budget(args.max_tokens, args.max_cost, args.prompt_variant)
+                        )
+                finally:
+                    sink.close()
+                if not args.quiet:
+                    print(f"📄 Results written to: {sink.path}")
+                return
             
-            if args.format == "json":
-                output_content = json.dumps(results, indent=2)
+            if args.summaries_only:
+                results = self.batch_summaries(symbols, args.quiet)
             else:
-                # Format as markdown/text
-                output_parts = []
-                for symbol, result in results.items():
-                    if result["status"] == "success":
-                        output_parts.append(f"# Analysis for {symbol}\n\n{result['analysis']}\n\n---\n")
-                    else:
-                        output_parts.append(f"# Error for {symbol}\n\n{result['error']}\n\n---\n")
-                output_content = "\n".join(output_parts)
+                results = self.batch_analyze(
+                    symbols, args.verbose, args.quiet, args.prompt_variant, args.hybrid,
+                    budget=self.create_budget(args.max_tokens, args.max_cost, args.prompt_variant)
+                )
+            
+            with profile_run("output"), profile_stage("format"):
+                if args.format == "json":
+                    output_content = json.dumps(results, indent=2)
+                else:
+                    # Format as markdown/text
+                    output_parts = []
+                    for symbol, result in results.items():
+                        if result["status"] == "success":
+                            output_parts.append(f"# Analysis for {symbol}\n\n{result['analysis']}\n\n---\n")
+                        else:
+                            output_parts.append(f"# Error for {symbol}\n\n{result['error']}\n\n---\n")
+                    output_content = "\n".join(output_parts)
         
         else:
             parser.print_help()
@@ -12,6 +12,7 @@ load_dotenv()
 # Import your custom modules
 from crew.financial_crew import run_financial_analysis
 from utils.helpers import format_response, create_stock_chart, validate_stock_symbol
+from utils.scheduler import priority_class
 from config.settings import APP_CONFIG
 
 # Page configuration
@@ -125,8 +126,9 @@ def main():
             progress_bar.progress(60)
             
             try:
-                # Run the multi-agent analysis
-                result = run_financial_analysis(stock_symbol)
+                # Run the multi-agent analysis (a user is waiting: ahead of batch work)
+                with priority_class("interactive"):
+                    result = run_financial_analysis(stock_symbol)
                 
                 # Ensure result is a string for display
                 if not isinstance(result, str):
@@ -1,25 +1,32 @@
 from crewai import Task
-from config.settings import TASK_CONFIG
+from config.settings import TASK_CONFIG, COMPACT_TASK_CONFIG
 
 
 class AnalysisTaskManager:
     """Manages analysis tasks for financial agents"""
     
     @staticmethod
-    def create_stock_analysis_task(agent, symbol: str) -> Task:
+    def create_stock_analysis_task(agent, symbol: str, variant: str = "full") -> Task:
         """
         Create a comprehensive stock analysis task
         
         Args:
             agent: The stock analyst agent
             symbol: Stock ticker symbol to analyze
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured analysis task
         """
         
-        description = f"""
-        Conduct a comprehensive financial analysis of {symbol} using the stock_data_tool.
+        if variant == "compact":
+            return _create_compact_task(
+                "stock_analysis", agent, symbol,
+                tools=agent.tools if hasattr(agent, 'tools') else []
+            )
+        
+        description = """
+        Conduct a comprehensive financial analysis of the target stock using the stock_data_tool.
         
         **MANDATORY REQUIREMENTS:**
         1. **MUST** use the stock_data_tool to fetch real-time data - no assumptions or outdated information
@@ -82,8 +89,8 @@ class AnalysisTaskManager:
         **Data Source:** All analysis MUST be based on live data from stock_data_tool.
         """
         
-        expected_output = f"""
-        Comprehensive analysis report for {symbol} including:
+        expected_output = """
+        Comprehensive analysis report for the target stock including:
         
         1. **Executive Summary** (2-3 key sentences)
         2. **Current Market Data** (price, volume, movement)
@@ -99,14 +106,15 @@ class AnalysisTaskManager:
         """
         
         return Task(
-            description=description,
+            description=with_target(description, symbol),
             expected_output=expected_output,
             agent=agent,
             tools=agent.tools if hasattr(agent, 'tools') else []
         )
     
     @staticmethod
-    def create_sector_comparison_task(agent, symbol: str, sector_symbols: list = None) -> Task:
+    def create_sector_comparison_task(agent, symbol: str, sector_symbols: list = None,
+                                      variant: str = "full") -> Task:
         """
         Create a sector comparison analysis task
         
@@ -114,19 +122,22 @@ class AnalysisTaskManager:
             agent: The stock analyst agent
             symbol: Primary stock symbol
             sector_symbols: List of sector peer symbols for comparison
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured sector comparison task
         """
         
-        if sector_symbols is None:
-            sector_symbols = []
+        peers = ", ".join(sector_symbols or [])
+        
+        if variant == "compact":
+            return _create_compact_task("sector_comparison", agent, symbol, peers=peers)
         
-        description = f"""
-        Perform a sector-relative analysis of {symbol} against its peers.
+        description = """
+        Perform a sector-relative analysis of the target stock against its peers.
         
         **Primary Analysis:**
-        1. Use stock_data_tool to analyze {symbol}
+        1. Use stock_data_tool to analyze the target stock
         2. Identify the company's sector and industry
         3. Compare key metrics against sector averages
         
@@ -149,8 +160,8 @@ class AnalysisTaskManager:
         - Diversification benefits
         """
         
-        expected_output = f"""
-        Sector comparison report for {symbol}:
+        expected_output = """
+        Sector comparison report for the target stock:
         1. Sector identification and classification
         2. Peer group comparison metrics
         3. Relative valuation assessment
@@ -160,13 +171,14 @@ class AnalysisTaskManager:
         """
         
         return Task(
-            description=description,
+            description=with_target(description, symbol, peers=peers),
             expected_output=expected_output,
             agent=agent
         )
     
     @staticmethod
-    def create_technical_analysis_task(agent, symbol: str, period: str = "6mo") -> Task:
+    def create_technical_analysis_task(agent, symbol: str, period: str = "6mo",
+                                       variant: str = "full") -> Task:
         """
         Create a technical analysis focused task
         
@@ -174,13 +186,17 @@ class AnalysisTaskManager:
             agent: The stock analyst agent
             symbol: Stock ticker symbol
             period: Analysis period for technical indicators
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured technical analysis task
         """
         
-        description = f"""
-        Conduct technical analysis of {symbol} using {period} historical data.
+        if variant == "compact":
+            return _create_compact_task("technical_analysis", agent, symbol, period=period)
+        
+        description = """
+        Conduct technical analysis of the target stock using historical data over the target period.
         
         **Technical Analysis Requirements:**
         
@@ -217,8 +233,8 @@ class AnalysisTaskManager:
         Use stock_data_tool for all price and volume data.
         """
         
-        expected_output = f"""
-        Technical analysis report for {symbol}:
+        expected_output = """
+        Technical analysis report for the target stock:
         1. Overall trend assessment
         2. Key support/resistance levels
         3. Volume analysis insights
@@ -229,26 +245,30 @@ class AnalysisTaskManager:
         """
         
         return Task(
-            description=description,
+            description=with_target(description, symbol, period=period),
             expected_output=expected_output,
             agent=agent
         )
     
     @staticmethod
-    def create_risk_assessment_task(agent, symbol: str) -> Task:
+    def create_risk_assessment_task(agent, symbol: str, variant: str = "full") -> Task:
         """
         Create a comprehensive risk assessment task
         
         Args:
             agent: The stock analyst agent
             symbol: Stock ticker symbol
+            variant: Prompt variant ("full" or "compact")
             
         Returns:
             Task: Configured risk assessment task
         """
         
-        description = f"""
-        Perform comprehensive risk assessment for {symbol} investment.
+        if variant == "compact":
+            return _create_compact_task("risk_assessment", agent, symbol)
+        
+        description = """
+        Perform comprehensive risk assessment for an investment in the target stock.
         
         **Risk Analysis Framework:**
         
@@ -285,8 +305,8 @@ class AnalysisTaskManager:
         Use stock_data_tool for volatility and correlation data.
         """
         
-        expected_output = f"""
-        Risk assessment report for {symbol}:
+        expected_output = """
+        Risk assessment report for the target stock:
         1. Risk level classification (Low/Medium/High)
         2. Key risk factors identification
         3. Quantitative risk metrics
@@ -297,21 +317,53 @@ class AnalysisTaskManager:
         """
         
         return Task(
-            description=description,
+            description=with_target(description, symbol),
             expected_output=expected_output,
             agent=agent
         )
 
 
+def with_target(description: str, symbol: str, **fields) -> str:
+    """
+    Append the per-symbol target block to a static task description
+    
+    Everything before the block is identical for every symbol, so providers
+    with prompt prefix caching can reuse it across a batch.
+    
+    Args:
+        description: Static task instructions
+        symbol: Stock ticker symbol
+        **fields: Extra per-task values (e.g. period, peers); empty values are skipped
+        
+    Returns:
+        str: Description ending with the target block
+    """
+    
+    lines = [f"Symbol: {symbol}"]
+    lines += [f"{name.replace('_', ' ').title()}: {value}" for name, value in fields.items() if value]
+    return f"{description.rstrip()}\n\n{TASK_CONFIG.TARGET_HEADER}\n" + "\n".join(lines) + "\n"
+
+
+def _create_compact_task(task_type: str, agent, symbol: str, tools: list = None, **fields) -> Task:
+    """Build a task from the compact template for the given task type"""
+    
+    template = COMPACT_TASK_CONFIG.ANALYSIS_TASKS[task_type]
+    task_kwargs = {}
+    if tools is not None:
+        task_kwargs['tools'] = tools
+    
+    return Task(
+        description=with_target(template["description"], symbol, **fields),
+        expected_output=template["expected_output"],
+        agent=agent,
+        **task_kwargs
+    )
+
+
 # Utility functions for task management
 def get_available_task_types() -> list:
     """Return list of available task types"""
-    return [
-        "stock_analysis",
-        "sector_comparison", 
-        "technical_analysis",
-        "risk_assessment"
-    ]
+    return list(TASK_CONFIG.ANALYSIS_TYPES)
 
 
 def create_task_by_type(task_type: str, agent, symbol: str, **kwargs) -> Task:
@@ -323,25 +375,27 @@ def create_task_by_type(task_type: str, agent, symbol: str, **kwargs) -> Task:
         agent: Agent to assign the task to
         symbol: Stock symbol to analyze
         **kwargs: Additional parameters for specific task types
+                  (sector_symbols, period, variant)
         
     Returns:
         Task: Configured task instance
     """
     
     task_manager = AnalysisTaskManager()
+    variant = kwargs.get('variant', 'full')
     
     if task_type == "stock_analysis":
-        return task_manager.create_stock_analysis_task(agent, symbol)
+        return task_manager.create_stock_analysis_task(agent, symbol, variant)
     elif task_type == "sector_comparison":
         return task_manager.create_sector_comparison_task(
-            agent, symbol, kwargs.get('sector_symbols', [])
+            agent, symbol, kwargs.get('sector_symbols', []), variant
         )
     elif task_type == "technical_analysis":
         return task_manager.create_technical_analysis_task(
-            agent, symbol, kwargs.get('period', '6mo')
+            agent, symbol, kwargs.get('period', '6mo'), variant
         )
     elif task_type == "risk_assessment":
-        return task_manager.create_risk_assessment_task(agent, symbol)
+        return task_manager.create_risk_assessment_task(agent, symbol, variant)
     else:
         raise ValueError(f"Unknown task type: {task_type}")
 
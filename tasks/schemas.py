@@ -0,0 +1,114 @@
+import json
+import re
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field, ValidationError
+
+
+class AnalysisMetrics(BaseModel):
+    """Key figures the analyst read from stock_data_tool"""
+
+    price: Optional[float] = None
+    latest_date: Optional[str] = None
+    market_cap: Optional[float] = None
+    pe_ratio: Optional[float] = None
+    week52_high: Optional[float] = None
+    week52_low: Optional[float] = None
+    rating: Optional[str] = None
+
+
+class AnalysisSignal(BaseModel):
+    """A directional signal identified by the analyst"""
+
+    name: str
+    direction: Literal["bullish", "bearish", "neutral"] = "neutral"
+    rationale: str = ""
+
+
+class AnalysisRisk(BaseModel):
+    """A risk factor identified by the analyst"""
+
+    category: str
+    level: Literal["low", "medium", "high"] = "medium"
+    description: str = ""
+
+
+class AnalysisResult(BaseModel):
+    """Structured output of the analysis stage, consumed by reports, caches and exporters"""
+
+    symbol: str
+    company: Optional[str] = None
+    metrics: AnalysisMetrics = Field(default_factory=AnalysisMetrics)
+    signals: List[AnalysisSignal] = Field(default_factory=list)
+    risks: List[AnalysisRisk] = Field(default_factory=list)
+    risk_level: Literal["low", "medium", "high"] = "medium"
+    summary: str = ""
+    takeaways: List[str] = Field(default_factory=list)
+
+    def to_compact_json(self) -> str:
+        """Minified JSON without empty fields, for caching and prompt context"""
+        return self.model_dump_json(exclude_none=True)
+
+    @classmethod
+    def from_json(cls, data: str) -> "AnalysisResult":
+        """Rebuild a result from to_compact_json() output"""
+        return cls.model_validate_json(data)
+
+    @classmethod
+    def from_text(cls, text: str, symbol: str = None) -> Optional["AnalysisResult"]:
+        """
+        Parse a result from raw LLM output (tolerates code fences and prose)
+
+        Returns:
+            AnalysisResult or None if no valid JSON object is found
+        """
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+            if symbol and not data.get("symbol"):
+                data["symbol"] = symbol
+            return cls.model_validate(data)
+        except (ValueError, ValidationError):
+            return None
+
+    def to_record(self) -> dict:
+        """Flat record of the structured fields for tabular exporters"""
+        return {
+            "symbol": self.symbol,
+            "company": self.company,
+            **self.metrics.model_dump(),
+            "risk_level": self.risk_level,
+            "bullish_signals": sum(1 for s in self.signals if s.direction == "bullish"),
+            "bearish_signals": sum(1 for s in self.signals if s.direction == "bearish"),
+            "high_risks": sum(1 for r in self.risks if r.level == "high"),
+            "summary": self.summary
+        }
+
+
+class SymbolSummary(BaseModel):
+    """Executive summary of one symbol in a batched response"""
+
+    symbol: str
+    summary: str
+
+
+class BatchSummaryResponse(BaseModel):
+    """Structured response of a batched executive summary request"""
+
+    summaries: List[SymbolSummary] = Field(default_factory=list)
+
+    @classmethod
+    def from_text(cls, text: str) -> Optional["BatchSummaryResponse"]:
+        """Parse a response from raw LLM output, or None if it is not valid"""
+        match = re.search(r"\{.*\}", text or "", re.DOTALL)
+        if not match:
+            return None
+        try:
+            return cls.model_validate_json(match.group(0))
+        except (ValueError, ValidationError):
+            return None
+
+    def by_symbol(self) -> dict:
+        """Map upper-cased symbol -> summary text"""
+        return {s.symbol.strip().upper(): s.summary for s in self.summaries}
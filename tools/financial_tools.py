@@ -1,37 +1,60 @@
-import yfinance as yf
-import json
+import time
+from typing import List, Literal
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
+from config.settings import DATA_CONFIG
+from tools.stock_data import encode_snapshot, get_stock_snapshot
+from utils.metrics import METRICS
+from utils.resilience import check_deadline
+
+
+FieldGroup = Literal["price", "fundamentals", "ranges", "indicators", "risk"]
 
 
 class StockInput(BaseModel):
     symbol: str = Field(..., description="Stock symbol (e.g., 'AAPL')")
+    fields: List[FieldGroup] = Field(
+        default_factory=lambda: list(DATA_CONFIG.TOOL_DEFAULT_FIELDS),
+        description="Field groups to return: price, fundamentals, ranges, indicators, risk"
+    )
+    history_days: int = Field(
+        0, ge=0, le=DATA_CONFIG.TOOL_MAX_HISTORY_DAYS,
+        description="Add a price history summary over this many trading days (0 = none)"
+    )
+    format: Literal["json", "kv"] = Field(
+        "json", description="Output encoding: minified JSON or key:value lines"
+    )
 
 
 class YFinanceStockTool(BaseTool):
     name: str = "stock_data_tool"
-    description: str = "Fetches real-time stock market data."
+    description: str = (
+        "Fetches real-time stock market data. Request only the field groups you need "
+        "(price, fundamentals, ranges, indicators, risk) and set history_days for a "
+        "price history summary."
+    )
     args_schema: type[BaseModel] = StockInput
 
-    def _run(self, symbol: str) -> str:
+    def _run(self, symbol: str, fields: List[str] = None, history_days: int = 0,
+             format: str = "json") -> str:
+        check_deadline()
+        start = time.perf_counter()
+        status = "success"
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
-            hist = stock.history(period="1mo")
-            latest_data = hist.iloc[-1]
-            hist_1y = stock.history(period="1y")
-
-            response = {
-                "company": info.get("longName"),
-                "latest_price": latest_data['Close'],
-                "latest_date": latest_data.name.strftime('%Y-%m-%d'),
-                "52wk_high": info.get("fiftyTwoWeekHigh"),
-                "52wk_low": info.get("fiftyTwoWeekLow"),
-                "market_cap": info.get("marketCap"),
-                "pe_ratio": info.get("forwardPE"),
-                "rating": info.get("recommendationKey")
-            }
-            
-            return json.dumps(response, indent=2)
+            data = get_stock_snapshot(symbol, fields, history_days)
+            if data.get("stale"):
+                status = "stale"
+            return encode_snapshot(data, format)
         except Exception as e:
-            return f"Error: {str(e)}"
\ No newline at end of file
+            status = "error"
+            return f"Error: {str(e)}"
+        finally:
+            METRICS.record(
+                "tool_call",
+                tool=self.name,
+                requested_symbol=symbol,
+                fields=",".join(fields or DATA_CONFIG.TOOL_DEFAULT_FIELDS),
+                history_days=history_days,
+                duration_s=time.perf_counter() - start,
+                status=status
+            )
@@ -0,0 +1,205 @@
+"""
+Stock snapshot fetching and encoding for the stock data tool.
+
+Kept free of crewai/pydantic so lightweight commands (quick info, daemons)
+can fetch snapshots without loading the agent stack.
+"""
+
+import json
+import math
+from typing import List
+
+import yfinance as yf
+
+from config.settings import DATA_CONFIG
+from utils.cache import LastGoodStore
+from utils.helpers import get_stock_metrics, validate_stock_symbol
+from utils.profiler import profiled
+from utils.replay_data import load_replay, record_replay, replay_enabled
+
+
+# Last good snapshot per request, served (marked stale) while yfinance is failing
+_SNAPSHOT_STORE = LastGoodStore("snapshots", "yfinance")
+
+
+def _round(value):
+    """Round numbers to the precision an analyst needs (large values to 3 significant digits)"""
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return value
+    if math.isnan(value):
+        return None
+    if abs(value) >= 1e6:
+        return int(float(f"{value:.3g}"))
+    if abs(value) >= 1:
+        return round(value, 2)
+    return float(f"{value:.3g}")
+
+
+def _history_summary(close, volume, days: int) -> dict:
+    """Summarise the last `days` trading days of closes and volume"""
+    close = close.tail(days)
+    volume = volume.tail(days)
+    returns = close.pct_change().dropna()
+    return {
+        "days": len(close),
+        "start": close.index[0].strftime('%Y-%m-%d'),
+        "start_close": close.iloc[0],
+        "return_pct": (close.iloc[-1] / close.iloc[0] - 1) * 100,
+        "high": close.max(),
+        "low": close.min(),
+        "avg_volume": volume.mean(),
+        "volatility_pct": returns.std() * math.sqrt(252) * 100 if len(returns) > 1 else None
+    }
+
+
+def _rsi(close, period: int = 14):
+    delta = close.diff().dropna().tail(period)
+    gains = delta.clip(lower=0).mean()
+    losses = -delta.clip(upper=0).mean()
+    if not losses:
+        # A flat window has no momentum either way
+        return 100.0 if gains else 50.0
+    return 100 - 100 / (1 + gains / losses)
+
+
+@profiled("fetch")
+def fetch_stock_snapshot(symbol: str, fields: List[str] = None, history_days: int = 0) -> dict:
+    """
+    Fetch the requested field groups for a symbol
+
+    Args:
+        symbol: Stock ticker symbol
+        fields: Field groups (see DataConfig.TOOL_FIELD_GROUPS)
+        history_days: Trading days of price history to summarise (0 = none)
+
+    Returns:
+        dict: Flat snapshot with numbers rounded
+    """
+    if replay_enabled():
+        return load_replay(symbol, "snapshot")
+
+    fields = set(fields or DATA_CONFIG.TOOL_DEFAULT_FIELDS)
+    stock = yf.Ticker(symbol)
+    info = stock.info
+
+    # Only pull a year of history when a group or the summary window needs it
+    long_history = bool(fields & {"ranges", "indicators", "risk"}) or history_days > 20
+    hist = stock.history(period="1y" if long_history else "1mo")
+    close = hist['Close']
+
+    data = {"symbol": symbol.upper(), "company": info.get("longName")}
+
+    if "price" in fields:
+        data.update({
+            "latest_price": close.iloc[-1],
+            "latest_date": close.index[-1].strftime('%Y-%m-%d'),
+            "change_pct": (close.iloc[-1] / close.iloc[-2] - 1) * 100 if len(close) > 1 else None,
+            "volume": hist['Volume'].iloc[-1]
+        })
+
+    if "fundamentals" in fields:
+        data.update({
+            "market_cap": info.get("marketCap"),
+            "pe_ratio": info.get("forwardPE"),
+            "trailing_pe": info.get("trailingPE"),
+            "eps": info.get("forwardEps"),
+            "dividend_yield": info.get("dividendYield"),
+            "sector": info.get("sector"),
+            "rating": info.get("recommendationKey"),
+            "target_price": info.get("targetMeanPrice")
+        })
+
+    if "ranges" in fields:
+        data.update({
+            "52wk_high": info.get("fiftyTwoWeekHigh"),
+            "52wk_high_date": close.idxmax().strftime('%Y-%m-%d'),
+            "52wk_low": info.get("fiftyTwoWeekLow"),
+            "52wk_low_date": close.idxmin().strftime('%Y-%m-%d')
+        })
+
+    if "indicators" in fields:
+        data.update({
+            "sma_20": close.tail(20).mean(),
+            "sma_50": close.tail(50).mean(),
+            "sma_200": close.tail(200).mean() if len(close) >= 200 else None,
+            "rsi_14": _rsi(close)
+        })
+
+    if "risk" in fields:
+        returns = close.pct_change().dropna()
+        data.update({
+            "beta": info.get("beta"),
+            "volatility_30d_pct": returns.tail(30).std() * math.sqrt(252) * 100,
+            "max_drawdown_1y_pct": ((close / close.cummax()) - 1).min() * 100
+        })
+
+    if history_days:
+        data["history"] = _history_summary(close, hist['Volume'], history_days)
+
+    snapshot = _compact(data)
+    record_replay(symbol, "snapshot", snapshot)
+    return snapshot
+
+
+def _compact(data: dict) -> dict:
+    """Round numbers and drop missing values"""
+    compact = {}
+    for key, value in data.items():
+        value = _compact(value) if isinstance(value, dict) else _round(value)
+        if value is not None:
+            compact[key] = value
+    return compact
+
+
+def encode_snapshot(data: dict, format: str = "json") -> str:
+    """Encode a snapshot as minified JSON or key:value lines"""
+    if format == "kv":
+        lines = []
+        for key, value in data.items():
+            if isinstance(value, dict):
+                lines.extend(f"{key}.{k}:{v}" for k, v in value.items())
+            else:
+                lines.append(f"{key}:{value}")
+        return "\n".join(lines)
+    return json.dumps(data, separators=(",", ":"))
+
+
+def get_stock_snapshot(symbol: str, fields: List[str] = None, history_days: int = 0) -> dict:
+    """Fetch a snapshot through the last-good store ("stale" is set when served from it)"""
+    key = f"{symbol.upper()}:{','.join(sorted(fields or DATA_CONFIG.TOOL_DEFAULT_FIELDS))}:{history_days}"
+    return _SNAPSHOT_STORE.fetch(key, lambda: fetch_stock_snapshot(symbol, fields, history_days))
+
+
+def get_quick_info(symbol: str) -> dict:
+    """
+    Quick stock information without AI analysis (CLI --info, API /info)
+
+    Returns:
+        dict: Headline fields, or {"error": ...}
+    """
+    if not validate_stock_symbol(symbol):
+        return {"error": f"Invalid stock symbol: {symbol}"}
+
+    try:
+        # Same snapshot the agents' stock data tool returns
+        data = get_stock_snapshot(symbol)
+        metrics = get_stock_metrics(symbol)
+        return {
+            "symbol": symbol.upper(),
+            "company": data.get("company", "N/A"),
+            "current_price": data.get("latest_price", "N/A"),
+            "latest_date": data.get("latest_date", "N/A"),
+            "market_cap": data.get("market_cap", "N/A"),
+            "pe_ratio": data.get("pe_ratio", "N/A"),
+            "52_week_high": data.get("52wk_high", "N/A"),
+            "52_week_low": data.get("52wk_low", "N/A"),
+            "rating": data.get("rating", "N/A"),
+            "sector": metrics.get("sector", "N/A"),
+            "industry": metrics.get("industry", "N/A")
+        }
+    except Exception as e:
+        return {"error": f"Failed to fetch data for {symbol}: {str(e)}"}
@@ -0,0 +1,177 @@
+"""
+Token and cost budget for batch runs.
+
+Each job's usage is estimated from the token counts of the task templates
+it will run (see utils/token_budget.py) plus the tool data and completions
+the templates do not show, and priced with the routed models. Actual usage
+is taken from the run metrics after every job and the estimates of each
+plan are scaled by what it really cost so far.
+
+Jobs run the most expensive plan on BudgetConfig.DOWNGRADE_LADDER while
+the budget left still covers the cheapest plan for every job after them;
+as it runs low the remaining jobs move to compact prompts and then to
+cheaper report types. Once even the cheapest plan no longer fits, the batch
+stops before starting another job: results are partial, but every written
+record is a complete report.
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config.settings import APP_CONFIG, BUDGET_CONFIG
+from utils.metrics import METRICS, estimate_cost
+
+
+def _usage() -> Dict[str, float]:
+    """Tokens and cost recorded so far in this process"""
+    totals = METRICS.summary()["totals"]
+    return {
+        "tokens": totals["prompt_tokens"] + totals["completion_tokens"],
+        "cost_usd": totals["cost_usd"]
+    }
+
+
+class BudgetManager:
+    """Plan and account batch jobs against a token and/or cost budget"""
+
+    def __init__(self, max_tokens: int = None, max_cost: float = None, prompt_variant: str = None):
+        """
+        Args:
+            max_tokens: Prompt plus completion tokens the batch may use
+            max_cost: Estimated USD cost the batch may incur
+            prompt_variant: Prompt variant of the top ("full") plan
+        """
+        self.limits = {"tokens": max_tokens, "cost_usd": max_cost}
+        self.prompt_variant = prompt_variant or APP_CONFIG.DEFAULT_PROMPT_VARIANT
+        self.spent = {"tokens": 0, "cost_usd": 0.0}
+        self.jobs = {}  # plan name -> jobs run
+        self._templates = {}
+        self._estimated = {}  # plan name -> summed estimates of the jobs run
+        self._actual = {}  # plan name -> summed actual usage of the jobs run
+        self._level = 0  # Current position on the downgrade ladder
+
+    def plan_variant(self, plan: dict) -> str:
+        return plan["prompt_variant"] or self.prompt_variant
+
+    def _template_tokens(self, variant: str) -> Dict[str, int]:
+        """Input tokens per task template for a prompt variant (rendered once)"""
+        if variant not in self._templates:
+            from utils.token_budget import count_tokens, get_task_templates
+
+            self._templates[variant] = {
+                name: count_tokens(description) + count_tokens(expected_output)
+                for name, (description, expected_output) in get_task_templates(variant=variant).items()
+            }
+        return self._templates[variant]
+
+    def template_estimate(self, plan: dict) -> Dict[str, float]:
+        """Tokens and cost of one job under a plan, from the task templates alone"""
+        from agents.llm import route_model
+
+        templates = self._template_tokens(self.plan_variant(plan))
+        report_type = plan["report_type"]
+        analysis_out = BUDGET_CONFIG.COMPLETION_TOKENS["analysis"]
+        report_out = BUDGET_CONFIG.COMPLETION_TOKENS.get(
+            report_type, BUDGET_CONFIG.COMPLETION_TOKENS["investment_report"]
+        )
+
+        # The crew's own report task writes investment reports; other types use the report templates
+        report_template = "crew.report" if report_type == "investment_report" else f"report.{report_type}"
+        analysis_in = (templates["crew.analysis"] + BUDGET_CONFIG.TOOL_DATA_TOKENS) * BUDGET_CONFIG.ANALYST_CALLS
+        report_in = templates[report_template] + analysis_out
+
+        analysis_model, _ = route_model("stock_analyst")
+        report_model, _ = route_model("report_writer", report_type)
+        return {
+            "tokens": analysis_in + analysis_out + report_in + report_out,
+            "cost_usd": (estimate_cost(analysis_model, analysis_in, analysis_out)
+                         + estimate_cost(report_model, report_in, report_out))
+        }
+
+    def estimate(self, plan: dict) -> Dict[str, float]:
+        """Expected tokens and cost of one job under a plan, calibrated by actual usage"""
+        estimate = self.template_estimate(plan)
+        # Scale by this plan's actual/estimated ratio, or all plans' until it has run
+        names = [plan["name"]] if self.jobs.get(plan["name"]) else list(self.jobs)
+        for key in estimate:
+            estimated = sum(self._estimated[name][key] for name in names)
+            if estimated:
+                estimate[key] *= sum(self._actual[name][key] for name in names) / estimated
+        return estimate
+
+    def remaining(self) -> Dict[str, Optional[float]]:
+        """Budget left per limit (None: unlimited)"""
+        return {key: None if limit is None else limit - self.spent[key] for key, limit in self.limits.items()}
+
+    def _fits(self, usage: Dict[str, float]) -> bool:
+        return all(
+            left is None or usage[key] * BUDGET_CONFIG.SAFETY_MARGIN <= left
+            for key, left in self.remaining().items()
+        )
+
+    def plan_next(self, remaining_jobs: int) -> Optional[dict]:
+        """
+        Choose the plan for the next job
+
+        A plan fits when the budget left covers it plus the cheapest plan for
+        every job after it. Plans only move down the ladder, so a batch never
+        goes back to more expensive reports once it has been downgraded.
+
+        Args:
+            remaining_jobs: Jobs left in the batch, including this one
+
+        Returns:
+            dict: Plan from DOWNGRADE_LADDER ({"name", "prompt_variant",
+                "report_type"} with the variant resolved), or None when the
+                budget cannot cover another job and the batch should stop
+        """
+        ladder = BUDGET_CONFIG.DOWNGRADE_LADDER
+        cheapest = self.estimate(ladder[-1])
+        later = max(0, remaining_jobs - 1)
+
+        level = None
+        for index in range(self._level, len(ladder)):
+            estimate = self.estimate(ladder[index])
+            if self._fits({key: estimate[key] + cheapest[key] * later for key in estimate}):
+                level = index
+                break
+        # Not enough left for everyone: cheapest jobs continue while the next one fits
+        if level is None and self._fits(cheapest):
+            level = len(ladder) - 1
+        if level is None:
+            return None
+
+        plan = ladder[level]
+        if level != self._level or not self.jobs:
+            METRICS.record("budget", plan=plan["name"], remaining_jobs=remaining_jobs, **self.spent)
+        self._level = level
+        return {**plan, "prompt_variant": self.plan_variant(plan)}
+
+    @contextmanager
+    def track(self, plan: dict):
+        """Charge the usage of the job run inside the block to the budget"""
+        before = _usage()
+        estimate = self.template_estimate(plan)
+        try:
+            yield
+        finally:
+            after = _usage()
+            actual = {key: after[key] - before[key] for key in before}
+            name = plan["name"]
+            self.jobs[name] = self.jobs.get(name, 0) + 1
+            for totals, usage in ((self._estimated, estimate), (self._actual, actual)):
+                plan_totals = totals.setdefault(name, {"tokens": 0, "cost_usd": 0.0})
+                for key in plan_totals:
+                    plan_totals[key] += usage[key]
+            for key in self.spent:
+                self.spent[key] += actual[key]
+
+    def format_status(self) -> str:
+        """One-line budget status"""
+        parts = []
+        for key, label, fmt in (("tokens", "tokens", "{:,.0f}"), ("cost_usd", "cost $", "{:.4f}")):
+            limit = self.limits[key]
+            if limit is not None:
+                parts.append(f"{label} {fmt.format(self.spent[key])}/{fmt.format(limit)}")
+        plans = ", ".join(f"{name} ×{count}" for name, count in self.jobs.items()) or "no jobs"
+        return f"💰 Budget: {'; '.join(parts)} ({plans})"
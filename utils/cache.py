@@ -0,0 +1,165 @@
+"""
+Small file-backed cache for JSON-serialisable values.
+
+Each namespace is a directory under AppConfig.CACHE_DIR; each entry is one
+JSON file holding the value and the time it was written, so cached results
+survive process restarts and can be shared between CLI runs.
+
+LastGoodStore builds on it to serve the last good provider response, marked
+stale, while the provider's circuit breaker is open.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from config.settings import APP_CONFIG, get_environment_config
+from utils.metrics import METRICS
+from utils.resilience import CircuitOpenError, get_circuit_breaker, is_provider_error
+
+
+class JsonFileCache:
+    """Namespaced key/value cache stored as JSON files"""
+
+    def __init__(self, namespace: str, ttl: Optional[float] = None, base_dir: str = None):
+        self.ttl = ttl
+        self.directory = os.path.join(base_dir or APP_CONFIG.CACHE_DIR, namespace)
+        self.enabled = get_environment_config()["cache_enabled"]
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get_entry(self, key: str) -> Optional[dict]:
+        """Return {"value", "created", "key"} for a key regardless of age, or None"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Any:
+        """Return the cached value, or None if missing or older than the TTL"""
+        entry = self.get_entry(key)
+        if entry is None:
+            return None
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None and time.time() - entry["created"] > ttl:
+            return None
+        return entry["value"]
+
+    def set(self, key: str, value: Any):
+        """Store a value (written atomically)"""
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        entry = {"key": key, "created": time.time(), "value": value}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, separators=(",", ":"))
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key: str):
+        """Remove a cached value"""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class LastGoodStore:
+    """
+    Stale-while-revalidate wrapper around a provider call
+
+    Successful results are stored per key. When the provider's breaker is
+    open, or a call fails with a provider error, the last good result is
+    returned with "stale": true and "as_of", and a refresh is scheduled in
+    the background for when the breaker next lets a probe through. Errors
+    about the key itself (e.g. a delisted symbol) are raised as they are and
+    do not count against the provider.
+    """
+
+    def __init__(self, namespace: str, provider: str, ttl: float = None):
+        self.provider = provider
+        self._cache = JsonFileCache(namespace, ttl=ttl or APP_CONFIG.SNAPSHOT_STALE_TTL)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def fetch(self, key: str, func: Callable[[], dict]) -> dict:
+        """
+        Call the provider through its breaker, falling back to the last good value
+
+        Raises:
+            The provider error (or CircuitOpenError) if no last good value exists
+        """
+        breaker = get_circuit_breaker(self.provider)
+        if breaker.allow():
+            try:
+                value = func()
+            except Exception as e:
+                if not is_provider_error(e):
+                    # The provider answered; the key is what failed
+                    breaker.record_success()
+                    raise
+                breaker.record_failure(e)
+                error = e
+            else:
+                breaker.record_success()
+                self._cache.set(key, value)
+                return value
+        else:
+            error = CircuitOpenError(f"{self.provider} circuit open")
+
+        entry = self._cache.get_entry(key)
+        if entry is None or time.time() - entry["created"] > self._cache.ttl:
+            raise error
+
+        METRICS.record("stale_served", provider=self.provider, key=key,
+                       age_s=time.time() - entry["created"])
+        self._revalidate(key, func)
+        return {
+            **entry["value"],
+            "stale": True,
+            "as_of": datetime.fromtimestamp(entry["created"]).isoformat(timespec="seconds")
+        }
+
+    def has_last_good(self, key: str) -> bool:
+        """Whether a last good value young enough to be served exists for a key"""
+        entry = self._cache.get_entry(key)
+        return entry is not None and time.time() - entry["created"] <= self._cache.ttl
+
+    def _revalidate(self, key: str, func: Callable[[], dict]):
+        """Refresh a key in the background once the breaker allows a probe"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                breaker = get_circuit_breaker(self.provider)
+                time.sleep(breaker.retry_in())
+                if not breaker.allow():
+                    return
+                try:
+                    value = func()
+                except Exception as e:
+                    if is_provider_error(e):
+                        breaker.record_failure(e)
+                    else:
+                        breaker.record_success()
+                else:
+                    breaker.record_success()
+                    self._cache.set(key, value)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True, name=f"revalidate-{key}").start()
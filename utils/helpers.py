@@ -1,30 +1,54 @@
 import yfinance as yf
-import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import re
 from datetime import datetime, timedelta
-import streamlit as st
+from utils.cache import LastGoodStore
+from utils.profiler import profiled
+from utils.replay_data import has_replay, load_replay, record_replay, replay_enabled
+from utils.resilience import is_provider_error
+
+# plotly and streamlit are imported inside the functions that use them, so the
+# CLI and workers can use these helpers without loading the web/charting stack
+
+SYMBOL_PATTERN = re.compile(r'^[A-Z]{1,5}$')
 
 
 def validate_stock_symbol(symbol: str) -> bool:
     """
     Validate if a stock symbol exists and is tradeable
+    
+    The check goes through the yfinance breaker and last good store like
+    every other fetch. While yfinance is failing, a symbol is accepted if
+    its validity or metrics are on record, so the analysis can run on the
+    stale data instead of failing validation.
     """
     if not symbol or len(symbol) > 10:
         return False
     
     # Basic format validation
-    if not re.match(r'^[A-Z]{1,5}$', symbol):
+    if not SYMBOL_PATTERN.match(symbol):
         return False
     
+    if replay_enabled():
+        return has_replay(symbol)
+    
+    key = symbol.upper()
     try:
-        # Quick check if ticker exists
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        return 'regularMarketPrice' in info or 'currentPrice' in info
-    except:
+        return _VALIDITY_STORE.fetch(key, lambda: {'valid': _quote_exists(symbol)})['valid']
+    except Exception:
+        return _METRICS_STORE.has_last_good(key)
+
+
+def _quote_exists(symbol: str) -> bool:
+    """Whether yfinance has a current price for a symbol (raises on provider errors)"""
+    try:
+        info = yf.Ticker(symbol).info
+    except Exception as e:
+        if is_provider_error(e):
+            raise
+        # yfinance raises on some unknown symbols instead of returning no price
         return False
+    return 'regularMarketPrice' in info or 'currentPrice' in info
 
 
 def format_response(response: str) -> str:
@@ -45,10 +69,12 @@ def format_response(response: str) -> str:
     return response
 
 
-def create_stock_chart(symbol: str, period: str = "6mo") -> go.Figure:
+def create_stock_chart(symbol: str, period: str = "6mo") -> "go.Figure":
     """
     Create an interactive stock price chart using Plotly
     """
+    import plotly.graph_objects as go
+    
     try:
         # Fetch stock data
         ticker = yf.Ticker(symbol)
@@ -144,42 +170,20 @@ def format_percentage(value: float) -> str:
     return f"{value:.2f}%"
 
 
+# Last good metrics and validity per symbol, served (marked stale) while yfinance is failing
+_METRICS_STORE = LastGoodStore("metrics", "yfinance")
+_VALIDITY_STORE = LastGoodStore("validity", "yfinance")
+
+
 def get_stock_metrics(symbol: str) -> dict:
     """
     Get key stock metrics for quick display
+    
+    While yfinance is failing the last good metrics are returned with
+    'stale': True and 'as_of' set.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        hist = ticker.history(period="1d")
-        
-        current_price = info.get('currentPrice') or hist['Close'].iloc[-1]
-        previous_close = info.get('previousClose') or hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-        
-        change = current_price - previous_close
-        change_percent = (change / previous_close) * 100 if previous_close else 0
-        
-        return {
-            'symbol': symbol,
-            'company_name': info.get('longName', symbol),
-            'current_price': current_price,
-            'change': change,
-            'change_percent': change_percent,
-            'volume': info.get('volume', 0),
-            'market_cap': info.get('marketCap', 0),
-            'pe_ratio': info.get('forwardPE'),
-            'dividend_yield': info.get('dividendYield'),
-            '52_week_high': info.get('fiftyTwoWeekHigh'),
-            '52_week_low': info.get('fiftyTwoWeekLow'),
-            'avg_volume': info.get('averageVolume'),
-            'beta': info.get('beta'),
-            'eps': info.get('forwardEps'),
-            'book_value': info.get('bookValue'),
-            'price_to_book': info.get('priceToBook'),
-            'sector': info.get('sector'),
-            'industry': info.get('industry')
-        }
-        
+        return _METRICS_STORE.fetch(symbol.upper(), lambda: _fetch_stock_metrics(symbol))
     except Exception as e:
         return {
             'error': f"Unable to fetch metrics: {str(e)}",
@@ -187,6 +191,48 @@ def get_stock_metrics(symbol: str) -> dict:
         }
 
 
+@profiled("fetch")
+def _fetch_stock_metrics(symbol: str) -> dict:
+    """Fetch key stock metrics from yfinance, or its replay recording (raises on failure)"""
+    if replay_enabled():
+        return load_replay(symbol, "metrics")
+    
+    ticker = yf.Ticker(symbol)
+    info = ticker.info
+    hist = ticker.history(period="1d")
+    
+    current_price = info.get('currentPrice') or hist['Close'].iloc[-1]
+    previous_close = info.get('previousClose') or hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+    
+    change = current_price - previous_close
+    change_percent = (change / previous_close) * 100 if previous_close else 0
+    
+    metrics = {
+        'symbol': symbol,
+        'company_name': info.get('longName', symbol),
+        'current_price': current_price,
+        'change': change,
+        'change_percent': change_percent,
+        'volume': info.get('volume', 0),
+        'market_cap': info.get('marketCap', 0),
+        'pe_ratio': info.get('forwardPE'),
+        'dividend_yield': info.get('dividendYield'),
+        '52_week_high': info.get('fiftyTwoWeekHigh'),
+        '52_week_low': info.get('fiftyTwoWeekLow'),
+        'avg_volume': info.get('averageVolume'),
+        'beta': info.get('beta'),
+        'eps': info.get('forwardEps'),
+        'book_value': info.get('bookValue'),
+        'price_to_book': info.get('priceToBook'),
+        'sector': info.get('sector'),
+        'industry': info.get('industry'),
+        'rating': info.get('recommendationKey'),
+        'latest_date': hist.index[-1].strftime('%Y-%m-%d') if not hist.empty else None
+    }
+    record_replay(symbol, "metrics", metrics)
+    return metrics
+
+
 def create_metrics_table(metrics: dict) -> pd.DataFrame:
     """
     Create a formatted metrics table for display
@@ -245,11 +291,10 @@ def export_analysis_to_pdf(content: str, filename: str):
     return content
 
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def cached_stock_data(symbol: str, period: str = "1mo"):
-    """
-    Cached version of stock data fetching to improve performance
-    """
+_cached_history = None
+
+
+def _stock_history(symbol: str, period: str = "1mo"):
     try:
         ticker = yf.Ticker(symbol)
         return ticker.history(period=period)
@@ -257,6 +302,20 @@ def cached_stock_data(symbol: str, period: str = "1mo"):
         return pd.DataFrame()
 
 
+def cached_stock_data(symbol: str, period: str = "1mo"):
+    """
+    Cached version of stock data fetching to improve performance
+    
+    The Streamlit cache is created on first use, so importing this module
+    does not import Streamlit.
+    """
+    global _cached_history
+    if _cached_history is None:
+        import streamlit as st
+        _cached_history = st.cache_data(ttl=300)(_stock_history)  # Cache for 5 minutes
+    return _cached_history(symbol, period)
+
+
 def calculate_technical_indicators(data: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate basic technical indicators
@@ -0,0 +1,240 @@
+"""
+Run instrumentation for the analysis pipeline.
+
+Records data fetches, LLM calls and tool calls as JSON lines, labelled with
+the symbol (and task, where known) of the run that produced them, and keeps
+running aggregates for an end-of-batch summary.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+from config.settings import APP_CONFIG
+
+
+# Labels (symbol, task, ...) of the run currently executing in this context
+_run_labels: ContextVar[dict] = ContextVar("run_labels", default={})
+
+
+def current_labels() -> dict:
+    """Return the labels of the run executing in the current context"""
+    return dict(_run_labels.get())
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimate the USD cost of an LLM call from the configured model pricing"""
+    pricing = APP_CONFIG.MODEL_PRICING.get(model)
+    if not pricing:
+        return 0.0
+    return (prompt_tokens * pricing["input_per_million"]
+            + completion_tokens * pricing["output_per_million"]) / 1_000_000
+
+
+class MetricsRecorder:
+    """Thread-safe recorder that emits JSON lines and aggregates per symbol"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._file = None
+        self._symbols: Dict[str, dict] = {}
+        self._concurrency: Dict[str, dict] = {}
+        self._queue_waits: Dict[str, dict] = {}
+        if path:
+            self.configure(path)
+
+    def configure(self, path: str):
+        """Start appending JSON-lines events to the given file"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def close(self):
+        """Close the JSON-lines output file"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def reset(self):
+        """Clear aggregated metrics (the JSON-lines file is kept)"""
+        with self._lock:
+            self._symbols = {}
+            self._concurrency = {}
+            self._queue_waits = {}
+
+    @contextmanager
+    def run_context(self, **labels):
+        """Label every event recorded inside the block, e.g. symbol="AAPL" """
+        token = _run_labels.set({**_run_labels.get(), **labels})
+        try:
+            yield
+        finally:
+            _run_labels.reset(token)
+
+    @contextmanager
+    def timed(self, event: str, **fields):
+        """Record an event with the duration of the wrapped block"""
+        start = time.perf_counter()
+        status = "success"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.record(event, duration_s=time.perf_counter() - start, status=status, **fields)
+
+    def record(self, event: str, **fields):
+        """Record a single event"""
+        entry = {
+            "event": event,
+            "timestamp": datetime.now().isoformat(),
+            **current_labels(),
+            **fields
+        }
+
+        with self._lock:
+            self._aggregate(entry)
+            if self._file:
+                self._file.write(json.dumps(entry, default=str) + "\n")
+                self._file.flush()
+
+    def _aggregate(self, entry: dict):
+        """Fold an event into the per-symbol aggregates (lock held)"""
+        if entry.get("priority") and "queue_s" in entry:
+            # Time spent queued for capacity, per priority class and stage
+            wait = (entry.get("queue_s") or 0.0) + (entry.get("budget_wait_s") or 0.0)
+            stats = self._queue_waits.setdefault(f"{entry['priority']} {entry['event']}", {
+                "waits": 0, "queue_s": 0.0, "max_queue_s": 0.0
+            })
+            stats["waits"] += 1
+            stats["queue_s"] += wait
+            stats["max_queue_s"] = max(stats["max_queue_s"], wait)
+
+        if entry["event"] == "concurrency":
+            # Adaptive LLM concurrency limits are per provider, not per symbol
+            limit = entry["limit"]
+            stats = self._concurrency.setdefault(entry.get("provider") or "-", {
+                "limit": limit, "min": limit, "max": limit, "changes": 0
+            })
+            stats["limit"] = limit
+            stats["min"] = min(stats["min"], limit)
+            stats["max"] = max(stats["max"], limit)
+            stats["changes"] += 1
+            return
+
+        event = entry["event"]
+        if event not in ("data_fetch", "tool_call", "llm_call", "run"):
+            return
+
+        symbol = entry.get("symbol") or "-"
+        stats = self._symbols.setdefault(symbol, {
+            "data_fetch_s": 0.0,
+            "tool_calls": 0,
+            "llm_calls": 0,
+            "llm_latency_s": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+            "duration_s": 0.0,
+            "agents": {}
+        })
+
+        if event in ("data_fetch", "tool_call"):
+            stats["data_fetch_s"] += entry.get("duration_s", 0.0)
+            if event == "tool_call":
+                stats["tool_calls"] += 1
+
+        elif event == "llm_call":
+            stats["llm_calls"] += 1
+            stats["llm_latency_s"] += entry.get("latency_s", 0.0)
+            stats["prompt_tokens"] += entry.get("prompt_tokens", 0)
+            stats["completion_tokens"] += entry.get("completion_tokens", 0)
+            stats["cost_usd"] += entry.get("cost_usd", 0.0)
+
+            key = entry.get("task") or entry.get("agent") or "-"
+            agent = stats["agents"].setdefault(key, {
+                "llm_calls": 0, "latency_s": 0.0, "max_latency_s": 0.0, "max_ttft_s": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+                "models": {}
+            })
+            agent["llm_calls"] += 1
+            agent["latency_s"] += entry.get("latency_s", 0.0)
+            agent["max_latency_s"] = max(agent["max_latency_s"], entry.get("latency_s", 0.0))
+            # Unset when the call was not streamed (or failed before the first token)
+            agent["max_ttft_s"] = max(agent["max_ttft_s"], entry.get("ttft_s") or 0.0)
+            agent["prompt_tokens"] += entry.get("prompt_tokens", 0)
+            agent["completion_tokens"] += entry.get("completion_tokens", 0)
+            agent["cost_usd"] += entry.get("cost_usd", 0.0)
+
+            # Routing decisions: calls per model, marking fallbacks
+            model = entry.get("model") or "-"
+            if entry.get("route") == "fallback":
+                model += " (fallback)"
+            agent["models"][model] = agent["models"].get(model, 0) + 1
+
+        elif event == "run":
+            stats["duration_s"] += entry.get("duration_s", 0.0)
+
+    def summary(self) -> dict:
+        """Return per-symbol aggregates plus batch totals"""
+        with self._lock:
+            symbols = json.loads(json.dumps(self._symbols))
+            concurrency = json.loads(json.dumps(self._concurrency))
+            queue_waits = json.loads(json.dumps(self._queue_waits))
+
+        totals = {
+            key: sum(s[key] for s in symbols.values())
+            for key in ("data_fetch_s", "tool_calls", "llm_calls", "llm_latency_s",
+                        "prompt_tokens", "completion_tokens", "cost_usd", "duration_s")
+        }
+        return {"symbols": symbols, "totals": totals, "concurrency": concurrency, "queue_waits": queue_waits}
+
+    def format_summary(self) -> str:
+        """Format the summary as a plain-text table"""
+        summary = self.summary()
+
+        header = (f"{'Symbol':<10}{'Run (s)':>9}{'Fetch (s)':>11}{'Tools':>7}"
+                  f"{'LLM':>5}{'LLM (s)':>9}{'Prompt':>9}{'Compl.':>8}{'Cost $':>9}")
+        lines = ["📏 Run Metrics", header, "-" * len(header)]
+
+        rows = list(summary["symbols"].items()) + [("Total", summary["totals"])]
+        for symbol, s in rows:
+            if symbol == "Total":
+                lines.append("-" * len(header))
+            lines.append(
+                f"{symbol:<10}{s['duration_s']:>9.1f}{s['data_fetch_s']:>11.2f}{s['tool_calls']:>7}"
+                f"{s['llm_calls']:>5}{s['llm_latency_s']:>9.1f}{s['prompt_tokens']:>9,}"
+                f"{s['completion_tokens']:>8,}{s['cost_usd']:>9.4f}"
+            )
+            for name, a in s.get("agents", {}).items():
+                lines.append(
+                    f"  ↳ {name:<24}{a['llm_calls']:>3} calls {a['latency_s']:>7.1f}s "
+                    f"max {a['max_latency_s']:.1f}s ttft≤{a['max_ttft_s']:.1f}s {a['prompt_tokens']:>7,}+{a['completion_tokens']:,} tok"
+                )
+                for model, calls in a.get("models", {}).items():
+                    lines.append(f"      {model} ×{calls}")
+
+        for provider, c in summary["concurrency"].items():
+            lines.append(
+                f"⚙️ {provider} concurrency limit: {c['limit']} "
+                f"(range {c['min']}-{c['max']}, {c['changes']} adjustments)"
+            )
+
+        for key, q in sorted(summary["queue_waits"].items()):
+            lines.append(
+                f"⏳ {key} queue wait: avg {q['queue_s'] / q['waits']:.2f}s, "
+                f"max {q['max_queue_s']:.2f}s over {q['waits']} waits"
+            )
+
+        return "\n".join(lines)
+
+
+# Global recorder instance
+METRICS = MetricsRecorder()
@@ -0,0 +1,331 @@
+"""
+OpenAI-compatible mock LLM server for offline throughput benchmarking.
+
+Serves /v1/chat/completions with configurable latency and generation speed.
+Responses follow the agent protocol: the first turn of a tool-using agent
+calls stock_data_tool (as a native tool call when the request carries
+`tools`, otherwise as a ReAct "Action:" block), and later turns return a
+canned final answer. No external dependencies; run standalone with
+
+    python -m utils.mock_llm --port 8765 --latency 0.5 --tps 150
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config.settings import APP_CONFIG
+
+
+DEFAULT_FINAL_ANSWER = """# {symbol} Investment Analysis Report
+
+## Executive Summary
+{symbol} shows stable fundamentals with balanced risk. **Rating: Hold**.
+
+## Key Metrics Table
+| Metric | Value |
+|--------|-------|
+| Latest Price | $100.00 |
+| Market Cap | $100.00B |
+| P/E Ratio | 20.0 |
+| 52-Week Range | $80.00 - $120.00 |
+
+## 52-Week Range Analysis
+The price sits mid-range, leaving room in both directions.
+
+## Risk Assessment
+- **Market Risk**: Moderate volatility
+- **Valuation Risk**: In line with sector
+
+## Future Outlook
+Neutral near-term outlook pending the next earnings release.
+"""
+
+# Final answer of the analysis task, which expects an AnalysisResult JSON object
+DEFAULT_ANALYSIS_RESULT = {
+    "symbol": "{symbol}",
+    "company": "{symbol} Inc.",
+    "metrics": {
+        "price": 100.0, "latest_date": "2024-01-02", "market_cap": 100000000000.0,
+        "pe_ratio": 20.0, "week52_high": 120.0, "week52_low": 80.0, "rating": "Hold"
+    },
+    "signals": [
+        {"name": "52-week position", "direction": "neutral", "rationale": "Price sits mid-range"}
+    ],
+    "risks": [
+        {"category": "Market", "level": "medium", "description": "Moderate volatility"},
+        {"category": "Valuation", "level": "low", "description": "In line with sector"}
+    ],
+    "risk_level": "medium",
+    "summary": "{symbol} shows stable fundamentals with balanced risk. Rating: Hold.",
+    "takeaways": ["Stable fundamentals", "Fair valuation", "Await next earnings release"]
+}
+
+_SYMBOL_PATTERNS = [
+    re.compile(r"Symbol:\s*([A-Z][A-Z.\-]{0,9})\b"),
+    re.compile(r"\b(?:Analyze|analysis of|report for|for|of)\s+([A-Z][A-Z.\-]{0,9})\b"),
+]
+
+
+def _messages_text(messages: list) -> str:
+    """Flatten chat messages into a single string"""
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(c.get("text", "") for c in content if isinstance(c, dict))
+        parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _detect_symbol(text: str) -> str:
+    """Find the ticker a prompt is about"""
+    for pattern in _SYMBOL_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return "AAPL"
+
+
+def _count_tokens(text: str) -> int:
+    """Cheap token estimate for usage reporting"""
+    return max(1, len(text) // 4)
+
+
+class MockLLMServer:
+    """In-process OpenAI-compatible chat completion server"""
+
+    def __init__(self, host: str = None, port: int = None, latency_s: float = None,
+                 tokens_per_second: float = None, final_answer: str = None):
+        settings = APP_CONFIG.MOCK_LLM
+        self.host = host or settings["host"]
+        self.port = settings["port"] if port is None else port
+        self.latency_s = settings["latency_s"] if latency_s is None else latency_s
+        self.tokens_per_second = tokens_per_second or settings["tokens_per_second"]
+        self.final_answer = final_answer or DEFAULT_FINAL_ANSWER
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "MockLLMServer":
+        """Start serving on a background thread"""
+        handler = type("MockLLMHandler", (_MockLLMHandler,), {"server_state": self})
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        # Port 0 picks a free port; record the real one
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def route_agents(self) -> "MockLLMServer":
+        """Point every agent (APP_CONFIG LLM settings) at this server"""
+        APP_CONFIG.LLM_MODEL = APP_CONFIG.MOCK_LLM_MODEL
+        APP_CONFIG.LLM_BASE_URL = self.base_url
+        APP_CONFIG.LLM_API_KEY = "mock-key"
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    def build_reply(self, request: dict) -> dict:
+        """Decide the assistant reply for a chat completion request"""
+        messages = request.get("messages", [])
+        text = _messages_text(messages)
+        symbol = _detect_symbol(text)
+        tools = request.get("tools") or []
+        has_tool_result = any(m.get("role") == "tool" for m in messages) or "Observation:" in text
+
+        with self._lock:
+            self.request_count += 1
+
+        if tools and not has_tool_result:
+            name = tools[0].get("function", {}).get("name", "stock_data_tool")
+            return {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps({"symbol": symbol})}
+                }]
+            }
+
+        if '"summaries"' in text:
+            # Batched executive summaries: one entry per symbol in the data lines
+            symbols = re.findall(r'^\{"symbol":"([A-Z0-9.\-]+)"', text, re.MULTILINE)
+            summaries = [
+                {"symbol": s, "summary": self.final_answer.format(symbol=s)} for s in symbols
+            ]
+            return {"role": "assistant", "content": json.dumps({"summaries": summaries})}
+
+        if "stock_data_tool" in text and "Action Input" in text and not has_tool_result:
+            content = (
+                "Thought: I need live market data first.\n"
+                "Action: stock_data_tool\n"
+                f"Action Input: {json.dumps({'symbol': symbol})}"
+            )
+        else:
+            content = (
+                "Thought: I now know the final answer\n"
+                f"Final Answer: {self._final_answer(text, symbol)}"
+            )
+        return {"role": "assistant", "content": content}
+
+    def _final_answer(self, text: str, symbol: str) -> str:
+        """Final answer body: AnalysisResult JSON for the analysis task, else the markdown report"""
+        # Match the expected-output spec, not the keys, which later tasks see in their context
+        if 'risk_level ("low"' in text:
+            return json.dumps(DEFAULT_ANALYSIS_RESULT).replace("{symbol}", symbol)
+        return self.final_answer.format(symbol=symbol)
+
+    def generation_delay(self, completion_tokens: int) -> float:
+        """Simulated time to generate a completion"""
+        return self.latency_s + completion_tokens / self.tokens_per_second
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    server_state: MockLLMServer = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [
+                {"id": APP_CONFIG.MOCK_LLM_MODEL.split("/", 1)[-1], "object": "model", "owned_by": "mock"}
+            ]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        state = self.server_state
+
+        message = state.build_reply(request)
+        content = message.get("content") or json.dumps(message.get("tool_calls"))
+        prompt_tokens = _count_tokens(_messages_text(request.get("messages", [])))
+        completion_tokens = _count_tokens(content)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+        model = request.get("model", "mock-llm")
+        finish_reason = "tool_calls" if message.get("tool_calls") else "stop"
+
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            } if include_usage else None
+            self._stream(completion_id, model, message, completion_tokens, finish_reason, usage)
+            return
+
+        time.sleep(state.generation_delay(completion_tokens))
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        })
+
+    def _stream(self, completion_id: str, model: str, message: dict,
+                completion_tokens: int, finish_reason: str, usage: dict = None):
+        """Send the reply as server-sent events at the configured token rate"""
+        state = self.server_state
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        def send(delta: dict, finish: str = None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(state.latency_s)
+        if message.get("tool_calls"):
+            send({"role": "assistant", "tool_calls": [
+                {"index": i, **call} for i, call in enumerate(message["tool_calls"])
+            ]})
+        else:
+            words = re.findall(r"\S+\s*", message["content"])
+            per_word = completion_tokens / max(1, len(words)) / state.tokens_per_second
+            send({"role": "assistant", "content": ""})
+            for word in words:
+                time.sleep(per_word)
+                send({"content": word})
+
+        send({}, finish_reason)
+        if usage:
+            # Final usage-only chunk, as OpenAI sends for stream_options.include_usage
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [], "usage": usage}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock LLM server")
+    parser.add_argument('--host', default=APP_CONFIG.MOCK_LLM["host"])
+    parser.add_argument('--port', type=int, default=APP_CONFIG.MOCK_LLM["port"])
+    parser.add_argument('--latency', type=float, default=APP_CONFIG.MOCK_LLM["latency_s"],
+                        help='Fixed latency per request in seconds')
+    parser.add_argument('--tps', type=float, default=APP_CONFIG.MOCK_LLM["tokens_per_second"],
+                        help='Simulated generation speed in tokens per second')
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.tps)
+    print(f"🧪 Mock LLM serving at {server.base_url} "
+          f"(model {APP_CONFIG.MOCK_LLM_MODEL}, latency {args.latency}s, {args.tps} tok/s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
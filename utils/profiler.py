@@ -0,0 +1,251 @@
+"""
+Per-stage profiling for slow runs (main.py --profile).
+
+Pipeline stages (imports, validate, fetch, crew_build, kickoff, format,
+save) are wrapped in profile_stage() / profiled(). Without an active
+profiler these are no-ops; with one, each stage records its wall time and
+the outermost stage runs under cProfile (one cProfile at a time per
+process, so nested and concurrent stages only add wall time). A sampling
+thread additionally records the stacks of every busy thread, labelled with
+their stage, which shows where LLM waits and helper threads spend their
+time.
+
+Each run writes <name>.pstats (cProfile, e.g. for snakeviz or `python -m
+pstats`), <name>.collapsed (folded stacks for flamegraph.pl / speedscope)
+and <name>.txt (stage times and top functions). With aggregate, a batch's
+per-symbol runs are merged and written once when the profiler is closed.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from config.settings import APP_CONFIG
+
+
+_active = None  # Profiler installed with set_profiler()
+
+
+def set_profiler(profiler: Optional["Profiler"]):
+    """Install the process-wide profiler, or None"""
+    global _active
+    _active = profiler
+
+
+def get_profiler() -> Optional["Profiler"]:
+    return _active
+
+
+@contextmanager
+def profile_stage(name: str):
+    """Profile the block as a pipeline stage (no-op unless a profiler is running a run)"""
+    profiler = _active
+    if profiler is None or not profiler.running:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+@contextmanager
+def profile_run(name: str):
+    """Profile the block as one run (no-op without a profiler)"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.run(name):
+        yield
+
+
+def profiled(name: str):
+    """Decorator form of profile_stage(), also for callables run on other threads"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _frame_label(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+
+class Profiler:
+    """cProfile per stage plus a sampling profiler over all threads"""
+
+    def __init__(self, output_dir: str = None, aggregate: bool = False, interval: float = None,
+                 on_event: Callable[[str], None] = None):
+        """
+        Args:
+            output_dir: Directory for the profile files (default: AppConfig.PROFILE_DIR)
+            aggregate: Merge all runs and write them once on close()
+            interval: Seconds between stack samples (default: AppConfig.PROFILE_SAMPLE_INTERVAL)
+            on_event: Receives a message for every profile written
+        """
+        self.output_dir = output_dir or APP_CONFIG.PROFILE_DIR
+        self.aggregate = aggregate
+        self.interval = interval or APP_CONFIG.PROFILE_SAMPLE_INTERVAL
+        self.on_event = on_event or (lambda message: None)
+        self.running = False
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._reset()
+
+    def _reset(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._stage_times: Dict[str, List[float]] = {}  # name -> [seconds, count]
+        self._samples: Dict[str, int] = {}  # collapsed stack -> samples
+        self._thread_stages: Dict[int, List[str]] = {}
+        self._recent_stages: List[tuple] = []  # (thread id, stage) in entry order
+        self._cprofile_thread = None
+        self._wall = 0.0
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record a stage on the calling thread"""
+        thread_id = threading.get_ident()
+        profile = None
+        with self._lock:
+            self._thread_stages.setdefault(thread_id, []).append(name)
+            self._recent_stages.append((thread_id, name))
+            if self._cprofile_thread is None:
+                self._cprofile_thread = thread_id
+                profile = cProfile.Profile()
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._thread_stages[thread_id].pop()
+                self._recent_stages.remove((thread_id, name))
+                totals = self._stage_times.setdefault(name, [0.0, 0])
+                totals[0] += elapsed
+                totals[1] += 1
+                if profile:
+                    self._profiles.append(profile)
+                    self._cprofile_thread = None
+
+    def _current_stage(self, thread_id: int) -> str:
+        """Innermost stage of a thread, else the most recently entered active stage (lock held)"""
+        stages = self._thread_stages.get(thread_id)
+        if stages:
+            return stages[-1]
+        return self._recent_stages[-1][1] if self._recent_stages else "other"
+
+    def _sample(self, stop: threading.Event):
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Idle pool workers waiting for work are not part of the run
+                if stack[0] == "thread.py:_worker":
+                    continue
+                with self._lock:
+                    stage = self._current_stage(thread_id)
+                thread = re.sub(r"[;\s]+", "_", names.get(thread_id, str(thread_id)))
+                key = ";".join([stage, thread] + stack[::-1])
+                self._samples[key] = self._samples.get(key, 0) + 1
+
+    @contextmanager
+    def run(self, name: str):
+        """Profile one run (a command or one symbol of a batch); nested runs are folded in"""
+        if self.running:
+            yield
+            return
+
+        if not self.aggregate:
+            self._reset()
+        self._runs += 1
+        self.running = True
+        stop = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop,), name="profiler", daemon=True)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            self.running = False
+            self._wall += time.perf_counter() - started
+            if not self.aggregate:
+                self.write(name)
+
+    def close(self):
+        """Write the aggregated profile of every run (aggregate mode)"""
+        if self.aggregate and self._runs:
+            self.write(f"batch-{self._runs}-runs")
+
+    def write(self, name: str) -> Dict[str, str]:
+        """
+        Write the .pstats, .collapsed and .txt files of the data collected
+
+        Returns:
+            dict: Paths by kind
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        base = os.path.join(self.output_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{safe}")
+        paths = {"pstats": f"{base}.pstats", "collapsed": f"{base}.collapsed", "summary": f"{base}.txt"}
+
+        stats = None
+        if self._profiles:
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(paths["pstats"])
+        else:
+            del paths["pstats"]
+
+        with open(paths["collapsed"], "w", encoding="utf-8") as f:
+            for stack, count in sorted(self._samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        with open(paths["summary"], "w", encoding="utf-8") as f:
+            f.write(self.format_summary(name, stats))
+
+        self.on_event(f"🔬 Profile for {name}: " + ", ".join(paths.values()))
+        return paths
+
+    def format_summary(self, name: str, stats: pstats.Stats = None) -> str:
+        """Stage wall times, samples per stage and the top functions by cumulative time"""
+        samples_by_stage = {}
+        for stack, count in self._samples.items():
+            stage = stack.split(";", 1)[0]
+            samples_by_stage[stage] = samples_by_stage.get(stage, 0) + count
+
+        lines = [f"Profile: {name} ({self._runs if self.aggregate else 1} runs, {self._wall:.2f}s wall)", "",
+                 f"{'Stage':<14}{'Calls':>7}{'Wall (s)':>10}{'Samples':>9}", "-" * 40]
+        for stage in sorted(set(self._stage_times) | set(samples_by_stage)):
+            seconds, calls = self._stage_times.get(stage, (0.0, 0))
+            lines.append(f"{stage:<14}{calls:>7}{seconds:>10.3f}{samples_by_stage.get(stage, 0):>9}")
+
+        if stats is not None:
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats("cumulative").print_stats(APP_CONFIG.PROFILE_TOP_FUNCTIONS)
+            lines += ["", stream.getvalue()]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,79 @@
+"""
+Replay market data provider.
+
+With AppConfig.DATA_PROVIDER = "replay", market data is served from recorded
+JSON files instead of yfinance, so the CLI, daemon and API service can be run
+offline and deterministically (e.g. together with utils/mock_llm.py). There is
+one file per symbol, <REPLAY_DATA_DIR>/<SYMBOL>.json:
+
+    {"metrics": {... get_stock_metrics fields ...},
+     "snapshot": {... stock_data_tool snapshot fields ...}}
+
+The recorded snapshot is returned whatever field groups are requested, so
+record it with every group. Setting DATA_RECORD_DIR while using live data
+writes (and merges) these files as responses come in.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+from config.settings import APP_CONFIG
+
+
+_record_lock = threading.Lock()
+
+
+def replay_enabled() -> bool:
+    """Whether market data is served from recordings"""
+    return APP_CONFIG.DATA_PROVIDER == "replay"
+
+
+def _path(directory: str, symbol: str) -> str:
+    return os.path.join(directory, f"{symbol.upper()}.json")
+
+
+def has_replay(symbol: str) -> bool:
+    """Whether recorded data exists for a symbol"""
+    return os.path.exists(_path(APP_CONFIG.REPLAY_DATA_DIR, symbol))
+
+
+def load_replay(symbol: str, kind: str) -> dict:
+    """
+    Load recorded data for a symbol
+
+    Args:
+        symbol: Stock ticker symbol
+        kind: "metrics" or "snapshot"
+
+    Raises:
+        LookupError: No recording of this kind for the symbol
+    """
+    try:
+        with open(_path(APP_CONFIG.REPLAY_DATA_DIR, symbol), encoding="utf-8") as f:
+            return json.load(f)[kind]
+    except (OSError, KeyError, ValueError):
+        raise LookupError(f"No replay {kind} data for {symbol.upper()}")
+
+
+def record_replay(symbol: str, kind: str, data: dict):
+    """Merge live data into the symbol's recording when DATA_RECORD_DIR is set"""
+    directory = APP_CONFIG.DATA_RECORD_DIR
+    if not directory:
+        return
+
+    path = _path(directory, symbol)
+    with _record_lock:
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(path, encoding="utf-8") as f:
+                recording = json.load(f)
+        except (OSError, ValueError):
+            recording = {}
+        recording[kind] = {**recording.get(kind, {}), **data}
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(recording, f, indent=2, default=str)
+        os.replace(tmp_path, path)
@@ -0,0 +1,148 @@
+"""
+Hybrid report assembly.
+
+Header blocks and numeric tables are rendered in Python from a metrics
+snapshot (see utils.helpers.get_stock_metrics); the LLM only writes the
+narrative sections. Merging the two keeps figures exact and saves the
+completion tokens the model would otherwise spend transcribing them.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List
+
+from config.settings import HYBRID_REPORT_CONFIG
+from utils.helpers import create_metrics_table, format_currency
+
+
+def _range_position(metrics: dict):
+    """Current price position within the 52-week range, as a percentage"""
+    price = metrics.get('current_price')
+    low = metrics.get('52_week_low')
+    high = metrics.get('52_week_high')
+    if None in (price, low, high) or high == low:
+        return None
+    return (price - low) / (high - low) * 100
+
+
+def render_header(symbol: str, metrics: dict, report_type: str = "investment_report") -> str:
+    """Render the report title and data header block"""
+
+    title = HYBRID_REPORT_CONFIG.REPORT_TITLES.get(report_type, "Report")
+    company = metrics.get('company_name') or symbol
+    details = [d for d in (metrics.get('sector'), metrics.get('industry')) if d]
+
+    lines = [f"**{company}**" + (f" · {' · '.join(details)}" if details else "")]
+
+    price = metrics.get('current_price')
+    if price is not None:
+        change = metrics.get('change') or 0
+        change_percent = metrics.get('change_percent') or 0
+        arrow = "▲" if change >= 0 else "▼"
+        lines.append(
+            f"**Price:** {format_currency(price)} {arrow} {format_currency(abs(change))} "
+            f"({change_percent:+.2f}%)"
+        )
+
+    position = _range_position(metrics)
+    if position is not None:
+        lines.append(
+            f"**52-Week Range:** {format_currency(metrics['52_week_low'])} - "
+            f"{format_currency(metrics['52_week_high'])} ({position:.0f}% of range)"
+        )
+
+    if metrics.get('rating'):
+        lines.append(f"**Analyst Rating:** {str(metrics['rating']).replace('_', ' ').title()}")
+
+    if metrics.get('stale'):
+        lines.append(f"*⚠️ Market data provider unavailable: showing last good data from {metrics['as_of']}*")
+    elif metrics.get('latest_date'):
+        lines.append(f"*Data as of {metrics['latest_date']}*")
+
+    # Trailing double spaces keep each detail on its own markdown line
+    return f"# 📊 {symbol} {title}\n\n" + "  \n".join(lines)
+
+
+def render_metrics_table(metrics: dict) -> str:
+    """Render the key metrics table as markdown"""
+
+    table = create_metrics_table(metrics)
+    columns = list(table.columns)
+
+    lines = [
+        "## 📈 Key Metrics",
+        "",
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|"
+    ]
+    for _, row in table.iterrows():
+        lines.append("| " + " | ".join(str(row[c]) for c in columns) + " |")
+
+    return "\n".join(lines)
+
+
+def split_sections(markdown: str) -> Dict[str, str]:
+    """Split LLM markdown into {heading: body} on level-2 headings"""
+
+    sections = {}
+    current = None
+    buffer: List[str] = []
+
+    for line in markdown.splitlines():
+        match = re.match(r"^##\s+(.+?)\s*$", line)
+        if match:
+            if current is not None:
+                sections[current] = "\n".join(buffer).strip()
+            # Normalise headings: drop emojis/markup the model may add
+            current = re.sub(r"[^\w&/\- ]", "", match.group(1)).strip()
+            buffer = []
+        elif current is not None:
+            buffer.append(line)
+
+    if current is not None:
+        sections[current] = "\n".join(buffer).strip()
+
+    return sections
+
+
+def assemble_report(symbol: str, metrics: dict, narrative: str,
+                    report_type: str = "investment_report") -> str:
+    """
+    Merge locally rendered tables with the LLM's narrative sections
+
+    Args:
+        symbol: Stock ticker symbol
+        metrics: Metrics snapshot from get_stock_metrics
+        narrative: LLM output containing the narrative sections
+        report_type: Report type the narrative was written for
+
+    Returns:
+        str: Final markdown report
+    """
+
+    expected = HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS.get(report_type, [])
+    sections = split_sections(narrative)
+
+    if not sections:
+        # Model ignored the heading format: keep its text as a single section
+        sections = {expected[0] if expected else "Analysis": narrative.strip()}
+
+    lookup = {name.lower(): name for name in sections}
+    ordered = [lookup[s.lower()] for s in expected if s.lower() in lookup]
+    ordered += [name for name in sections if name not in ordered]
+
+    parts = [render_header(symbol, metrics, report_type)]
+    table_after = HYBRID_REPORT_CONFIG.TABLE_AFTER_SECTIONS
+
+    for i, name in enumerate(ordered):
+        if i == table_after and 'error' not in metrics:
+            parts.append(render_metrics_table(metrics))
+        parts.append(f"## {name}\n\n{sections[name]}")
+
+    if len(ordered) <= table_after and 'error' not in metrics:
+        parts.append(render_metrics_table(metrics))
+
+    parts.append(f"---\n*Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}; "
+                 f"figures rendered from live market data.*")
+
+    return "\n\n".join(parts)
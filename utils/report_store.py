@@ -0,0 +1,45 @@
+"""
+Latest report per symbol.
+
+Each report record (see utils.sinks.build_record) is kept with the snapshot
+inputs it was generated from, in memory and on disk, so a long-running
+refresh loop can tell whether a symbol's data has moved since its last
+report, and a restarted one picks up where it left off.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.cache import JsonFileCache
+
+
+class ReportStore:
+    """Latest report record and its inputs, by symbol"""
+
+    def __init__(self, namespace: str = "reports"):
+        self._cache = JsonFileCache(namespace)
+        self._latest: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """Return {"record", "inputs", "created"} for the symbol's latest report, or None"""
+        symbol = symbol.upper()
+        with self._lock:
+            if symbol in self._latest:
+                return self._latest[symbol]
+        entry = self._cache.get_entry(symbol)
+        if entry is None:
+            return None
+        latest = {**entry["value"], "created": entry["created"]}
+        with self._lock:
+            self._latest.setdefault(symbol, latest)
+        return latest
+
+    def put(self, symbol: str, record: dict, inputs: dict):
+        """Store a symbol's latest report with the inputs it was generated from"""
+        symbol = symbol.upper()
+        value = {"record": record, "inputs": inputs}
+        with self._lock:
+            self._latest[symbol] = {**value, "created": time.time()}
+        self._cache.set(symbol, value)
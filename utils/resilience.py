@@ -0,0 +1,509 @@
+"""
+Deadlines, cancellation, hedged calls and circuit breakers for slow providers.
+
+A deadline set with run_with_deadline() travels with the context into every
+LLM and tool call made underneath it. Once it passes, or the caller gives up,
+the next check_deadline() raises DeadlineExceeded, so an abandoned crew stops
+at its next call instead of running to completion in the background.
+
+A circuit breaker per provider opens after consecutive failures so the rest
+of a batch fails fast instead of waiting out its own timeouts, and an AIMD
+limiter per provider keeps in-flight LLM requests near the provider's real
+capacity. Processes that share a provider account can also install a shared
+rate budget that every LLM call waits on.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextvars import ContextVar
+from typing import Callable, Optional, Tuple
+
+from config.settings import APP_CONFIG
+from utils.metrics import METRICS
+from utils.scheduler import WeightedFairQueue, current_priority
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a task or call runs past its deadline or is cancelled"""
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a provider's circuit breaker is open"""
+
+
+# Absolute deadline (time.monotonic()) and cancellation flag of the current task
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+_cancelled: ContextVar[Optional[threading.Event]] = ContextVar("cancelled", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline, or None if there is none"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline():
+    """Raise DeadlineExceeded if the current task is past its deadline or cancelled"""
+    cancelled = _cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise DeadlineExceeded("Task was cancelled")
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Task deadline exceeded")
+
+
+def effective_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Clamp a timeout to the time left before the current deadline"""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return max(0.0, remaining)
+    return max(0.0, min(timeout, remaining))
+
+
+def run_with_deadline(func: Callable, timeout: Optional[float], *args, **kwargs):
+    """
+    Run func with a deadline, cancelling it if the deadline passes
+
+    The function runs on a daemon thread; on timeout its cancellation flag is
+    set and DeadlineExceeded is raised to the caller. Nested deadlines never
+    extend an outer one.
+    """
+    timeout = effective_timeout(timeout)
+    if timeout is None:
+        return func(*args, **kwargs)
+
+    deadline = time.monotonic() + timeout
+    cancelled = threading.Event()
+    future: Future = Future()
+    context = contextvars.copy_context()
+
+    def target():
+        _deadline.set(deadline)
+        _cancelled.set(cancelled)
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=context.run, args=(target,), daemon=True).start()
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if future.done():
+            raise
+        cancelled.set()
+        raise DeadlineExceeded(f"Deadline of {timeout:.1f}s exceeded")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for percentile estimates"""
+
+    def __init__(self, window: int = None):
+        self._samples = deque(maxlen=window or APP_CONFIG.HEDGE_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile q (0-1), or None until enough samples exist"""
+        with self._lock:
+            if len(self._samples) < APP_CONFIG.HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_latency_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    """Shared latency tracker for a model or provider"""
+    with _trackers_lock:
+        if name not in _latency_trackers:
+            _latency_trackers[name] = LatencyTracker()
+        return _latency_trackers[name]
+
+
+# Worker pool for LLM calls, so callers can stop waiting on a straggler
+_call_pool = ThreadPoolExecutor(max_workers=APP_CONFIG.LLM_CALL_WORKERS, thread_name_prefix="llm-call")
+
+
+def deadline_reached() -> bool:
+    """Whether the current task is past its deadline or cancelled"""
+    try:
+        check_deadline()
+    except DeadlineExceeded:
+        return True
+    return False
+
+
+def call_with_timeout(func: Callable, timeout: Optional[float], hedge_after: Optional[float] = None,
+                      hedge: Callable[[], Optional[Callable]] = None,
+                      on_unstarted: Callable[[bool], None] = None) -> Tuple[object, bool]:
+    """
+    Call func with a timeout, optionally hedging slow calls
+
+    If hedge_after is set and the first attempt has not returned by then, a
+    second attempt is started and whichever succeeds first wins. hedge()
+    returns the callable for that attempt, or None to skip hedging when there
+    is no capacity for it (default: func again).
+
+    A running attempt cannot be interrupted: attempts that lose or outlive
+    the timeout keep running on the pool and must release whatever they hold
+    themselves when they finish. Attempts still queued when the caller gives
+    up are cancelled; on_unstarted(is_hedge) is called for each of them.
+
+    Returns:
+        tuple: (result, hedged)
+
+    Raises:
+        DeadlineExceeded: The task's deadline passed or it was cancelled
+        TimeoutError: The call itself took longer than timeout
+    """
+    try:
+        check_deadline()
+    except DeadlineExceeded:
+        if on_unstarted:
+            on_unstarted(False)
+        raise
+    requested = timeout
+    timeout = effective_timeout(timeout)
+    start = time.monotonic()
+
+    def submit(attempt: Callable, is_hedge: bool) -> Future:
+        future = _call_pool.submit(contextvars.copy_context().run, attempt)
+        if on_unstarted:
+            future.add_done_callback(lambda f: f.cancelled() and on_unstarted(is_hedge))
+        return future
+
+    futures = [submit(func, False)]
+    hedged = False
+    hedge_pending = hedge_after is not None and (timeout is None or hedge_after < timeout)
+    last_error = None
+
+    try:
+        while futures:
+            elapsed = time.monotonic() - start
+            if timeout is not None and elapsed >= timeout:
+                break
+            # Cancellation of the task is noticed between waits
+            check_deadline()
+            if hedge_pending and elapsed >= hedge_after:
+                hedge_pending = False
+                attempt = hedge() if hedge else func
+                if attempt is not None:
+                    futures.append(submit(attempt, True))
+                    hedged = True
+
+            wait_s = APP_CONFIG.DEADLINE_POLL_INTERVAL
+            if timeout is not None:
+                wait_s = min(wait_s, timeout - elapsed)
+            if hedge_pending:
+                wait_s = min(wait_s, hedge_after - elapsed)
+            done, _ = wait(futures, timeout=max(wait_s, 0.0), return_when=FIRST_COMPLETED)
+            for future in done:
+                futures.remove(future)
+                if future.exception() is None:
+                    return future.result(), hedged
+                last_error = future.exception()
+    finally:
+        for future in futures:
+            future.cancel()
+
+    if last_error is not None and not futures:
+        raise last_error
+    if requested is None or timeout < requested:
+        # The task's deadline cut the call short, not the provider
+        raise DeadlineExceeded("Task deadline exceeded")
+    raise TimeoutError(f"LLM call exceeded {timeout:.1f}s")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an exception signals provider throttling (HTTP 429)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in text or "rate limit" in text or "429" in text
+
+
+def is_provider_error(error: Exception) -> bool:
+    """
+    Whether an exception means the provider failed (transport, HTTP 5xx, rate limit)
+
+    Errors about the request itself, such as an empty history for a delisted
+    symbol, are not provider failures and must not count towards its breaker.
+    """
+    # OSError covers socket, timeout and requests' transport errors
+    if is_rate_limit_error(error) or isinstance(error, OSError):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    names = " ".join(cls.__name__ for cls in type(error).__mro__).lower()
+    return any(name in names for name in ("connection", "timeout", "httperror", "requestexception"))
+
+
+class TokenRateLimiter:
+    """Sliding one-minute budget of tokens sent to a provider"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self._spent = deque()  # (monotonic time, tokens)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        """Block until the tokens fit in the last minute's budget, then spend them"""
+        # A single request larger than the budget is let through on an empty window
+        tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            check_deadline()
+            with self._lock:
+                now = time.monotonic()
+                while self._spent and now - self._spent[0][0] >= 60:
+                    self._spent.popleft()
+                used = sum(t for _, t in self._spent)
+                if used + tokens <= self.tokens_per_minute:
+                    self._spent.append((now, tokens))
+                    return
+                wait_s = 60 - (now - self._spent[0][0])
+            time.sleep(min(max(wait_s, 0.05), 1.0))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider
+
+    closed: calls pass through. After CIRCUIT_FAILURE_THRESHOLD consecutive
+    failures the breaker opens and calls are rejected. After
+    CIRCUIT_RESET_TIMEOUT one probe call is allowed (half-open); its success
+    closes the breaker, its failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or APP_CONFIG.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or APP_CONFIG.CIRCUIT_RESET_TIMEOUT
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str, error: Exception = None):
+        """Change state and record the transition (lock held)"""
+        if state == self.state:
+            return
+        self.state = state
+        if state == "open":
+            self._opened_at = time.monotonic()
+        METRICS.record("circuit", provider=self.name, state=state,
+                       error=str(error) if error else None)
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through (0 if not open)"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may proceed now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state("half_open")
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state("closed")
+
+    def record_abandoned(self):
+        """The caller gave up (deadline or cancellation): free the probe slot without judging the provider"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self._set_state("open", error)
+            self._probing = False
+
+    def check(self):
+        """Raise CircuitOpenError unless a call may proceed"""
+        if not self.allow():
+            raise CircuitOpenError(
+                f"{self.name} circuit open after repeated failures; retry in {self.retry_in():.0f}s"
+            )
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Shared circuit breaker for a provider"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on in-flight requests to one provider
+
+    Each healthy completion raises the limit by 1/limit (about +1 per round
+    trip of `limit` requests). A 429, timeout or latency spike above
+    latency_spike_factor x the baseline cuts it by decrease_factor, at most
+    once per baseline round trip so a burst of in-flight failures counts once.
+
+    Waiters are admitted by weighted fair queueing between priority classes,
+    and interactive calls may borrow up to PRIORITY_BORROW_SLOTS slots above
+    the limit while batch calls hold slots, so they never queue behind a batch.
+    """
+
+    def __init__(self, name: str, config: dict = None):
+        config = config or APP_CONFIG.LLM_CONCURRENCY
+        self.name = name
+        self.min_limit = config["min"]
+        self.max_limit = min(config["max"], APP_CONFIG.LLM_CALL_WORKERS)
+        self.decrease_factor = config["decrease_factor"]
+        self.spike_factor = config["latency_spike_factor"]
+        self.alpha = config["baseline_alpha"]
+        self.limit = float(config["initial"])
+        self.in_flight = 0
+        self.baseline = None
+        self.history = deque(maxlen=500)  # (timestamp, limit, reason)
+        self._last_decrease = 0.0
+        self._waiting = WeightedFairQueue()
+        self._in_flight_by_class = {name: 0 for name in APP_CONFIG.PRIORITY_WEIGHTS}
+        self._condition = threading.Condition()
+
+    def _capacity(self, priority: str) -> int:
+        """Slots the class may fill, including capacity borrowed from batch work"""
+        if priority == "interactive" and self._in_flight_by_class["batch"]:
+            return int(self.limit) + APP_CONFIG.PRIORITY_BORROW_SLOTS
+        return int(self.limit)
+
+    def acquire(self, priority: str = None) -> float:
+        """
+        Wait for a free slot (honouring the current deadline)
+
+        Args:
+            priority: Priority class (default: the current context's class)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        priority = priority or current_priority()
+        ticket = object()
+        start = time.monotonic()
+        with self._condition:
+            self._waiting.push(ticket, priority)
+            try:
+                while (self._waiting.peek() != (priority, ticket)
+                       or self.in_flight >= self._capacity(priority)):
+                    check_deadline()
+                    self._condition.wait(timeout=0.5)
+            except BaseException:
+                self._waiting.remove(ticket, priority)
+                self._condition.notify_all()
+                raise
+            self._waiting.pop()
+            self.in_flight += 1
+            self._in_flight_by_class[priority] += 1
+            # The next waiter may be admissible too
+            self._condition.notify_all()
+        return time.monotonic() - start
+
+    def try_acquire(self, priority: str = None) -> bool:
+        """Take a slot only if one is free now and nobody is waiting for it (e.g. for a hedge)"""
+        priority = priority or current_priority()
+        with self._condition:
+            if len(self._waiting) or self.in_flight >= self._capacity(priority):
+                return False
+            self.in_flight += 1
+            self._in_flight_by_class[priority] += 1
+            return True
+
+    def release(self, latency: float, status: str, priority: str = None):
+        """Free a slot (taken by `priority`, default the current context's class) and adapt the limit"""
+        with self._condition:
+            self.in_flight -= 1
+            self._in_flight_by_class[priority or current_priority()] -= 1
+            previous = int(self.limit)
+            reason = status
+            spike = self.baseline is not None and latency > self.spike_factor * self.baseline
+
+            if status in ("throttled", "timeout") or (status == "success" and spike):
+                reason = "latency_spike" if status == "success" else status
+                now = time.monotonic()
+                if now - self._last_decrease >= (self.baseline or 0.0):
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif status == "success":
+                reason = "increase"
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            # Baseline follows all successful calls, so a lasting slowdown stops counting as a spike
+            if status == "success":
+                self.baseline = latency if self.baseline is None else (
+                    (1 - self.alpha) * self.baseline + self.alpha * latency
+                )
+
+            self._condition.notify_all()
+            changed = int(self.limit) != previous
+            if changed:
+                self.history.append((time.time(), int(self.limit), reason))
+
+        if changed:
+            METRICS.record("concurrency", provider=self.name, limit=int(self.limit),
+                           in_flight=self.in_flight, reason=reason)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(name: str) -> AdaptiveLimiter:
+    """Shared adaptive concurrency limiter for a provider"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = AdaptiveLimiter(name)
+        return _limiters[name]
+
+
+# Rate budget shared with other processes (set by distributed workers); when
+# set, every LLM call waits for it before being sent
+_rate_budget = None
+
+
+def set_rate_budget(budget):
+    """Install a shared rate budget (an object with acquire/spend per provider), or None"""
+    global _rate_budget
+    _rate_budget = budget
+
+
+def get_rate_budget():
+    """The shared rate budget in use, or None"""
+    return _rate_budget
@@ -0,0 +1,94 @@
+"""
+Priority classes and weighted fair queueing.
+
+Work is labelled with a priority class (AppConfig.PRIORITY_WEIGHTS:
+interactive, api, batch) using priority_class(); the label travels with the
+context into every LLM call made underneath. Wherever work waits for
+capacity (LLM concurrency slots, API job workers), waiters are served by
+weighted fair queueing between classes: each class advances a virtual clock
+by 1/weight per item served and the class with the earliest next tag goes
+first. A class that has been idle starts at the current virtual time, so a
+newly arrived interactive request is served ahead of a long batch backlog
+instead of behind it.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import APP_CONFIG
+
+
+_priority: ContextVar[Optional[str]] = ContextVar("priority", default=None)
+
+
+def current_priority() -> str:
+    """Priority class of the work executing in the current context"""
+    return _priority.get() or APP_CONFIG.DEFAULT_PRIORITY
+
+
+@contextmanager
+def priority_class(name: str):
+    """Run the block (and everything it calls) under a priority class"""
+    if name not in APP_CONFIG.PRIORITY_WEIGHTS:
+        raise ValueError(f"Unknown priority class '{name}' "
+                         f"(available: {', '.join(APP_CONFIG.PRIORITY_WEIGHTS)})")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class WeightedFairQueue:
+    """
+    FIFO per priority class, weighted fair between classes
+
+    Not thread-safe: callers hold their own lock around it.
+    """
+
+    def __init__(self, weights: Dict[str, float] = None):
+        self.weights = weights or APP_CONFIG.PRIORITY_WEIGHTS
+        self._queues = {name: deque() for name in self.weights}
+        self._start = {name: 0.0 for name in self.weights}  # Virtual start tag of each class's head
+        self._finish = {name: 0.0 for name in self.weights}  # Virtual finish tag of its last served item
+        self._virtual_time = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def push(self, item: Any, priority: str):
+        if not self._queues[priority]:
+            # A class that was idle starts now, without credit for the time it had nothing queued
+            self._start[priority] = max(self._finish[priority], self._virtual_time)
+        self._queues[priority].append(item)
+
+    def remove(self, item: Any, priority: str):
+        """Withdraw a waiting item (e.g. a caller that gave up)"""
+        try:
+            self._queues[priority].remove(item)
+        except ValueError:
+            pass
+
+    def peek(self) -> Optional[Tuple[str, Any]]:
+        """(class, item) that would be served next, or None if empty"""
+        backlogged = [name for name, queue in self._queues.items() if queue]
+        if not backlogged:
+            return None
+        priority = min(backlogged, key=lambda name: (
+            self._start[name] + 1 / self.weights[name], -self.weights[name]
+        ))
+        return priority, self._queues[priority][0]
+
+    def pop(self) -> Tuple[str, Any]:
+        """Serve the next (class, item); raises IndexError if empty"""
+        head = self.peek()
+        if head is None:
+            raise IndexError("pop from an empty WeightedFairQueue")
+        priority, item = head
+        self._queues[priority].popleft()
+        self._virtual_time = self._start[priority]
+        self._finish[priority] = self._start[priority] + 1 / self.weights[priority]
+        self._start[priority] = self._finish[priority]
+        return priority, item
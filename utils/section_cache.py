@@ -0,0 +1,92 @@
+"""
+Section-level cache for hybrid reports.
+
+Each narrative section is cached with the snapshot inputs it was written
+from (HybridReportConfig.SECTION_DEPENDENCIES). On a re-run only sections
+whose inputs moved past their thresholds are sent back to the LLM; the rest
+are reused as-is, so intraday refreshes of a watchlist are mostly cache hits.
+"""
+
+from typing import Dict, List, Tuple
+
+from config.settings import HYBRID_REPORT_CONFIG
+from utils.cache import JsonFileCache
+
+
+def section_inputs(report_type: str, section: str, metrics: dict) -> dict:
+    """Snapshot values a section depends on"""
+    fields = HYBRID_REPORT_CONFIG.SECTION_DEPENDENCIES.get(report_type, {}).get(section, [])
+    return {field: metrics.get(field) for field in fields}
+
+
+def inputs_changed(cached: dict, current: dict) -> bool:
+    """Whether any input moved past its configured threshold"""
+    if cached.keys() != current.keys():
+        return True
+    for field, value in current.items():
+        old = cached[field]
+        threshold = HYBRID_REPORT_CONFIG.SECTION_CHANGE_THRESHOLDS.get(field)
+        numeric = all(isinstance(v, (int, float)) for v in (old, value))
+        if threshold is None or not numeric or old == 0:
+            if old != value:
+                return True
+        elif abs(value - old) / abs(old) > threshold:
+            return True
+    return False
+
+
+class SectionCache:
+    """
+    Cache of narrative sections keyed by symbol, report type and section
+
+    A scope (e.g. prompt variant and model) is part of every key, so
+    sections written under one configuration are never served to another.
+    """
+
+    def __init__(self, ttl: float = None):
+        self._cache = JsonFileCache("sections", ttl=ttl or HYBRID_REPORT_CONFIG.SECTION_CACHE_TTL)
+
+    @staticmethod
+    def _key(symbol: str, report_type: str, section: str, scope: str = "") -> str:
+        return f"{symbol}:{report_type}:{section}:{scope}"
+
+    def lookup(self, symbol: str, report_type: str, metrics: dict,
+               scope: str = "") -> Tuple[Dict[str, str], List[str]]:
+        """
+        Split a report's narrative sections into reusable and stale ones
+
+        Args:
+            scope: Configuration the sections must have been written under
+
+        Returns:
+            tuple: ({section: cached text}, [sections to regenerate])
+        """
+        fresh, stale = {}, []
+        for section in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS.get(report_type, []):
+            entry = None if 'error' in metrics else self._cache.get(self._key(symbol, report_type, section, scope))
+            if entry and not inputs_changed(entry["inputs"], section_inputs(report_type, section, metrics)):
+                fresh[section] = entry["text"]
+            else:
+                stale.append(section)
+        return fresh, stale
+
+    def store(self, symbol: str, report_type: str, metrics: dict, sections: Dict[str, str], scope: str = ""):
+        """Cache freshly written sections with the inputs they were written from"""
+        if 'error' in metrics:
+            return
+
+        expected = {s.lower(): s for s in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS.get(report_type, [])}
+        for name, text in sections.items():
+            section = expected.get(name.lower())
+            if section and text:
+                self._cache.set(self._key(symbol, report_type, section, scope), {
+                    "inputs": section_inputs(report_type, section, metrics),
+                    "text": text
+                })
+
+    def invalidate(self, symbol: str, scopes: Dict[str, str] = None):
+        """Drop every cached section of a symbol (under each report type's scope in scopes)"""
+        scopes = scopes or {}
+        for report_type, sections in HYBRID_REPORT_CONFIG.NARRATIVE_SECTIONS.items():
+            for section in sections:
+                self._cache.delete(self._key(symbol, report_type, section, scopes.get(report_type, "")))
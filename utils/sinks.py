@@ -0,0 +1,232 @@
+"""
+Streaming output sinks for batch results.
+
+Each result record ({"symbol", "status", "analysis" or "error", "timestamp",
+and "structured" when a schema-validated analysis exists) is written as soon
+as it arrives, so nothing accumulates in memory and downstream readers see
+results while the batch is running.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from config.settings import APP_CONFIG
+
+
+SINK_TYPES = ["jsonl", "json", "parquet", "markdown", "markdown-dir"]
+
+# Structured columns written to Parquet (AnalysisResult.to_record fields)
+STRUCTURED_COLUMNS = {
+    "company": "string",
+    "price": "float64",
+    "latest_date": "string",
+    "market_cap": "float64",
+    "pe_ratio": "float64",
+    "week52_high": "float64",
+    "week52_low": "float64",
+    "rating": "string",
+    "risk_level": "string",
+    "bullish_signals": "int64",
+    "bearish_signals": "int64",
+    "high_risks": "int64",
+    "summary": "string"
+}
+
+
+def build_record(symbol: str, text: str, structured=None) -> dict:
+    """
+    Build a result record from an analysis output
+
+    Args:
+        symbol: Stock ticker symbol
+        text: Analysis/report text ("Error..." on failure)
+        structured: AnalysisResult for the symbol, if one was produced
+    """
+    record = {"symbol": symbol.upper(), "timestamp": datetime.now().isoformat()}
+    if text.startswith("Error"):
+        record.update({"status": "error", "error": text})
+    else:
+        record.update({"status": "success", "analysis": text})
+    if structured is not None:
+        record["structured"] = structured.to_record()
+    return record
+
+
+class MarkdownSink:
+    """Append each result as a markdown section to one file"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: dict):
+        if record["status"] == "success":
+            self._file.write(f"# Analysis for {record['symbol']}\n\n{record['analysis']}\n\n---\n\n")
+        else:
+            self._file.write(f"# Error for {record['symbol']}\n\n{record['error']}\n\n---\n\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class MarkdownDirSink:
+    """Write each result to its own <SYMBOL>.md file in a directory"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, record: dict):
+        body = record.get("analysis") if record["status"] == "success" else f"# Error\n\n{record['error']}"
+        # Write then rename so readers never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{body}\n")
+        os.replace(tmp_path, os.path.join(self.path, f"{record['symbol']}.md"))
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """Append each result as one JSON line"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonArraySink:
+    """
+    Stream results as one JSON array, so a .json output is a valid document
+
+    Each record is written as the next array element and the closing bracket
+    is written on close. Resuming reopens the array by dropping its closing
+    bracket (or continuing after the last record if the run was interrupted).
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self._count = self._reopen(path) if append and os.path.exists(path) else None
+        self._file = open(path, 'a' if self._count is not None else 'w', encoding='utf-8')
+        if self._count is None:
+            self._file.write("[")
+            self._count = 0
+
+    @staticmethod
+    def _reopen(path: str):
+        """Drop the closing bracket; returns the element count so far (0 or 1), or None if the file is empty"""
+        with open(path, 'rb+') as f:
+            content = f.read().rstrip()
+            if content.endswith(b"]"):
+                content = content[:-1].rstrip()
+            if not content:
+                return None
+            f.truncate(len(content))
+            return 0 if content == b"[" else 1
+
+    def write(self, record: dict):
+        separator = ",\n" if self._count else "\n"
+        self._file.write(separator + json.dumps(record, default=str))
+        self._file.flush()
+        self._count += 1
+
+    def close(self):
+        self._file.write("\n]\n")
+        self._file.close()
+
+
+class ParquetSink:
+    """
+    Write results to Parquet with the structured analysis as typed columns
+
+    Rows are flushed as a row group every PARQUET_ROW_GROUP_SIZE records.
+    Parquet files cannot be appended to, so a resumed batch writes to the
+    next free <name>.<n>.parquet part file.
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+
+        if append and os.path.exists(path):
+            stem, ext = os.path.splitext(path)
+            part = 1
+            while os.path.exists(f"{stem}.{part}{ext}"):
+                part += 1
+            path = f"{stem}.{part}{ext}"
+
+        self.path = path
+        self._pa = pa
+        self._schema = pa.schema(
+            [("symbol", pa.string()), ("status", pa.string()), ("timestamp", pa.string()),
+             ("error", pa.string()), ("analysis", pa.string())]
+            + [(name, pa.type_for_alias(kind)) for name, kind in STRUCTURED_COLUMNS.items()]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+
+    def write(self, record: dict):
+        row = {name: record.get(name) for name in ("symbol", "status", "timestamp", "error", "analysis")}
+        structured = record.get("structured") or {}
+        row.update({name: structured.get(name) for name in STRUCTURED_COLUMNS})
+        self._rows.append(row)
+        if len(self._rows) >= APP_CONFIG.PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def infer_sink_type(path: str, format_type: str = "markdown") -> str:
+    """Pick a sink from the output path's extension, falling back to the CLI format"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        return "parquet"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".json":
+        return "json"
+    if path.endswith(os.sep) or os.path.isdir(path):
+        return "markdown-dir"
+    return "jsonl" if format_type == "json" else "markdown"
+
+
+def open_sink(path: str, format_type: str = "markdown", append: bool = False, sink_type: str = None):
+    """
+    Open a streaming sink
+
+    Args:
+        path: Output file (or directory for markdown-dir)
+        format_type: CLI --format, used when the type cannot be inferred from path
+        append: Keep existing content (e.g. when resuming a batch)
+        sink_type: One of SINK_TYPES (default: inferred from path)
+    """
+    sink_type = sink_type or infer_sink_type(path, format_type)
+    sinks = {
+        "jsonl": JsonLinesSink,
+        "json": JsonArraySink,
+        "parquet": ParquetSink,
+        "markdown": MarkdownSink,
+        "markdown-dir": MarkdownDirSink
+    }
+    return sinks[sink_type](path, append)
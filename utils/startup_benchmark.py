@@ -0,0 +1,136 @@
+"""
+CLI startup import-time benchmark.
+
+Runs lightweight CLI commands under `python -X importtime` and checks their
+cumulative import time against AppConfig.STARTUP_IMPORT_BUDGETS, and that
+none of them loads the agent or web stack (AppConfig.STARTUP_HEAVY_MODULES).
+Exits non-zero when a budget is exceeded, so it can guard CI or cron hosts:
+
+    python -m utils.startup_benchmark --repeat 3
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from config.settings import APP_CONFIG
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+# Import path of each command. --info is measured without running it (it
+# would hit the network) by importing what the command imports.
+COMMANDS = {
+    "help": [MAIN, "--help"],
+    "config": [MAIN, "--config"],
+    "info": ["-c", "import main, tools.stock_data, utils.helpers"]
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        dict: Top-level module -> cumulative import seconds (nested imports
+        are included in their importer's time)
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that imported them
+        if not name[1:].startswith(" "):
+            modules[name.strip()] = int(cumulative) / 1e6
+    return modules
+
+
+def loaded_modules(stderr: str) -> List[str]:
+    """Every module imported (at any depth) according to `-X importtime`"""
+    names = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "[us]" not in line:
+            names.append(line.rsplit("|", 1)[1].strip())
+    return names
+
+
+def measure(command: str) -> dict:
+    """Import time and heavy modules loaded for one command"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *COMMANDS[command]],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = parse_importtime(proc.stderr)
+    heavy = sorted({
+        name.split(".")[0] for name in loaded_modules(proc.stderr)
+        if name.split(".")[0] in APP_CONFIG.STARTUP_HEAVY_MODULES
+    })
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "command": command,
+        "import_s": sum(modules.values()),
+        "heavy_modules": heavy,
+        "slowest": slowest,
+        "returncode": proc.returncode
+    }
+
+
+def run_benchmark(commands: List[str] = None, repeat: int = 1) -> List[dict]:
+    """
+    Measure each command (best of `repeat` runs) against its budget
+
+    Returns:
+        list: One row per command with import_s, budget_s and ok
+    """
+    rows = []
+    for command in commands or list(COMMANDS):
+        row = min((measure(command) for _ in range(repeat)), key=lambda r: r["import_s"])
+        row["budget_s"] = APP_CONFIG.STARTUP_IMPORT_BUDGETS.get(command)
+        row["ok"] = (
+            row["returncode"] == 0 and not row["heavy_modules"]
+            and (row["budget_s"] is None or row["import_s"] <= row["budget_s"])
+        )
+        rows.append(row)
+    return rows
+
+
+def format_benchmark(rows: List[dict]) -> str:
+    """Format benchmark rows as a plain-text report"""
+    lines = [f"{'Command':<10}{'Imports':>10}{'Budget':>10}  Result"]
+    for row in rows:
+        budget = f"{row['budget_s']:.2f}s" if row["budget_s"] is not None else "-"
+        lines.append(
+            f"{row['command']:<10}{row['import_s']:>9.3f}s{budget:>10}  {'ok' if row['ok'] else 'FAIL'}"
+        )
+        if row["heavy_modules"]:
+            lines.append(f"  heavy modules loaded: {', '.join(row['heavy_modules'])}")
+        if row["returncode"]:
+            lines.append(f"  exited with status {row['returncode']}")
+        if not row["ok"]:
+            lines.append("  slowest: " + ", ".join(f"{name} {t:.3f}s" for name, t in row["slowest"]))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CLI startup import time against its budget")
+    parser.add_argument("commands", nargs="*", metavar="COMMAND",
+                        help=f"Commands to measure: {', '.join(COMMANDS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per command, best is kept")
+    args = parser.parse_args()
+
+    unknown = [command for command in args.commands if command not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s): {', '.join(unknown)}")
+
+    rows = run_benchmark(args.commands, args.repeat)
+    print(format_benchmark(rows))
+    sys.exit(0 if all(row["ok"] for row in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
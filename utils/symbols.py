@@ -0,0 +1,177 @@
+"""
+Bulk pre-validation of batch symbols.
+
+Before a batch spends any LLM capacity, its symbols are normalised, deduped
+and checked together: against the local ticker index (AppConfig.
+TICKER_INDEX_FILE) when one is configured, against the replay recordings
+in replay mode, or otherwise with one bulk quote request per
+PREVALIDATE_CHUNK_SIZE symbols. Rejects are reported up front and only the
+symbols that can produce a report are analyzed, without a per-symbol
+network check.
+"""
+
+import os
+import re
+import threading
+from typing import List, Optional, Set
+
+import yfinance as yf
+
+from config.settings import APP_CONFIG
+from utils.cache import JsonFileCache
+from utils.helpers import SYMBOL_PATTERN
+from utils.metrics import METRICS
+from utils.replay_data import has_replay, replay_enabled
+
+
+# Symbols confirmed by a quote, so repeated batches only check new symbols
+_VALIDITY_CACHE = JsonFileCache("symbol_validity", ttl=APP_CONFIG.SYMBOL_VALIDITY_TTL)
+
+_index = None  # (path, mtime, symbols) of the loaded ticker index
+_index_lock = threading.Lock()
+
+
+def normalize_symbol(raw: str) -> str:
+    """Canonical form of a user-supplied symbol: trimmed, upper case, no '$' prefix"""
+    return str(raw).strip().lstrip("$").upper()
+
+
+def load_ticker_index(path: str = None) -> Optional[Set[str]]:
+    """
+    Symbols listed in the local ticker index, or None if none is configured
+
+    One symbol per line (or the first CSV column); blank lines, '#' comments
+    and a "symbol" header are ignored. The file is re-read when it changes.
+    """
+    global _index
+    path = path or APP_CONFIG.TICKER_INDEX_FILE
+    if not path or not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    with _index_lock:
+        if _index is None or _index[:2] != (path, mtime):
+            symbols = set()
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    symbol = normalize_symbol(re.split(r"[,\s]+", line.split("#", 1)[0].strip())[0])
+                    if symbol and symbol != "SYMBOL":
+                        symbols.add(symbol)
+            _index = (path, mtime, symbols)
+        return _index[2]
+
+
+# yfinance error messages that mean the request failed, not that the symbol is unknown
+_TRANSPORT_ERRORS = re.compile(
+    r"rate ?limit|too many requests|timed? ?out|connection|ssl|proxy|http error|50[0-4]|401|403", re.I
+)
+
+
+def _download_errors(chunk: List[str]) -> dict:
+    """Per-symbol errors yf.download recorded for the last request (it does not raise them)"""
+    errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+    return {symbol: str(errors[symbol]) for symbol in chunk if symbol in errors}
+
+
+def quote_symbols(symbols: List[str]) -> Set[str]:
+    """
+    Symbols with recent prices, fetched with one bulk request per chunk
+
+    yf.download swallows network and rate-limit failures and returns an
+    empty or all-NaN frame instead, so those are detected here.
+
+    Raises:
+        ConnectionError: The quote request failed (the symbols' validity is unknown)
+    """
+    quoted = set()
+    for i in range(0, len(symbols), APP_CONFIG.PREVALIDATE_CHUNK_SIZE):
+        chunk = symbols[i:i + APP_CONFIG.PREVALIDATE_CHUNK_SIZE]
+        data = yf.download(chunk, period="5d", group_by="ticker", progress=False, threads=True)
+
+        failed = {symbol: error for symbol, error in _download_errors(chunk).items()
+                  if _TRANSPORT_ERRORS.search(error)}
+        if failed:
+            symbol, error = next(iter(failed.items()))
+            raise ConnectionError(f"Quote request failed for {len(failed)} symbols ({symbol}: {error})")
+        # A request that returned no prices at all is an outage, not a chunk of bad symbols
+        if data is None or data.empty or data.isna().all().all():
+            raise ConnectionError(f"Quote request returned no data for {len(chunk)} symbols")
+
+        for symbol in chunk:
+            try:
+                closes = data[symbol]["Close"] if data.columns.nlevels > 1 else data["Close"]
+            except KeyError:
+                continue
+            if closes.notna().any():
+                quoted.add(symbol)
+    return quoted
+
+
+def prevalidate_symbols(symbols: List[str]) -> dict:
+    """
+    Normalise, dedupe and check a batch of symbols in bulk
+
+    Args:
+        symbols: Symbols as supplied by the user
+
+    Returns:
+        dict: "valid" (symbols to analyze, in input order), "rejected"
+            ({symbol: reason}), "duplicates" (dropped repeats), "source"
+            (what the symbols were checked against: "index", "replay",
+            "quote", or "format" when the quote request failed and only
+            the format could be checked) and "verified" (False for
+            "format": the valid symbols still need a per-symbol check)
+    """
+    candidates, rejected, duplicates = [], {}, []
+    seen = set()
+    for raw in symbols:
+        symbol = normalize_symbol(raw)
+        if not symbol:
+            continue
+        if symbol in seen:
+            duplicates.append(symbol)
+            continue
+        seen.add(symbol)
+        if SYMBOL_PATTERN.match(symbol):
+            candidates.append(symbol)
+        else:
+            rejected[symbol] = "invalid format"
+
+    with METRICS.timed("data_fetch", stage="prevalidate", symbols=len(candidates)):
+        index = load_ticker_index()
+        if index is not None:
+            source, known = "index", {s for s in candidates if s in index}
+        elif replay_enabled():
+            source, known = "replay", {s for s in candidates if has_replay(s)}
+        else:
+            source = "quote"
+            known = {s for s in candidates if _VALIDITY_CACHE.get(s)}
+            try:
+                for symbol in quote_symbols([s for s in candidates if s not in known]):
+                    _VALIDITY_CACHE.set(symbol, True)
+                    known.add(symbol)
+            except Exception:
+                # Leave the symbols to the per-symbol check rather than rejecting them all
+                source, known = "format", set(candidates)
+
+    reason = {"index": "not in ticker index", "replay": "no replay data"}.get(source, "no market data")
+    for symbol in candidates:
+        if symbol not in known:
+            rejected[symbol] = reason
+
+    return {
+        "valid": [s for s in candidates if s in known],
+        "rejected": rejected,
+        "duplicates": duplicates,
+        "source": source,
+        "verified": source != "format"
+    }
+
+
+def format_rejects(result: dict) -> str:
+    """One-paragraph pre-validation report"""
+    lines = [f"🔎 Pre-validation ({result['source']}): {len(result['valid'])} valid, "
+             f"{len(result['rejected'])} rejected, {len(result['duplicates'])} duplicates dropped"]
+    for symbol, reason in result["rejected"].items():
+        lines.append(f"   ✗ {symbol}: {reason}")
+    return "\n".join(lines)
@@ -0,0 +1,199 @@
+"""
+Prompt token budgeting for task templates.
+
+Counts the input tokens each task template costs per call so prompt size can
+be weighed against the provider's tokens-per-minute limit, and checks that
+templates keep a symbol-independent prefix for provider prompt caching.
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from config.settings import APP_CONFIG, TASK_CONFIG, COMPACT_TASK_CONFIG, DATA_CONFIG
+
+
+# Rough characters-per-token ratio used when no tokenizer is installed
+_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    """Load a tiktoken encoding, or None if tiktoken is unavailable"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, encoding_name: str = None) -> int:
+    """
+    Count tokens in a piece of text
+
+    Uses tiktoken when installed and falls back to a character-based
+    estimate otherwise.
+    """
+    if not text:
+        return 0
+
+    encoding = _get_encoding(encoding_name or APP_CONFIG.TOKENIZER_ENCODING)
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    return max(1, len(text) // _CHARS_PER_TOKEN)
+
+
+def tokenizer_name() -> str:
+    """Return the name of the tokenizer used by count_tokens"""
+    if _get_encoding(APP_CONFIG.TOKENIZER_ENCODING) is not None:
+        return f"tiktoken/{APP_CONFIG.TOKENIZER_ENCODING}"
+    return f"estimate ({_CHARS_PER_TOKEN} chars/token)"
+
+
+def get_task_templates(symbol: str = "AAPL", variant: str = "full") -> Dict[str, tuple]:
+    """
+    Render every task template for a symbol
+
+    Args:
+        symbol: Stock symbol substituted into the templates
+        variant: Prompt variant ("full" or "compact")
+
+    Returns:
+        dict: Template name -> (description, expected_output)
+    """
+    from crew.financial_crew import FinancialCrew
+    from tasks.analysis_task import get_available_task_types, create_task_by_type, with_target
+    from agents.report_writer import get_available_report_types, create_report_task_by_type
+
+    templates = {}
+
+    for name, prompt in FinancialCrew.get_task_prompts(symbol, variant).items():
+        templates[f"crew.{name}"] = prompt
+
+    config = COMPACT_TASK_CONFIG if variant == "compact" else TASK_CONFIG
+    templates["config.analysis_task"] = (with_target(config.ANALYSIS_TASK_DESCRIPTION, symbol), "")
+    templates["config.report_task"] = (with_target(config.REPORT_TASK_DESCRIPTION, symbol), "")
+
+    for task_type in get_available_task_types():
+        task = create_task_by_type(task_type, None, symbol, variant=variant)
+        templates[f"analysis.{task_type}"] = (task.description, task.expected_output)
+
+    for report_type in get_available_report_types():
+        task = create_report_task_by_type(report_type, None, symbol, variant=variant)
+        templates[f"report.{report_type}"] = (task.description, task.expected_output)
+
+    return templates
+
+
+def build_budget_report(symbol: str = "AAPL", variants: List[str] = None) -> List[dict]:
+    """
+    Count input tokens for every task template and variant
+
+    Args:
+        symbol: Stock symbol substituted into the templates
+        variants: Prompt variants to report (default: all)
+
+    Returns:
+        list: One row per template with token counts per variant
+    """
+    variants = variants or APP_CONFIG.PROMPT_VARIANTS
+    tpm_limit = DATA_CONFIG.API_RATE_LIMITS["sambanova"]["tokens_per_minute"]
+
+    rows = {}
+    for variant in variants:
+        for name, (description, expected_output) in get_task_templates(symbol, variant).items():
+            tokens = count_tokens(description) + count_tokens(expected_output)
+            row = rows.setdefault(name, {"template": name})
+            row[variant] = tokens
+            row[f"{variant}_calls_per_minute"] = tpm_limit // tokens if tokens else None
+
+    return list(rows.values())
+
+
+def format_budget_report(rows: List[dict], variants: List[str] = None) -> str:
+    """Format a token budget report as a plain-text table"""
+
+    variants = variants or APP_CONFIG.PROMPT_VARIANTS
+    tpm_limit = DATA_CONFIG.API_RATE_LIMITS["sambanova"]["tokens_per_minute"]
+
+    header = f"{'Template':<32}" + "".join(f"{v:>10}" for v in variants)
+    if len(variants) > 1:
+        header += f"{'Saved':>10}"
+
+    lines = [header, "-" * len(header)]
+    totals = {v: 0 for v in variants}
+
+    for row in rows:
+        line = f"{row['template']:<32}"
+        for v in variants:
+            line += f"{row.get(v, 0):>10,}"
+            totals[v] += row.get(v, 0)
+        if len(variants) > 1 and row.get(variants[0]):
+            saved = 1 - row.get(variants[-1], 0) / row[variants[0]]
+            line += f"{saved:>10.0%}"
+        lines.append(line)
+
+    lines.append("-" * len(header))
+    lines.append(f"{'Total':<32}" + "".join(f"{totals[v]:>10,}" for v in variants))
+    lines.append("")
+    lines.append(f"Tokenizer: {tokenizer_name()}")
+    lines.append(f"Tokens-per-minute limit: {tpm_limit:,} (template tokens only, excludes tool data)")
+
+    return "\n".join(lines)
+
+
+def check_prefix_stability(symbols: Sequence[str] = ("AAPL", "MSFT", "BRK-B"),
+                           variants: List[str] = None) -> List[dict]:
+    """
+    Check that every task template shares its static prefix across symbols
+
+    A template is stable when its rendered descriptions are byte-identical up
+    to the per-symbol target block and its expected output does not vary.
+
+    Args:
+        symbols: Symbols to render the templates for (at least two)
+        variants: Prompt variants to check (default: all)
+
+    Returns:
+        list: One row per template and variant with prefix/total tokens and stability
+    """
+    variants = variants or APP_CONFIG.PROMPT_VARIANTS
+    rows = []
+
+    for variant in variants:
+        rendered = [get_task_templates(symbol, variant) for symbol in symbols]
+        for name, (description, expected_output) in rendered[0].items():
+            descriptions = [r[name][0] for r in rendered]
+            target_at = description.find(TASK_CONFIG.TARGET_HEADER)
+            shared = len(os.path.commonprefix(descriptions))
+            stable = (
+                target_at != -1
+                and shared >= target_at
+                and all(r[name][1] == expected_output for r in rendered)
+            )
+            rows.append({
+                "template": name,
+                "variant": variant,
+                "prefix_tokens": count_tokens(description[:target_at]) if stable else 0,
+                "total_tokens": count_tokens(description) + count_tokens(expected_output),
+                "stable": stable
+            })
+
+    return rows
+
+
+def format_prefix_report(rows: List[dict]) -> str:
+    """Format a prefix stability check as a plain-text table"""
+
+    header = f"{'Template':<32}{'Variant':>9}{'Prefix':>9}{'Total':>9}{'Cached':>8}  Stable"
+    lines = [header, "-" * len(header)]
+
+    for row in rows:
+        share = row["prefix_tokens"] / row["total_tokens"] if row["total_tokens"] else 0
+        lines.append(
+            f"{row['template']:<32}{row['variant']:>9}{row['prefix_tokens']:>9,}"
+            f"{row['total_tokens']:>9,}{share:>8.0%}  {'yes' if row['stable'] else 'NO'}"
+        )
+
+    return "\n".join(lines)